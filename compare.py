@@ -0,0 +1,264 @@
+# Multi-run comparison and regression report.
+#
+# Aligns any number of stats dumps on their (interned) stat names in one
+# runs x stats matrix and compares groups of runs in bulk:
+#
+#   python3 compare.py stats_A.txt stats_B.txt
+#   python3 compare.py sweep_out/ --reference config_B --top 20
+#   python3 compare.py new_sweep/ --baseline old_sweep/ --json regressions.json
+#
+# Runs are grouped by configuration name (from the run manifest or the
+# trailer).  Without --baseline every group is compared against the
+# reference group (--reference, default the first); with --baseline, every
+# group is compared against the baseline group of the same name, so two
+# sweeps can be diffed config by config.  For each comparison the largest
+# relative movers are listed, and when both sides have repeated runs a
+# Welch t-test marks the changes that are statistically meaningful.
+
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+
+import numpy as np
+
+from stats_index import find_dumps
+from stats_parser import read_manifest, read_table
+
+
+HOST_PREFIXES = ('host',)
+
+
+# 1. Loading
+def collect_paths(inputs):
+    """Stats dump paths from files, directories and sweep.json summaries"""
+    paths = []
+    for path in inputs:
+        if path.endswith(".json") and os.path.isfile(path):
+            with open(path, "r") as f:
+                paths.extend(r['stats'] for r in json.load(f)
+                             if r.get('returncode') == 0 and r.get('stats'))
+        else:
+            paths.extend(find_dumps([path]))
+    return paths
+
+
+def run_label(path, trailer):
+    manifest = read_manifest(path)
+    if manifest is not None:
+        return manifest['name']
+    return trailer.get('Configuration Name') or os.path.basename(path)
+
+
+def load_matrix(paths, include_host=False):
+    """
+    Returns (labels, names, matrix) where matrix is runs x stats (float64,
+    nan where a run lacks a stat) holding the last dump of every run.
+    """
+    keep = None if include_host else (lambda name: not name.startswith(HOST_PREFIXES))
+    table = read_table(paths, keep)
+    matrix = np.full((len(table), len(table.names)), np.nan)
+    for columns in (table.scalars, table.vectors):
+        runs, dumps, stats = columns['run'], columns['dump'], columns['stat']
+        last = np.zeros(len(table), dtype=np.int64)
+        np.maximum.at(last, runs, dumps)
+        rows = dumps == last[runs]
+        matrix[runs[rows], stats[rows]] = columns['value'][rows]
+    labels = [run_label(p, t) for p, t in zip(table.paths, table.trailers)]
+    return labels, list(table.names), matrix
+
+
+# 2. Statistics
+def group_moments(matrix, groups, count):
+    """Per-group (n, mean, sample variance) arrays of shape (count, stats)"""
+    valid = ~np.isnan(matrix)
+    values = np.where(valid, matrix, 0.0)
+    n = np.zeros((count, matrix.shape[1]))
+    total = np.zeros_like(n)
+    np.add.at(n, groups, valid)
+    np.add.at(total, groups, values)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = total / n
+        squares = np.zeros_like(n)
+        np.add.at(squares, groups, np.where(valid, (matrix - mean[groups]) ** 2, 0.0))
+        var = squares / (n - 1)
+    return n, mean, var
+
+
+def betainc(a, b, x, iterations=200):
+    """Regularised incomplete beta I_x(a, b), vectorised (continued fraction)"""
+    a, b, x = np.broadcast_arrays(np.asarray(a, float), np.asarray(b, float), np.asarray(x, float))
+    swap = x > (a + 1) / (a + b + 2)
+    a, b, x = np.where(swap, b, a), np.where(swap, a, b), np.where(swap, 1 - x, x)
+    lgam = np.vectorize(math.lgamma)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        front = np.exp(lgam(a + b) - lgam(a) - lgam(b) + a * np.log(x) + b * np.log1p(-x)) / a
+        tiny = 1e-300
+        c = np.ones_like(x)
+        d = 1 - (a + b) * x / (a + 1)
+        d = 1 / np.where(np.abs(d) < tiny, tiny, d)
+        f = d.copy()
+        for m in range(1, iterations):
+            for numerator in (m * (b - m) * x / ((a + 2 * m - 1) * (a + 2 * m)),
+                              -(a + m) * (a + b + m) * x / ((a + 2 * m) * (a + 2 * m + 1))):
+                d = 1 + numerator * d
+                d = 1 / np.where(np.abs(d) < tiny, tiny, d)
+                c = 1 + numerator / c
+                c = np.where(np.abs(c) < tiny, tiny, c)
+                f *= c * d
+        result = front * f
+    return np.where(swap, 1 - result, result)
+
+
+def welch_test(n1, mean1, var1, n2, mean2, var2):
+    """Two-sided Welch t-test p-values (nan where either side has < 2 runs)"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        se1, se2 = var1 / n1, var2 / n2
+        se = se1 + se2
+        t = (mean2 - mean1) / np.sqrt(se)
+        df = se ** 2 / (se1 ** 2 / (n1 - 1) + se2 ** 2 / (n2 - 1))
+        p = betainc(df / 2, 0.5, df / (df + t ** 2))
+    # identical, noise-free samples: no evidence of change unless the means differ
+    p = np.where(se == 0, np.where(mean1 == mean2, 1.0, 0.0), p)
+    return np.where((n1 >= 2) & (n2 >= 2), p, np.nan)
+
+
+# 3. Comparisons
+def compare(names, base, cand, alpha=0.05, min_rel=0.0):
+    """
+    Compares two groups given as (n, mean, var) rows and returns a list of
+    per-stat dicts sorted by decreasing absolute relative change.
+    """
+    n1, mean1, var1 = base
+    n2, mean2, var2 = cand
+    delta = mean2 - mean1
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rel = np.where(mean1 != 0, delta / np.abs(mean1), np.where(delta == 0, 0.0, np.inf))
+    p = welch_test(n1, mean1, var1, n2, mean2, var2)
+    both = (n1 > 0) & (n2 > 0)
+    moved = both & (np.abs(rel) > min_rel) & (delta != 0)
+    order = np.argsort(-np.abs(np.where(moved, rel, 0.0)), kind="stable")
+    rows = []
+    for i in order[:int(moved.sum())]:
+        rows.append({
+            'stat': names[i], 'base': mean1[i], 'candidate': mean2[i],
+            'delta': delta[i], 'relative': rel[i], 'p_value': p[i],
+            'significant': bool(p[i] < alpha) if not np.isnan(p[i]) else None,
+        })
+    return rows
+
+
+def comparisons(labels, matrix, reference=None, baseline_labels=None):
+    """
+    Yields (base label, candidate label, base rows, candidate rows) index
+    arrays.  baseline_labels marks the runs of the baseline set (--baseline).
+    """
+    labels = np.array(labels, dtype=object)
+    if baseline_labels is not None:
+        is_base = np.array(baseline_labels, dtype=bool)
+        for label in dict.fromkeys(labels[~is_base]):
+            base_rows = np.flatnonzero(is_base & (labels == label))
+            if len(base_rows) == 0 and len(set(labels[is_base])) == 1:
+                base_rows = np.flatnonzero(is_base)
+            if len(base_rows):
+                yield (labels[base_rows[0]] + " (baseline)", label, base_rows,
+                       np.flatnonzero(~is_base & (labels == label)))
+        return
+    order = list(dict.fromkeys(labels))
+    reference = reference or order[0]
+    if reference not in order:
+        raise ValueError(f"No runs named {reference}")
+    for label in order:
+        if label != reference:
+            yield reference, label, np.flatnonzero(labels == reference), np.flatnonzero(labels == label)
+
+
+def report(labels, names, matrix, reference=None, baseline_labels=None,
+           alpha=0.05, min_rel=0.0):
+    """Returns one {'base', 'candidate', 'runs', 'movers'} dict per comparison"""
+    pairs = list(comparisons(labels, matrix, reference, baseline_labels))
+    # moments of every side of every comparison in one pass: side 2k is the
+    # base and side 2k+1 the candidate of comparison k
+    sides = [rows for _, _, base_rows, cand_rows in pairs for rows in (base_rows, cand_rows)]
+    index = np.concatenate(sides) if sides else np.empty(0, dtype=int)
+    groups = np.concatenate([np.full(len(rows), g) for g, rows in enumerate(sides)]) if sides \
+        else np.empty(0, dtype=int)
+    n, mean, var = group_moments(matrix[index], groups, len(sides))
+
+    results = []
+    for k, (base_label, cand_label, base_rows, cand_rows) in enumerate(pairs):
+        b, c = 2 * k, 2 * k + 1
+        results.append({
+            'base': base_label, 'candidate': cand_label,
+            'runs': [len(base_rows), len(cand_rows)],
+            'movers': compare(names, (n[b], mean[b], var[b]), (n[c], mean[c], var[c]),
+                              alpha, min_rel),
+        })
+    return results
+
+
+# 4. Command line entry point
+def print_report(results, top):
+    for result in results:
+        base_runs, cand_runs = result['runs']
+        movers = result['movers']
+        significant = sum(1 for m in movers if m['significant'])
+        print(f"{result['candidate']} ({cand_runs} runs) vs {result['base']} ({base_runs} runs): "
+              f"{len(movers)} stats changed"
+              + (f", {significant} significantly" if base_runs > 1 and cand_runs > 1 else ""))
+        for m in movers[:top]:
+            flag = {True: "*", False: " ", None: " "}[m['significant']]
+            p = "" if np.isnan(m['p_value']) else f"  p={m['p_value']:.3g}"
+            print(f"  {flag} {m['relative']:>+9.2%}  {m['base']:>14.6g} -> {m['candidate']:<14.6g} "
+                  f"{m['stat']}{p}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare stats dumps and report the largest changes")
+    parser.add_argument("inputs", nargs="+", help="Stats files, directories or sweep.json summaries")
+    parser.add_argument("--baseline", nargs="+", default=None,
+                        help="Baseline runs; every input group is compared to the baseline group of the same name")
+    parser.add_argument("--reference", default=None,
+                        help="Group the others are compared to (default: the first)")
+    parser.add_argument("--top", type=int, default=15, help="Movers to print per comparison")
+    parser.add_argument("--alpha", type=float, default=0.05, help="Significance level of the t-test")
+    parser.add_argument("--min-rel", type=float, default=0.0,
+                        help="Ignore relative changes at or below this fraction")
+    parser.add_argument("--include-host", action="store_true", help="Also compare host* timing stats")
+    parser.add_argument("--json", default=None, help="Write the full report as JSON")
+    parser.add_argument("--csv", default=None, help="Write every mover as a CSV row")
+    args = parser.parse_args(argv)
+
+    paths = collect_paths(args.inputs)
+    baseline_labels = None
+    if args.baseline:
+        base_paths = collect_paths(args.baseline)
+        baseline_labels = [True] * len(base_paths) + [False] * len(paths)
+        paths = base_paths + paths
+    labels, names, matrix = load_matrix(paths, args.include_host)
+    print(f"Loaded {len(paths)} runs x {len(names)} stats")
+    results = report(labels, names, matrix, args.reference, baseline_labels, args.alpha, args.min_rel)
+    print_report(results, args.top)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2, default=float)
+        print(f"Comparison saved as {args.json}")
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(['base', 'candidate', 'stat', 'base_value', 'candidate_value',
+                             'delta', 'relative', 'p_value', 'significant'])
+            for result in results:
+                for m in result['movers']:
+                    writer.writerow([result['base'], result['candidate'], m['stat'], m['base'],
+                                     m['candidate'], m['delta'], m['relative'], m['p_value'],
+                                     m['significant']])
+        print(f"Comparison saved as {args.csv}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,257 @@
+# Adaptive design-space search.
+#
+# Instead of hand-picking configurations (as final_optimized_values.py was
+# picked from the A-H grid), this searches DVFS operating point, L1/L2 size
+# and associativity and core count for the lowest value of an objective such
+# as the energy-delay product:
+#
+#   python3 dse.py --gem5 build/RISCV/gem5.opt --objective edp --budget 60 \
+#       -- --cmd <riscv binary>
+#
+# Each bracket uses successive halving: many candidates get short runs
+# (--maxinsts of the first rung), the best 1/eta of them are promoted to
+# longer runs, and only the survivors of the last rung are run in full.
+# Candidates for a bracket are proposed by a surrogate model (a bootstrap
+# ensemble of ridge regressions over the spec parameters) fitted to every
+# result so far.  All runs of a rung go through sweep.run_sweep, so they run
+# in parallel and hit the result cache.
+
+import argparse
+import itertools
+import json
+import math
+import os
+import sys
+
+import numpy as np
+
+from result_cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_SIZE, ResultCache
+from specs import CONFIGS, make_spec, parse_frequency, parse_size, parse_voltage
+from stats_parser import run_summary
+from sweep import DEFAULT_SCRIPT, run_sweep
+
+
+# 1. Search space
+# DVFS operating points keep voltage and frequency paired as on real silicon.
+DEFAULT_SPACE = {
+    'dvfs': [('500MHz', '0.7V'), ('1GHz', '0.8V'), ('1.5GHz', '0.9V'),
+             ('1.8GHz', '0.9V'), ('2GHz', '1.0V')],
+    'l1_size': ['8kB', '16kB', '32kB', '64kB'],
+    'l1_assoc': [2, 4, 8],
+    'l2_size': ['256kB', '512kB', '1MB', '2MB'],
+    'l2_assoc': [8, 16],
+    'num_cpu': [1, 2, 4, 8],
+}
+
+
+def load_space(path):
+    """Loads a search space from JSON; 'dvfs' entries are [frequency, voltage] pairs"""
+    with open(path, "r") as f:
+        space = json.load(f)
+    space['dvfs'] = [tuple(point) for point in space['dvfs']]
+    return space
+
+
+def point_spec(point, base):
+    """Turns a point of the search space into a spec"""
+    frequency, voltage = point['dvfs']
+    name = (f"dse_{frequency}_{voltage}_l1-{point['l1_size']}-{point['l1_assoc']}"
+            f"_l2-{point['l2_size']}-{point['l2_assoc']}_cpu{point['num_cpu']}")
+    overrides = {k: v for k, v in base.items() if k != 'name'}
+    overrides.update(
+        frequency=frequency, voltage=voltage, num_cpu=point['num_cpu'],
+        l1i_size=point['l1_size'], l1d_size=point['l1_size'],
+        l1i_assoc=point['l1_assoc'], l1d_assoc=point['l1_assoc'],
+        l2_size=point['l2_size'], l2_assoc=point['l2_assoc'],
+    )
+    return make_spec(name, **overrides)
+
+
+def point_features(point):
+    """Numeric features of a point for the surrogate model"""
+    frequency, voltage = point['dvfs']
+    f = parse_frequency(frequency) / 1e9
+    v = parse_voltage(voltage)
+    return [
+        1.0, f, v, v * v * f, 1.0 / f,
+        math.log2(parse_size(point['l1_size'])), math.log2(point['l1_assoc']),
+        math.log2(parse_size(point['l2_size'])), math.log2(point['l2_assoc']),
+        math.log2(point['num_cpu']),
+    ]
+
+
+def all_points(space):
+    keys = sorted(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))]
+
+
+# 2. Objectives (per instruction, so runs of different lengths compare)
+OBJECTIVES = {
+    'edp': lambda m: m['energy_per_inst'] * m['seconds_per_inst'],
+    'ed2p': lambda m: m['energy_per_inst'] * m['seconds_per_inst'] ** 2,
+    'energy': lambda m: m['energy_per_inst'],
+    'delay': lambda m: m['seconds_per_inst'],
+}
+
+
+# 3. Surrogate model
+class Surrogate:
+    """Bootstrap ensemble of ridge regressions predicting log(objective)"""
+
+    def __init__(self, members=16, alpha=1.0, seed=0):
+        self.members = members
+        self.alpha = alpha
+        self.rng = np.random.default_rng(seed)
+        self.weights = None
+
+    def fit(self, X, y):
+        X = np.asarray(X, dtype=float)
+        y = np.log(np.asarray(y, dtype=float))
+        self.mean = X[:, 1:].mean(axis=0)
+        self.scale = X[:, 1:].std(axis=0) + 1e-9
+        X = self._normalise(X)
+        reg = self.alpha * np.eye(X.shape[1])
+        reg[0, 0] = 0.0  # do not shrink the intercept
+        weights = []
+        for _ in range(self.members):
+            idx = self.rng.integers(len(X), size=len(X))
+            A = X[idx]
+            weights.append(np.linalg.solve(A.T @ A + reg, A.T @ y[idx]))
+        self.weights = np.array(weights)
+        return self
+
+    def _normalise(self, X):
+        X = np.array(X, dtype=float)
+        X[:, 1:] = (X[:, 1:] - self.mean) / self.scale
+        return X
+
+    def predict(self, X):
+        """Returns (mean, std) of the predicted log objective"""
+        preds = self._normalise(X) @ self.weights.T
+        return preds.mean(axis=1), preds.std(axis=1)
+
+
+def propose(space, evaluated, count, rng, explore=1.0):
+    """
+    Picks count unevaluated points: random ones until there is enough data
+    for the surrogate, then the ones with the lowest confidence bound.  Points
+    stopped at early rungs count too, as the objectives are per instruction.
+    """
+    candidates = [p for p in all_points(space) if json.dumps(p, sort_keys=True) not in evaluated]
+    if len(candidates) <= count:
+        return candidates
+    data = list(evaluated.values())
+    if len(data) < 2 * len(point_features(candidates[0])):
+        return [candidates[i] for i in rng.choice(len(candidates), count, replace=False)]
+
+    surrogate = Surrogate(seed=int(rng.integers(1 << 31)))
+    surrogate.fit([point_features(v['point']) for v in data], [v['objective'] for v in data])
+    mean, std = surrogate.predict([point_features(p) for p in candidates])
+    order = np.argsort(mean - explore * std)
+    return [candidates[i] for i in order[:count]]
+
+
+# 4. Successive halving
+def evaluate(points, maxinsts, args, sim_args, cache, base, outdir):
+    """Runs points at one fidelity and returns [(point, metrics or None)]"""
+    specs = [point_spec(p, base) for p in points]
+    rung_args = list(sim_args) + (["--maxinsts", str(maxinsts)] if maxinsts else [])
+    results = run_sweep(specs, args.gem5, rung_args, outdir, args.jobs, args.script, cache)
+    evaluated = []
+    for point, result in zip(points, results):
+        metrics = None
+        if result['returncode'] == 0 and result['stats']:
+            metrics = run_summary(result['stats'])
+        evaluated.append((point, metrics))
+    return evaluated
+
+
+def search(args, sim_args):
+    space = load_space(args.space) if args.space else DEFAULT_SPACE
+    base = CONFIGS[args.base]
+    objective = OBJECTIVES[args.objective]
+    rungs = [int(r) if r != "full" else None for r in args.rungs.split(",")]
+    bracket_size = args.eta ** (len(rungs) - 1)
+    cache = None if args.no_cache else ResultCache(args.cache_dir, args.cache_size)
+    rng = np.random.default_rng(args.seed)
+
+    evaluated = {}
+    runs_used = 0
+    bracket = 0
+    while runs_used < args.budget:
+        points = propose(space, evaluated, bracket_size, rng, args.explore)
+        if not points:
+            break
+        print(f"DSE: bracket {bracket} with {len(points)} candidates ({runs_used}/{args.budget} runs used)")
+        for rung, maxinsts in enumerate(rungs):
+            points = points[:max(0, args.budget - runs_used)]
+            if not points:
+                break
+            outdir = os.path.join(args.outdir, f"bracket{bracket}_rung{rung}")
+            results = evaluate(points, maxinsts, args, sim_args, cache, base, outdir)
+            runs_used += len(points)
+
+            scored = []
+            for point, metrics in results:
+                if metrics is None:
+                    continue
+                value = objective(metrics)
+                final = rung == len(rungs) - 1
+                evaluated[json.dumps(point, sort_keys=True)] = {
+                    'point': point, 'name': point_spec(point, base)['name'],
+                    'rung': rung, 'final': final, 'objective': value, 'metrics': metrics,
+                }
+                scored.append((value, point))
+            scored.sort(key=lambda item: item[0])
+            points = [p for _, p in scored[:max(1, len(scored) // args.eta)]]
+        bracket += 1
+
+    final = sorted((v for v in evaluated.values() if v['final']), key=lambda v: v['objective'])
+    return final, runs_used
+
+
+# 5. Command line entry point
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    sim_args = []
+    if "--" in argv:
+        split = argv.index("--")
+        argv, sim_args = argv[:split], argv[split + 1:]
+
+    parser = argparse.ArgumentParser(description="Surrogate-guided successive-halving design-space search")
+    parser.add_argument("--gem5", required=True, help="Path to the gem5 binary")
+    parser.add_argument("--script", default=DEFAULT_SCRIPT)
+    parser.add_argument("--objective", choices=sorted(OBJECTIVES), default="edp")
+    parser.add_argument("--budget", type=int, default=60, help="Maximum number of gem5 runs")
+    parser.add_argument("--rungs", default="1000000,10000000,full",
+                        help="Instruction budget per successive-halving rung, 'full' runs to completion")
+    parser.add_argument("--eta", type=int, default=3, help="Keep the best 1/eta of each rung")
+    parser.add_argument("--explore", type=float, default=1.0,
+                        help="Weight of the surrogate's uncertainty when proposing points")
+    parser.add_argument("--space", default=None, help="JSON search space (default: DEFAULT_SPACE)")
+    parser.add_argument("--base", default="config_B", help="Spec providing latencies and memory size")
+    parser.add_argument("--top", type=int, default=5, help="Number of configurations to report")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-j", "--jobs", type=int, default=None)
+    parser.add_argument("--outdir", default="dse_out")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--cache-size", default=DEFAULT_MAX_SIZE)
+    parser.add_argument("--no-cache", action="store_true")
+    args = parser.parse_args(argv)
+
+    final, runs_used = search(args, sim_args)
+    print(f"DSE: {runs_used} runs, {len(final)} configurations fully evaluated")
+    print(f"{'rank':<5} {args.objective:>12} {'ipc':>8}  configuration")
+    for rank, entry in enumerate(final[:args.top], 1):
+        print(f"{rank:<5} {entry['objective']:>12.4g} {entry['metrics']['ipc']:>8.4f}  {entry['name']}")
+
+    os.makedirs(args.outdir, exist_ok=True)
+    report = os.path.join(args.outdir, "dse_results.json")
+    with open(report, "w") as f:
+        json.dump({'objective': args.objective, 'runs': runs_used, 'ranking': final}, f, indent=2)
+    print(f"DSE results saved as {report}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
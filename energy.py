@@ -0,0 +1,597 @@
+# Post-simulation energy accounting.
+#
+# Power is integrated over the simulated time of every stats dump instead of
+# being evaluated once, before m5.simulate(), from C·V²·F with C = 1 F.  Each
+# dump (a whole run, one --stats-period interval or one SMARTS sample)
+# records the operating point it ran at (system.cpu_clk_domain.clock and
+# system.cpu_voltage_domain.voltage, likewise for the system domain), so
+# every interval is charged at its own voltage and frequency:
+#
+#   E = sum over intervals and components of C_eff · V² · (events + idle · other cycles)
+#
+# where C_eff is the calibrated effective switched capacitance of a component
+# per active cycle (or access) and idle the fraction of it still switching
+# on a clock-gated cycle.  Cores are charged by activity instead: per
+# committed instruction of every op class (committedInstType::*), per load
+# and store and per busy and idle cycle.  Static power scales with the core
+# count and the SRAM capacity, the supply voltage and the die temperature,
+# which a lumped-RC thermal model integrates from interval to interval.
+# Dumps of runs with gem5 power models attached (system_builder.py
+# --power-models) carry native power stats for the CPUs and caches; they
+# are reported next to these formulas (native_energy), not in their place,
+# since the MathExpr models are coarser (see attach_power_models).
+# Energy, average power and the
+# energy-delay product can be recomputed for any dump, old ones included:
+#
+#   python3 energy.py stats_<run id>.txt
+#   python3 energy.py stats_<run id>.txt --capacitance core=4e-11 --json energy.json
+#   python3 energy.py --sweep sweep_out/*/stats_*.txt
+#
+# Only the standard library is used, so system_builder.py runs the same
+# accounting inside gem5 once the simulation has finished.  The formulas
+# only use arithmetic, so table_energy() evaluates them on NumPy arrays
+# holding every run of a sweep at once.
+
+import argparse
+import json
+import math
+import re
+import sys
+
+
+# Effective switched capacitance (F) per active cycle of a core and per
+# access of the other components.  Calibrated against published figures for
+# small in-order RISC-V cores in 28-45nm: ~34 pJ per active core cycle,
+# ~10 pJ per L1 access, ~25 pJ per L2 access, ~5 pJ per crossbar packet
+# and ~15 pJ per 64-byte memory controller transfer, all at 1.0 V.
+CAPACITANCE = {
+    'core': 34e-12,
+    'l1i': 10e-12,
+    'l1d': 10e-12,
+    'l2': 25e-12,
+    'interconnect': 5e-12,
+    'memory': 15e-12,
+}
+
+# Fraction of a component's active switching that remains on an idle
+# (clock-gated) cycle: the clock tree and the ungated flops.
+IDLE_ACTIVITY = 0.1
+
+# Activity-based core model: energy (J at 1.0 V, scaled by V²) of every
+# committed instruction of an op class in the datapath, on top of a
+# per-busy-cycle cost for fetch, decode and the pipeline registers.  Loads
+# and stores add their address generation and TLB lookup; the cache access
+# itself is charged to l1d.
+OP_ENERGY = {
+    'No_OpClass': 2e-12,
+    'IntAlu': 8e-12,
+    'IntMult': 22e-12,
+    'IntDiv': 60e-12,
+    'FloatAdd': 28e-12,
+    'FloatCmp': 16e-12,
+    'FloatCvt': 20e-12,
+    'FloatMult': 38e-12,
+    'FloatMultAcc': 45e-12,
+    'FloatDiv': 90e-12,
+    'FloatSqrt': 110e-12,
+    'FloatMisc': 16e-12,
+    'MemRead': 10e-12,
+    'MemWrite': 10e-12,
+    'FloatMemRead': 12e-12,
+    'FloatMemWrite': 12e-12,
+    'IprAccess': 15e-12,
+    'InstPrefetch': 5e-12,
+}
+# op classes not listed above, by name prefix
+OP_PREFIX_ENERGY = (('Simd', 35e-12), ('Vector', 45e-12), ('Matrix', 80e-12),
+                    ('Float', 30e-12))
+DEFAULT_OP_ENERGY = 10e-12
+CYCLE_ENERGY = 18e-12
+LOAD_ENERGY = 6e-12
+STORE_ENERGY = 5e-12
+
+# Caches: the 'l1i', 'l1d' and 'l2' capacitances are per hit of a cache of
+# REFERENCE_GEOMETRY (bytes, ways).  Other geometries scale like CACTI's
+# trends: bitline and wordline energy with ~sqrt(capacity), tag compare and
+# way selection with associativity.  A miss costs a tag lookup plus the line
+# fill, a writeback the read-out of a dirty line, both in units of one hit.
+REFERENCE_GEOMETRY = {'l1i': (16 * 1024, 2), 'l1d': (16 * 1024, 2), 'l2': (256 * 1024, 8)}
+SIZE_EXPONENT = 0.5
+ASSOC_EXPONENT = 0.4
+MISS_WEIGHT = 1.3
+WRITEBACK_WEIGHT = 1.0
+CACHE_TYPES = {'L1ICache': 'l1i', 'L1DCache': 'l1d', 'L2Cache': 'l2'}
+
+# Interconnect: the 'interconnect' capacitance is per packet (arbitration and
+# header) of the L2 bus and membus; payload bytes and snoop filter lookups
+# are charged on top.
+BYTE_ENERGY = 0.06e-12
+SNOOP_ENERGY = 2e-12
+BUSES = ('system.l2bus.', 'system.membus.')
+
+# Static power: leakage of every core and of every KiB of SRAM at T_REF
+# and 1.0 V.  Subthreshold leakage grows with the supply through DIBL and
+# roughly doubles every 35 K.
+LEAKAGE = {'core': 8e-3, 'sram_kib': 30e-6}
+T_REF = 60.0
+TEMP_COEFF = 0.02
+DIBL_COEFF = 1.5
+T_MAX = 150.0
+
+# Lumped-RC thermal model of the die: ambient (°C), junction-to-ambient
+# resistance (K/W) and heat capacity (J/K).  Without an initial temperature
+# a run starts at the steady state of its first interval, since a
+# simulated window is a sample of a longer-running workload.
+THERMAL = {'ambient': 45.0, 'resistance': 20.0, 'capacitance': 0.01}
+STEADY_ITERATIONS = 20
+
+DYNAMIC_COMPONENTS = tuple(CAPACITANCE)
+STATIC_COMPONENTS = ('cpu_leakage', 'l2_leakage')
+COMPONENTS = DYNAMIC_COMPONENTS + STATIC_COMPONENTS
+CPU_COMPONENTS = ('core', 'l1i', 'l1d', 'cpu_leakage')
+CORE_NAME = re.compile(r"^system\.(cpu|switch_cpus)(\d*)\.(.+)$")
+
+
+# 1. Reading the operating point and activity of one dump
+def positive(x):
+    """max(x, 0) for floats and arrays alike"""
+    return (x + abs(x)) / 2
+
+
+def core_prefixes(values):
+    """
+    Stat prefixes of the measured cores of a dump: system.cpu. or
+    system.cpuN., or the switched-in system.switch_cpusN. if they ran.
+    """
+    groups = {}
+    for name in values:
+        match = CORE_NAME.match(name)
+        if match and match.group(3) == 'numCycles':
+            groups.setdefault(match.group(1), []).append(f"system.{match.group(1)}{match.group(2)}.")
+    switched = groups.get('switch_cpus', [])
+    if switched and any(any_nonzero(values[p + 'numCycles']) for p in switched):
+        return sorted(switched)
+    return sorted(groups.get('cpu', []))
+
+
+def operating_point(values):
+    """(seconds, cpu volts, cpu Hz, system volts, system Hz) of a dump"""
+    freq = values.get('simFreq', 1e12)
+    seconds = values['simTicks'] / freq
+    cpu_hz = freq / values['system.cpu_clk_domain.clock']
+    sys_hz = freq / values['system.clk_domain.clock']
+    return (seconds, values.get('system.cpu_voltage_domain.voltage', 1.0), cpu_hz,
+            values.get('system.voltage_domain.voltage', 1.0), sys_hz)
+
+
+def any_nonzero(x):
+    """True if x, a float or an array of runs, is nonzero anywhere"""
+    return bool((x != 0).any()) if hasattr(x, 'any') else x != 0
+
+
+def op_energy(op_class, coefficients=None):
+    """Energy per committed instruction of an op class at 1.0 V"""
+    table = dict(OP_ENERGY, **(coefficients or {}))
+    if op_class in table:
+        return table[op_class]
+    for prefix, energy in OP_PREFIX_ENERGY:
+        if op_class.startswith(prefix):
+            return energy
+    return DEFAULT_OP_ENERGY
+
+
+def core_activity_energy(values, prefix, voltage, cycles, coefficients=None):
+    """
+    Dynamic energy of one core from its committed instruction mix, loads,
+    stores and busy/idle cycles, or None if the dump has no instruction mix.
+    """
+    mix = prefix + 'commitStats0.committedInstType::'
+    ops = [name for name in values if name.startswith(mix) and not name.endswith('::total')]
+    if not ops:
+        return None
+    get = values.get
+    busy = get(prefix + 'exec_context.thread_0.numBusyCycles', get(prefix + 'numCycles', 0.0))
+    energy = sum(values[name] * op_energy(name[len(mix):], coefficients) for name in ops)
+    energy = (energy
+              + get(prefix + 'commitStats0.numLoadInsts', 0.0) * LOAD_ENERGY
+              + get(prefix + 'commitStats0.numStoreInsts', 0.0) * STORE_ENERGY
+              + busy * CYCLE_ENERGY
+              + positive(cycles - busy) * CYCLE_ENERGY * IDLE_ACTIVITY)
+    return voltage ** 2 * energy
+
+
+def exp(x):
+    """math.exp for floats, numpy.exp for arrays of runs"""
+    if hasattr(x, 'shape'):
+        import numpy as np
+        return np.exp(x)
+    return math.exp(x)
+
+
+def switched(capacitance, voltage, events, cycles):
+    """Energy of events active cycles/accesses out of cycles clock cycles"""
+    return capacitance * voltage ** 2 * (events + IDLE_ACTIVITY * positive(cycles - events))
+
+
+def cache_geometry(caches):
+    """
+    {'l1i': (bytes, ways), 'l1d': ..., 'l2': ...} from a {path: params}
+    cache table like the run manifest's system.caches.
+    """
+    geometry = {}
+    for params in caches.values():
+        key = CACHE_TYPES.get(params.get('type'))
+        if key is not None:
+            geometry[key] = (params['size'], params['assoc'])
+    return geometry
+
+
+def cache_scale(key, geometry=None):
+    """Per-access energy of cache key relative to its REFERENCE_GEOMETRY"""
+    ref_size, ref_assoc = REFERENCE_GEOMETRY[key]
+    size, assoc = (geometry or {}).get(key, REFERENCE_GEOMETRY[key])
+    return (size / ref_size) ** SIZE_EXPONENT * (assoc / ref_assoc) ** ASSOC_EXPONENT
+
+
+def cache_events(values, prefix):
+    """Hits plus the weighted misses and writebacks of a cache, in hits"""
+    get = values.get
+    return (get(prefix + 'overallHits::total', 0.0)
+            + MISS_WEIGHT * get(prefix + 'overallMisses::total', 0.0)
+            + WRITEBACK_WEIGHT * get(prefix + 'writebacks::total', 0.0))
+
+
+def interconnect_energy(values, capacitance, voltage, cycles):
+    """Packets, payload bytes and snoop filter lookups of the L2 bus and membus"""
+    get = values.get
+    packets = payload = snoops = 0.0
+    for bus in BUSES:
+        packets = packets + get(bus + 'pktCount::total', 0.0)
+        payload = payload + get(bus + 'pktSize::total', 0.0)
+        snoops = (snoops + get(bus + 'snoop_filter.totRequests', 0.0)
+                  + get(bus + 'snoop_filter.totSnoops', 0.0))
+    return (switched(capacitance, voltage, packets, cycles)
+            + voltage ** 2 * (payload * BYTE_ENERGY + snoops * SNOOP_ENERGY))
+
+
+# 2. Static power and the thermal model
+def leakage_scale(temperature):
+    """Leakage at temperature (°C) relative to T_REF, capped at T_MAX"""
+    return exp(TEMP_COEFF * (temperature - positive(temperature - T_MAX) - T_REF))
+
+
+def static_reference(values, geometry=None):
+    """
+    {'cpu_leakage', 'l2_leakage'} static power (W) of a dump at T_REF: the
+    cores and their L1s at the CPU voltage, the L2 at the system voltage.
+    """
+    _, cpu_v, _, sys_v, _ = operating_point(values)
+    sizes = {key: size for key, (size, _) in dict(REFERENCE_GEOMETRY, **(geometry or {})).items()}
+    cores = 0.0
+    for prefix in core_prefixes(values):
+        cores = cores + (values.present(prefix + 'numCycles') if hasattr(values, 'present') else 1.0)
+    per_core = LEAKAGE['core'] + LEAKAGE['sram_kib'] * (sizes['l1i'] + sizes['l1d']) / 1024
+    return {
+        'cpu_leakage': cores * per_core * cpu_v * exp(DIBL_COEFF * (cpu_v - 1.0)),
+        'l2_leakage': LEAKAGE['sram_kib'] * sizes['l2'] / 1024 * sys_v * exp(DIBL_COEFF * (sys_v - 1.0)),
+    }
+
+
+def thermal_solve(dynamic, seconds, static, thermal=None, initial=None):
+    """
+    Integrates the lumped-RC die temperature over consecutive intervals of
+    constant dynamic power (W), lengths seconds and static power at T_REF
+    static, with the leakage following the temperature.  Every entry may be
+    a float or an array holding all runs of a sweep.  Returns the die
+    temperature at the end of every interval and the mean leakage_scale over
+    every interval.
+    """
+    p = dict(THERMAL, **(thermal or {}))
+    tau = p['resistance'] * p['capacitance']
+    if not dynamic:
+        return [], []
+    temperature = initial
+    if temperature is None:
+        temperature = p['ambient']
+        for _ in range(STEADY_ITERATIONS):
+            temperature = p['ambient'] + p['resistance'] * (
+                dynamic[0] + static[0] * leakage_scale(temperature))
+    temperatures, scales = [], []
+    for power, dt, leak in zip(dynamic, seconds, static):
+        start = temperature
+        steady = p['ambient'] + p['resistance'] * (power + leak * leakage_scale(start))
+        temperature = steady + (start - steady) * exp(-dt / tau)
+        temperatures.append(temperature)
+        scales.append((leakage_scale(start) + leakage_scale(temperature)) / 2)
+    return temperatures, scales
+
+
+# 3. Accounting
+def native_energy(values, seconds):
+    """
+    {component: joules} from the dynamicPower and staticPower stats of the
+    gem5 power models (system_builder.py --power-models) in a dump: CPUs
+    are 'core', their caches 'l1i'/'l1d', the L2 'l2', and the static
+    power goes to 'cpu_leakage' or 'l2_leakage'.  Empty without them.
+    """
+    energy = {}
+    for name, value in values.items():
+        for kind in ('dynamicPower', 'staticPower'):
+            suffix = '.power_model.' + kind
+            if not name.endswith(suffix):
+                continue
+            path = name[:-len(suffix)]
+            if path.startswith('system.l2cache'):
+                key = 'l2' if kind == 'dynamicPower' else 'l2_leakage'
+            elif kind == 'staticPower':
+                key = 'cpu_leakage'
+            elif path.endswith('.icache'):
+                key = 'l1i'
+            elif path.endswith('.dcache'):
+                key = 'l1d'
+            else:
+                key = 'core'
+            energy[key] = energy.get(key, 0.0) + value * seconds
+    return energy
+
+
+def interval_energy(values, capacitance=None, coefficients=None, geometry=None):
+    """
+    {component: joules} of the dynamic energy of one dump.  Cores are charged by their committed
+    instruction mix (core_activity_energy; per busy cycle at the 'core'
+    capacitance for dumps without one), caches per hit, miss and writeback
+    scaled to their geometry (see cache_geometry), the L2 bus and membus
+    per packet, byte and snoop and the memory controller per 64-byte
+    transfer, each at the voltage of its clock domain and with idle cycles
+    at IDLE_ACTIVITY.  coefficients overrides OP_ENERGY entries.
+    """
+    c = dict(CAPACITANCE, **(capacitance or {}))
+    get = values.get
+    seconds, cpu_v, cpu_hz, sys_v, sys_hz = operating_point(values)
+    cpu_cycles = seconds * cpu_hz
+    sys_cycles = seconds * sys_hz
+
+    energy = dict.fromkeys(DYNAMIC_COMPONENTS, 0.0)
+    for prefix in core_prefixes(values):
+        core = core_activity_energy(values, prefix, cpu_v, cpu_cycles, coefficients)
+        if core is None:
+            busy = get(prefix + 'exec_context.thread_0.numBusyCycles', get(prefix + 'numCycles', 0.0))
+            core = switched(c['core'], cpu_v, busy, cpu_cycles)
+        # with arrays of runs, cores only some of the runs have cost nothing in the others
+        present = values.present(prefix + 'numCycles') if hasattr(values, 'present') else 1.0
+        energy['core'] = energy['core'] + present * core
+        # the L1s always belong to the system.cpu[N] objects
+        cache_prefix = prefix.replace('switch_cpus', 'cpu')
+        for cache, key in (('icache', 'l1i'), ('dcache', 'l1d')):
+            events = cache_events(values, f"{cache_prefix}{cache}.")
+            energy[key] = energy[key] + present * switched(
+                c[key] * cache_scale(key, geometry), cpu_v, events, cpu_cycles)
+    energy['l2'] = switched(c['l2'] * cache_scale('l2', geometry), sys_v,
+                            cache_events(values, 'system.l2cache.'), sys_cycles)
+    energy['interconnect'] = interconnect_energy(values, c['interconnect'], sys_v, sys_cycles)
+    transfers = (get('system.mem_ctrl.bytesRead::total', 0.0)
+                 + get('system.mem_ctrl.bytesWritten::total', 0.0)) / 64
+    energy['memory'] = switched(c['memory'], sys_v, transfers, sys_cycles)
+    return energy
+
+
+def account(dumps, capacitance=None, coefficients=None, geometry=None,
+            thermal=None, initial_temperature=None):
+    """
+    Energy accounting over a list of {stat name: value} dumps, one per
+    interval, with leakage following the die temperature of thermal_solve.
+    Returns the per-interval breakdown and the totals: energy (J), average
+    CPU/memory/total power (W), simulated seconds, the energy-delay
+    product, energy per instruction, the core's dynamic energy per
+    instruction and the peak temperature.  native_energy holds the
+    energies of the gem5 power models in the dumps, if any, per component.
+    """
+    dynamic, static, points = [], [], []
+    for values in dumps:
+        dynamic.append(interval_energy(values, capacitance, coefficients, geometry))
+        static.append(static_reference(values, geometry))
+        points.append(operating_point(values))
+    powers = [sum(energy.values()) / point[0] if point[0] else 0.0
+              for energy, point in zip(dynamic, points)]
+    temperatures, scales = thermal_solve(powers, [point[0] for point in points],
+                                         [sum(leak.values()) for leak in static],
+                                         thermal, initial_temperature)
+
+    intervals = []
+    totals = dict.fromkeys(COMPONENTS, 0.0)
+    native_totals = {}
+    seconds = insts = 0.0
+    for values, energy, leak, point, temperature, scale in zip(
+            dumps, dynamic, static, points, temperatures, scales):
+        interval_seconds, cpu_v, cpu_hz, _, _ = point
+        energy = dict(energy, **{key: leak[key] * scale * interval_seconds for key in leak})
+        native = native_energy(values, interval_seconds)
+        for key in native:
+            native_totals[key] = native_totals.get(key, 0.0) + native[key]
+        temperature = values.get('system.thermal_domain.temperature', temperature)
+        intervals.append({'seconds': interval_seconds, 'voltage': cpu_v, 'frequency': cpu_hz,
+                          'temperature': temperature, 'energy': sum(energy.values()),
+                          'components': energy, 'native': native})
+        for key in COMPONENTS:
+            totals[key] = totals[key] + energy[key]
+        seconds = seconds + interval_seconds
+        insts = insts + values.get('simInsts', 0.0)
+
+    cpu_energy = sum(totals[k] for k in CPU_COMPONENTS)
+    memory_energy = sum(totals[k] for k in COMPONENTS if k not in CPU_COMPONENTS)
+    energy = cpu_energy + memory_energy
+    return {
+        'cpu_power': cpu_energy / seconds if seconds else 0.0,
+        'memory_power': memory_energy / seconds if seconds else 0.0,
+        'total_power': energy / seconds if seconds else 0.0,
+        'energy': energy,
+        'cpu_energy': cpu_energy,
+        'memory_energy': memory_energy,
+        'static_energy': sum(totals[k] for k in STATIC_COMPONENTS),
+        'components': totals,
+        'native_energy': native_totals,
+        'seconds': seconds,
+        'edp': energy * seconds,
+        'energy_per_inst': energy / insts if insts else float('nan'),
+        'core_energy_per_inst': totals['core'] / insts if insts else float('nan'),
+        'peak_temperature': max(i['temperature'] for i in intervals) if intervals else None,
+        'capacitance': dict(CAPACITANCE, **(capacitance or {})),
+        'cache_geometry': {key: list(geometry[key]) for key in geometry} if geometry else None,
+        'thermal': dict(THERMAL, **(thermal or {})),
+        'intervals': intervals,
+    }
+
+
+class TableValues:
+    """
+    {stat name: array over runs} view of one dump of every run of a
+    stats_parser.StatsTable, with missing stats as 0, so the functions above
+    evaluate a whole sweep in one NumPy pass.
+    """
+
+    def __init__(self, table, dump=-1):
+        self.table = table
+        self.dump = dump
+        self.columns = {}
+
+    def __iter__(self):
+        return iter(self.table.names)
+
+    def __getitem__(self, name):
+        import numpy as np
+
+        if name not in self.table.index:
+            raise KeyError(name)
+        if name not in self.columns:
+            self.columns[name] = np.nan_to_num(self.table.column(name, self.dump))
+        return self.columns[name]
+
+    def get(self, name, default=None):
+        return self[name] if name in self.table.index else default
+
+    def present(self, name):
+        """1.0 for the runs that have stat name, 0.0 for the others"""
+        import numpy as np
+
+        return (~np.isnan(self.table.column(name, self.dump))).astype(float)
+
+
+def table_energy(table, capacitance=None, coefficients=None, geometry=None, dump=-1,
+                 thermal=None, initial_temperature=None):
+    """
+    Vectorised accounting of one dump of every run of a StatsTable, thermal
+    model included: returns {component: joules per run} plus 'energy',
+    'seconds', 'total_power', 'energy_per_inst', 'core_energy_per_inst' and
+    'temperature' arrays.  The sizes and associativities of geometry may be
+    arrays with one entry per run.
+    """
+    return dump_energy(TableValues(table, dump), capacitance, coefficients, geometry,
+                       thermal, initial_temperature)
+
+
+def dump_energy(values, capacitance=None, coefficients=None, geometry=None,
+                thermal=None, initial_temperature=None):
+    """
+    Accounting of a single dump whose values may be arrays (of runs or of
+    operating points), as returned by table_energy.
+    """
+    import numpy as np
+
+    result = interval_energy(values, capacitance, coefficients, geometry)
+    seconds = operating_point(values)[0]
+    static = static_reference(values, geometry)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dynamic = sum(result[k] for k in DYNAMIC_COMPONENTS) / seconds
+        (temperature,), (scale,) = thermal_solve([dynamic], [seconds], [sum(static.values())],
+                                                 thermal, initial_temperature)
+        for key in STATIC_COMPONENTS:
+            result[key] = static[key] * scale * seconds
+        energy = sum(result[k] for k in COMPONENTS)
+        insts = values.get('simInsts', 0.0)
+        result.update({
+            'energy': energy,
+            'seconds': seconds,
+            'total_power': energy / seconds,
+            'energy_per_inst': energy / insts,
+            'core_energy_per_inst': result['core'] / insts,
+            'temperature': temperature,
+        })
+    return result
+
+
+def read_dumps(path):
+    """{stat name: value} of every dump in a stats file"""
+    from timeseries import StatsFollower, dump_values
+
+    return [dump_values(lines) for lines in StatsFollower(path).new_dumps()]
+
+
+def parse_capacitance(items):
+    """['core=4e-11', ...] -> {'core': 4e-11}"""
+    capacitance = {}
+    for item in items:
+        key, _, value = item.partition("=")
+        if key not in CAPACITANCE:
+            raise ValueError(f"Unknown component {key}, expected one of {', '.join(COMPONENTS)}")
+        capacitance[key] = float(value)
+    return capacitance
+
+
+# 4. Command line entry point
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Energy accounting over the dumps of a stats file")
+    parser.add_argument("stats", nargs="+")
+    parser.add_argument("--capacitance", action="append", default=[], metavar="COMPONENT=F",
+                        help="Override the effective capacitance of a component; may be repeated")
+    parser.add_argument("--json", default=None, help="Write the accounting as JSON")
+    parser.add_argument("--sweep", action="store_true",
+                        help="Vectorised per-run table of the last dump of every file")
+    parser.add_argument("--ambient", type=float, default=THERMAL['ambient'],
+                        help="Ambient temperature of the thermal model (°C)")
+    parser.add_argument("--initial-temperature", type=float, default=None,
+                        help="Die temperature at the start of a run (default: steady state)")
+    args = parser.parse_args(argv)
+
+    capacitance = parse_capacitance(args.capacitance)
+    thermal = {'ambient': args.ambient}
+    if args.sweep:
+        import numpy as np
+        from stats_parser import read_table, run_geometry
+
+        geometries = [run_geometry(path) for path in args.stats]
+        geometry = {key: tuple(np.array([g[key][i] for g in geometries], dtype=float) for i in (0, 1))
+                    for key in REFERENCE_GEOMETRY if all(key in g for g in geometries)}
+        result = table_energy(read_table(args.stats), capacitance, geometry=geometry,
+                              thermal=thermal, initial_temperature=args.initial_temperature)
+        static = result['cpu_leakage'] + result['l2_leakage']
+        print(f"{'stats':<40} {'energy_J':>12} {'power_W':>10} {'static':>7} {'temp_C':>7} "
+              f"{'J/inst':>12} {'core J/inst':>12}")
+        for i, path in enumerate(args.stats):
+            print(f"{path:<40} {result['energy'][i]:>12.6g} {result['total_power'][i]:>10.4g} "
+                  f"{static[i] / result['energy'][i]:>7.1%} {result['temperature'][i]:>7.2f} "
+                  f"{result['energy_per_inst'][i]:>12.6g} {result['core_energy_per_inst'][i]:>12.6g}")
+        return 0
+
+    from stats_parser import run_geometry
+
+    results = {}
+    for path in args.stats:
+        result = results[path] = account(read_dumps(path), capacitance, geometry=run_geometry(path),
+                                         thermal=thermal, initial_temperature=args.initial_temperature)
+        print(f"{path}: {len(result['intervals'])} intervals, {result['seconds']:.6g} s, "
+              f"{result['energy']:.6g} J, {result['total_power']:.6g} W "
+              f"(CPU {result['cpu_power']:.6g} W, memory {result['memory_power']:.6g} W), "
+              f"EDP {result['edp']:.6g} J·s, peak {result['peak_temperature']:.2f} °C")
+        for key in COMPONENTS:
+            native = result['native_energy'].get(key)
+            print(f"  {key:<13} {result['components'][key]:.6g} J"
+                  + (f" (gem5 power model {native:.6g} J)" if native is not None else ""))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Energy accounting saved as {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,280 @@
+# Analytical frequency scaling from a single run.
+#
+# A TimingSimpleCPU blocks on every L1 miss, and the L2, the buses and the
+# memory sit in the system clock domain, so the simulated time of a core
+# splits into core cycles, which scale with the CPU clock, and memory stall
+# time, which does not:
+#
+#   ticks(f) = core_cycles * period(f) + stall_ticks
+#
+# stall_ticks is the L1 miss latency of the core (overallMissLatency) or,
+# for dumps without it, its L1 misses times the L2 latency plus its share of
+# the L2 misses times the memory latency.  From one run the predictor
+# extrapolates simTicks, IPC and energy (energy.py at the rescaled cycle
+# counts) to any number of (voltage, frequency) points in one NumPy pass:
+#
+#   python3 freqscale.py stats_<run id>.txt --point 0.7V@500MHz --point 1.0V@2GHz
+#   python3 freqscale.py stats_<run id>.txt --validate sweep_out/
+#
+# --validate predicts every other run from the base run at that run's
+# operating point and reports the relative errors; runs whose caches, core
+# count or instruction count differ from the base are flagged, since only
+# the clock and voltage are extrapolated.
+#
+# split_cycles() and rescale() only use the standard library and work on
+# floats and NumPy arrays alike; the DVFS governor (governor.py) runs them
+# inside gem5 to predict every interval at the operating point it chose.
+
+import argparse
+import csv
+import json
+import os
+import sys
+
+from energy import core_prefixes, dump_energy, operating_point, read_dumps
+from specs import parse_frequency, parse_voltage
+
+
+# Latencies for dumps without miss latency stats: an L2 hit and a memory
+# access (SimpleMemory's default 30ns plus the membus), in seconds.
+L2_HIT_SECONDS = 20e-9
+MEMORY_SECONDS = 36e-9
+
+# Stats that describe the operating point rather than count events; the
+# last dump's value is kept when the dumps of a periodic run are merged.
+POINT_SUFFIXES = ('.clock', '.voltage', 'simFreq', 'finalTick')
+
+# Per-core stats that count cycles and follow the predicted time
+CYCLE_STATS = ('numCycles', 'exec_context.thread_0.numBusyCycles',
+               'exec_context.thread_0.numIdleCycles')
+
+
+# 1. Loading
+def merge_dumps(dumps):
+    """One {stat: value} dict for a run: counters summed over its dumps"""
+    merged = {}
+    for values in dumps:
+        for name, value in values.items():
+            if name in merged and not name.endswith(POINT_SUFFIXES):
+                merged[name] += value
+            else:
+                merged[name] = value
+    return merged
+
+
+def parse_point(text):
+    """'0.9V@1.8GHz' -> (0.9, 1.8e9)"""
+    voltage, _, frequency = text.partition("@")
+    if not frequency:
+        raise ValueError(f"Operating point {text} is not VOLTAGE@FREQUENCY")
+    return parse_voltage(voltage), parse_frequency(frequency)
+
+
+# 2. Model
+def maximum(a, b):
+    """max(a, b) for floats and arrays alike"""
+    return (a + b + abs(a - b)) / 2
+
+
+def split_cycles(values):
+    """
+    Returns (prefixes, cycles, stall_ticks) lists with one entry per core:
+    measured cycles and the part of the run spent waiting for L1 misses.
+    """
+    get = values.get
+    prefixes = core_prefixes(values)
+    period = values['system.cpu_clk_domain.clock']
+    freq = get('simFreq', 1e12)
+    l2_misses = get('system.l2cache.overallMisses::total', 0.0)
+    l1_misses = [sum(get(f"{p.replace('switch_cpus', 'cpu')}{c}.overallMisses::total", 0.0)
+                     for c in ('icache', 'dcache')) for p in prefixes]
+    total_l1_misses = sum(l1_misses) or 1.0
+    cycles, stalls = [], []
+    for prefix, misses in zip(prefixes, l1_misses):
+        cache_prefix = prefix.replace('switch_cpus', 'cpu')
+        latency = [get(f"{cache_prefix}{c}.overallMissLatency::total") for c in ('icache', 'dcache')]
+        if all(l is not None for l in latency):
+            stall = sum(latency)
+        else:
+            stall = (misses * L2_HIT_SECONDS
+                     + l2_misses * misses / total_l1_misses * MEMORY_SECONDS) * freq
+        core_cycles = get(prefix + 'numCycles', 0.0)
+        cycles.append(core_cycles)
+        stalls.append(min(stall, core_cycles * period))
+    return prefixes, cycles, stalls
+
+
+def rescale(values, voltage, frequency):
+    """
+    Copy of a dump's values as predicted at another CPU voltage (V) and
+    frequency (Hz), floats or arrays of points: time, clock, voltage and
+    cycle counts rescaled, every event count kept.
+    """
+    freq = values.get('simFreq', 1e12)
+    base_period = values['system.cpu_clk_domain.clock']
+    # gem5 clock periods are whole ticks
+    period = (freq / frequency + 0.5) // 1
+    scaled = dict(values)
+    sim_ticks = None
+    for prefix, cycles, stall in zip(*split_cycles(values)):
+        if not cycles:
+            continue
+        ticks = (cycles - stall / base_period) * period + stall
+        sim_ticks = ticks if sim_ticks is None else maximum(sim_ticks, ticks)
+        for suffix in CYCLE_STATS:
+            if prefix + suffix in values:
+                scaled[prefix + suffix] = values[prefix + suffix] * ticks / period / cycles
+    if sim_ticks is None:
+        sim_ticks = values['simTicks'] * period / base_period
+    scaled.update({
+        'simTicks': sim_ticks,
+        'simSeconds': sim_ticks / freq,
+        'system.cpu_clk_domain.clock': period,
+        'system.cpu_voltage_domain.voltage': voltage,
+    })
+    return scaled
+
+
+def predict(values, voltages, frequencies, geometry=None, capacitance=None, thermal=None):
+    """
+    Extrapolates one run to arrays of voltages (V) and frequencies (Hz).
+    Returns arrays (one entry per point) of sim_ticks, sim_seconds, ipc,
+    energy, total_power, edp, energy_per_inst and the memory-stall share of
+    the time.
+    """
+    import numpy as np
+
+    voltages = np.asarray(voltages, dtype=float)
+    frequencies = np.asarray(frequencies, dtype=float)
+    scaled = rescale(values, voltages, frequencies)
+    energy = dump_energy(scaled, capacitance, geometry=geometry, thermal=thermal)
+    sim_ticks = scaled['simTicks']
+    seconds = scaled['simSeconds']
+    stalls = split_cycles(values)[2]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return {
+            'voltage': voltages,
+            'frequency': frequencies,
+            'sim_ticks': sim_ticks,
+            'sim_seconds': seconds,
+            'ipc': values.get('simInsts', 0.0) / (sim_ticks / scaled['system.cpu_clk_domain.clock']),
+            'energy': energy['energy'],
+            'total_power': energy['total_power'],
+            'edp': energy['energy'] * seconds,
+            'energy_per_inst': energy['energy_per_inst'],
+            'memory_fraction': max(stalls, default=0.0) / sim_ticks,
+        }
+
+
+def actual(values, geometry=None, capacitance=None, thermal=None):
+    """The same metrics as predict() for a run at its own operating point"""
+    energy = dump_energy(values, capacitance, geometry=geometry, thermal=thermal)
+    period = values['system.cpu_clk_domain.clock']
+    seconds = operating_point(values)[0]
+    return {
+        'sim_ticks': values['simTicks'],
+        'ipc': values.get('simInsts', 0.0) / (values['simTicks'] / period),
+        'energy': energy['energy'],
+        'edp': energy['energy'] * seconds,
+    }
+
+
+# 3. Validation
+VALIDATED = ('sim_ticks', 'ipc', 'energy', 'edp')
+
+
+def validate(base_path, paths):
+    """
+    Predicts every run in paths but base_path from it at its operating point.
+    Returns one row per run with predicted and actual metrics, their
+    relative errors and whether the run's configuration matches the base.
+    """
+    from stats_parser import run_geometry
+
+    base = merge_dumps(read_dumps(base_path))
+    base_geometry = run_geometry(base_path)
+    runs = [(path, merge_dumps(read_dumps(path))) for path in paths
+            if os.path.abspath(path) != os.path.abspath(base_path)]
+    if not runs:
+        return []
+    points = [operating_point(values) for _, values in runs]
+    predicted = predict(base, [p[1] for p in points], [p[2] for p in points], base_geometry)
+    rows = []
+    for i, (path, values) in enumerate(runs):
+        truth = actual(values, run_geometry(path))
+        row = {'stats': path, 'voltage': points[i][1], 'frequency': points[i][2],
+               'same_config': (run_geometry(path) == base_geometry
+                               and len(core_prefixes(values)) == len(core_prefixes(base))
+                               and values.get('simInsts') == base.get('simInsts'))}
+        for key in VALIDATED:
+            row[f"{key}_predicted"] = float(predicted[key][i])
+            row[f"{key}_actual"] = float(truth[key])
+            row[f"{key}_error"] = float(predicted[key][i] / truth[key] - 1) if truth[key] else float('nan')
+        rows.append(row)
+    return rows
+
+
+# 4. Command line entry point
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Predict simTicks, IPC and energy at other V/F points from one run")
+    parser.add_argument("stats", help="Stats dump of the base run")
+    parser.add_argument("--point", action="append", default=[], metavar="V@F",
+                        help="Operating point to predict, e.g. 0.9V@1.8GHz; may be repeated")
+    parser.add_argument("--validate", nargs="+", default=None,
+                        help="Runs (files or directories) to predict and compare against")
+    parser.add_argument("--json", default=None, help="Write the predictions or validation as JSON")
+    parser.add_argument("--csv", default=None, help="Write the predictions or validation as CSV")
+    args = parser.parse_args(argv)
+
+    import numpy as np
+    from stats_index import find_dumps
+    from stats_parser import run_geometry
+
+    if args.validate:
+        rows = validate(args.stats, find_dumps(args.validate))
+        print(f"{'stats':<40} {'V':>5} {'MHz':>7} {'config':>6} "
+              + " ".join(f"{key + ' err':>14}" for key in VALIDATED))
+        for row in rows:
+            print(f"{os.path.basename(row['stats']):<40} {row['voltage']:>5.2f} {row['frequency'] / 1e6:>7.0f} "
+                  f"{'same' if row['same_config'] else 'diff':>6} "
+                  + " ".join(f"{row[key + '_error']:>+14.2%}" for key in VALIDATED))
+        matching = [row for row in rows if row['same_config']]
+        for label, subset in (("all runs", rows), ("same config", matching)):
+            if subset:
+                errors = " ".join(f"{key} {np.mean([abs(r[key + '_error']) for r in subset]):.2%}"
+                                  for key in VALIDATED)
+                print(f"Mean absolute error over {len(subset)} {label}: {errors}")
+    else:
+        if not args.point:
+            parser.error("give --point or --validate")
+        points = [parse_point(p) for p in args.point]
+        base = merge_dumps(read_dumps(args.stats))
+        result = predict(base, [p[0] for p in points], [p[1] for p in points], run_geometry(args.stats))
+        _, cycles, stalls = split_cycles(base)
+        print(f"{args.stats}: {max(cycles):.0f} cycles, {max(stalls) / base['simTicks']:.1%} "
+              f"of the time stalled on L1 misses")
+        print(f"{'V':>5} {'MHz':>7} {'sim_ticks':>12} {'ipc':>8} {'energy_J':>12} {'power_W':>9} "
+              f"{'edp':>12} {'mem':>6}")
+        rows = []
+        for i in range(len(points)):
+            row = {key: float(value[i]) for key, value in result.items()}
+            rows.append(row)
+            print(f"{row['voltage']:>5.2f} {row['frequency'] / 1e6:>7.0f} {row['sim_ticks']:>12.6g} "
+                  f"{row['ipc']:>8.4f} {row['energy']:>12.6g} {row['total_power']:>9.4g} "
+                  f"{row['edp']:>12.6g} {row['memory_fraction']:>6.1%}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+        print(f"Results saved as {args.json}")
+    if args.csv and rows:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"Results saved as {args.csv}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,328 @@
+# Closed-loop DVFS governors.
+#
+# system_builder.py --dvfs-governor POLICY stops the measured window every
+# --stats-period ticks, hands the interval's stats to a governor and moves
+# the CPU clock domain to the operating point it picks from a table
+# (lowest to highest frequency):
+#
+#   build/RISCV/gem5.opt configs/<dir>/system_builder.py --spec config_D \
+#       --stats-period 10000000 --dvfs-governor ondemand --cmd <riscv binary>
+#   ... --dvfs-governor conservative --dvfs-param up_threshold=0.6
+#   ... --dvfs-governor my_policies:Powersave --dvfs-points 0.7V@500MHz,1.0V@2GHz
+#
+# The interval metrics a governor sees are the IPC, the L1 misses per
+# instruction and the load: the share of the interval the cores spent
+# computing rather than waiting for L1 misses, which is what a higher clock
+# speeds up (freqscale.py).  performance always runs at the top point,
+# ondemand jumps to it when the load crosses up_threshold and otherwise
+# picks the slowest point that keeps the load below it, and conservative
+# steps one point up or down at a time.
+#
+# Further policies are plugins: a Governor subclass given as module:Class,
+# or registered under a name with @register.  choose(metrics, level)
+# returns the next level (an index into points); keyword parameters from
+# --dvfs-param override its class attributes.
+#
+# The clock domain is moved through gem5's DVFSHandler, which needs a build
+# that exports its perfLevel() to Python: stock gem5 only reaches it through
+# the full-system EnergyCtrl device, and system_builder.py stops rather than
+# pretend.  --dvfs-shadow opts into shadow mode instead: the simulation
+# stays at the initial point and every interval is predicted at the point
+# the governor chose (freqscale.rescale), which is also what the governor
+# observes next.  The run's manifest records the mode, whether the clock
+# was actually moved, the trace of points and the energy and time against
+# the run held at its initial point.  The same shadow replay works on the
+# dumps of any periodic run after the fact:
+#
+#   ... --dvfs-governor ondemand --dvfs-shadow
+#   python3 governor.py stats_<run id>.txt --governor ondemand
+#   python3 governor.py stats_<run id>.txt --governor all --points 0.6V@250MHz,0.8V@1GHz,1.0V@2GHz
+#
+# Like energy.py this only uses the standard library, so gem5 imports it.
+
+import argparse
+import importlib
+import json
+import sys
+
+from energy import account, operating_point, parse_capacitance, read_dumps
+from freqscale import rescale, split_cycles
+from specs import format_frequency, parse_frequency, parse_voltage
+
+
+# (voltage, frequency) points of the CPU domain, lowest to highest, taken
+# from the operating points of the specs.CONFIGS design space
+OPERATING_POINTS = [('0.7V', '500MHz'), ('0.8V', '1GHz'), ('0.9V', '1.5GHz'), ('1.0V', '2GHz')]
+
+GOVERNORS = {}
+
+
+# 1. Operating points and interval metrics
+def parse_points(text):
+    """'0.7V@500MHz,1.0V@2GHz' -> [(0.7, 5e8), (1.0, 2e9)], sorted by frequency"""
+    points = []
+    for item in text.split(","):
+        voltage, _, frequency = item.strip().partition("@")
+        if not frequency:
+            raise ValueError(f"Operating point {item} is not VOLTAGE@FREQUENCY")
+        points.append((parse_voltage(voltage), parse_frequency(frequency)))
+    return sorted(points, key=lambda point: point[1])
+
+
+def default_points():
+    return [(parse_voltage(v), parse_frequency(f)) for v, f in OPERATING_POINTS]
+
+
+def nearest_level(points, frequency):
+    """Index of the point closest to frequency (Hz)"""
+    return min(range(len(points)), key=lambda i: abs(points[i][1] - frequency))
+
+
+def interval_metrics(values):
+    """
+    {ipc, load, misses_per_inst, seconds} of one interval's dump, over the
+    cores that ran in it
+    """
+    period = values['system.cpu_clk_domain.clock']
+    prefixes, cycles, stalls = split_cycles(values)
+    busy = sum(cycles)
+    stalled = sum(stalls) / period
+    insts = values.get('simInsts', 0.0)
+    misses = sum(values.get(f"{p.replace('switch_cpus', 'cpu')}{c}.overallMisses::total", 0.0)
+                 for p in prefixes for c in ('icache', 'dcache'))
+    return {
+        'ipc': insts / busy if busy else 0.0,
+        'load': 1.0 - stalled / busy if busy else 0.0,
+        'misses_per_inst': misses / insts if insts else 0.0,
+        'seconds': values['simTicks'] / values.get('simFreq', 1e12),
+    }
+
+
+# 2. Policies
+def register(cls):
+    """Class decorator adding a Governor to GOVERNORS under its name"""
+    GOVERNORS[cls.name] = cls
+    return cls
+
+
+class Governor:
+    """
+    Base class of the DVFS policies.  points is the (volts, Hz) table,
+    lowest frequency first; keyword parameters override class attributes.
+    """
+    name = None
+
+    def __init__(self, points, **params):
+        self.points = points
+        for key, value in params.items():
+            if not hasattr(self, key):
+                raise ValueError(f"Governor {self.name} has no parameter {key}")
+            setattr(self, key, value)
+
+    @property
+    def top(self):
+        return len(self.points) - 1
+
+    def choose(self, metrics, level):
+        """Next level given the metrics of the interval run at level"""
+        raise NotImplementedError
+
+
+@register
+class Performance(Governor):
+    """Always the highest point"""
+    name = 'performance'
+
+    def choose(self, metrics, level):
+        return self.top
+
+
+@register
+class OnDemand(Governor):
+    """
+    The highest point once the load exceeds up_threshold, otherwise the
+    slowest point whose frequency keeps the load below it (Linux ondemand)
+    """
+    name = 'ondemand'
+    up_threshold = 0.8
+
+    def choose(self, metrics, level):
+        if metrics['load'] >= self.up_threshold:
+            return self.top
+        target = self.points[level][1] * metrics['load'] / self.up_threshold
+        for i, (_, frequency) in enumerate(self.points):
+            if frequency >= target:
+                return i
+        return self.top
+
+
+@register
+class Conservative(Governor):
+    """One point up above up_threshold, one point down below down_threshold"""
+    name = 'conservative'
+    up_threshold = 0.8
+    down_threshold = 0.3
+
+    def choose(self, metrics, level):
+        if metrics['load'] > self.up_threshold:
+            return min(level + 1, self.top)
+        if metrics['load'] < self.down_threshold:
+            return max(level - 1, 0)
+        return level
+
+
+# 3. Loading policies
+def parse_params(items):
+    """['up_threshold=0.6', ...] -> {'up_threshold': 0.6}"""
+    params = {}
+    for item in items:
+        key, _, value = item.partition("=")
+        params[key] = float(value)
+    return params
+
+
+def load_governor(name, points, params=None):
+    """
+    Governor for a registered name or a module:Class plugin, built with
+    points and params
+    """
+    if name in GOVERNORS:
+        cls = GOVERNORS[name]
+    elif ":" in name:
+        module, _, attr = name.partition(":")
+        cls = getattr(importlib.import_module(module), attr)
+    else:
+        raise ValueError(f"Unknown governor {name}, expected one of "
+                         f"{', '.join(sorted(GOVERNORS))} or module:Class")
+    return cls(points, **(params or {}))
+
+
+# 4. Closed loop
+class Controller:
+    """
+    Runs a governor over the consecutive interval dumps of a run, starting
+    at level.  actuate(level) moves the simulated clock domain; without it
+    the intervals are predicted at the chosen points (shadow mode).
+    """
+
+    def __init__(self, governor, level, actuate=None):
+        self.governor = governor
+        self.initial_level = self.level = level
+        self.actuate = actuate
+        self.intervals = []
+        self.trace = []
+
+    @property
+    def mode(self):
+        return 'shadow' if self.actuate is None else 'native'
+
+    def step(self, values, tick=None):
+        """Accounts one interval dump and returns the level of the next"""
+        voltage, frequency = self.governor.points[self.level]
+        observed = values if self.actuate else rescale(values, voltage, frequency)
+        self.intervals.append(observed)
+        metrics = interval_metrics(observed)
+        level = self.governor.choose(metrics, self.level)
+        self.trace.append(dict(metrics, tick=tick, level=self.level, voltage=voltage,
+                               frequency=frequency))
+        if level != self.level and self.actuate:
+            self.actuate(level)
+        self.level = level
+        return level
+
+    def summary(self, capacitance=None, geometry=None, thermal=None):
+        """
+        Energy, time and EDP of the governed run and of the same intervals
+        held at the initial point, the savings and the time share of every
+        point, plus the per-interval trace
+        """
+        governed = account(self.intervals, capacitance, geometry=geometry, thermal=thermal)
+        baseline = account([rescale(values, *self.governor.points[self.initial_level])
+                            for values in self.intervals],
+                           capacitance, geometry=geometry, thermal=thermal)
+        residency = {}
+        for step, interval in zip(self.trace, governed['intervals']):
+            key = format_frequency(step['frequency'])
+            residency[key] = residency.get(key, 0.0) + interval['seconds']
+        seconds = governed['seconds']
+        return {
+            'governor': self.governor.name or type(self.governor).__name__,
+            'mode': self.mode,
+            'actuated': self.actuate is not None,
+            'points': [list(point) for point in self.governor.points],
+            'initial_level': self.initial_level,
+            'energy': governed['energy'],
+            'seconds': seconds,
+            'edp': governed['edp'],
+            'baseline_energy': baseline['energy'],
+            'baseline_seconds': baseline['seconds'],
+            'baseline_edp': baseline['edp'],
+            'energy_savings': 1 - governed['energy'] / baseline['energy'] if baseline['energy'] else 0.0,
+            'slowdown': seconds / baseline['seconds'] - 1 if baseline['seconds'] else 0.0,
+            'residency': {key: value / seconds if seconds else 0.0 for key, value in residency.items()},
+            'trace': self.trace,
+        }
+
+
+def replay(dumps, governor, level, capacitance=None, geometry=None, thermal=None):
+    """Shadow-mode Controller.summary() of a governor over recorded dumps"""
+    controller = Controller(governor, level)
+    for values in dumps:
+        controller.step(values)
+    return controller.summary(capacitance, geometry, thermal)
+
+
+def print_summary(summary):
+    mode = summary['mode'] if summary['actuated'] else f"{summary['mode']}, not actuated, predicted"
+    print(f"DVFS {summary['governor']} ({mode}): {summary['energy']:.6g} J in "
+          f"{summary['seconds']:.6g} s vs {summary['baseline_energy']:.6g} J in "
+          f"{summary['baseline_seconds']:.6g} s at the initial point, "
+          f"{summary['energy_savings']:+.1%} energy saved, {summary['slowdown']:+.1%} time")
+    print("  residency: " + ", ".join(f"{key} {share:.0%}" for key, share in summary['residency'].items()))
+
+
+# 5. Command line entry point
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay DVFS governors over the dumps of a run")
+    parser.add_argument("stats", help="Stats file; every dump is one governor interval")
+    parser.add_argument("--governor", default="ondemand",
+                        help=f"One of {', '.join(sorted(GOVERNORS))}, module:Class or all")
+    parser.add_argument("--points", default=None, metavar="V@F,...",
+                        help="Operating point table (default: OPERATING_POINTS)")
+    parser.add_argument("--param", action="append", default=[], metavar="NAME=VALUE",
+                        help="Governor parameter; may be repeated")
+    parser.add_argument("--capacitance", action="append", default=[], metavar="COMPONENT=F",
+                        help="Override the effective capacitance of an energy.py component")
+    parser.add_argument("--trace", action="store_true", help="Print every interval's decision")
+    parser.add_argument("--json", default=None, help="Write the summaries as JSON")
+    args = parser.parse_args(argv)
+
+    from stats_parser import run_geometry
+
+    points = parse_points(args.points) if args.points else default_points()
+    dumps = read_dumps(args.stats)
+    # start where the run started
+    level = nearest_level(points, operating_point(dumps[0])[2])
+    names = sorted(GOVERNORS) if args.governor == "all" else [args.governor]
+    print(f"{args.stats}: {len(dumps)} intervals, starting at "
+          f"{points[level][0]:g}V@{format_frequency(points[level][1])}")
+    summaries = {}
+    for name in names:
+        governor = load_governor(name, points, parse_params(args.param))
+        summary = summaries[name] = replay(dumps, governor, level, parse_capacitance(args.capacitance),
+                                           run_geometry(args.stats))
+        print_summary(summary)
+        if args.trace:
+            for step in summary['trace']:
+                print(f"    {step['voltage']:.2f}V {format_frequency(step['frequency']):>8} "
+                      f"ipc {step['ipc']:.4f} load {step['load']:.2f} "
+                      f"misses/inst {step['misses_per_inst']:.4f}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summaries, f, indent=2)
+        print(f"DVFS summaries saved as {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,263 @@
+# Pareto-front explorer for performance vs. energy.
+#
+# Loads sweep results, computes the non-dominated set for a list of
+# objectives and writes the frontier as CSV or JSON:
+#
+#   python3 pareto.py sweep_out/sweep.json --objectives ipc:max,energy:min \
+#       --csv front.csv --json front.json
+#
+# Inputs can be sweep.json summaries, dse_results.json reports, stats dumps or
+# directories searched recursively for stats_*.txt.  Fronts of two and three
+# objectives are found by an O(n log n) sweep, so tens of thousands of
+# points take well under a second even when most of them are on the front
+# (the usual IPC vs. energy shape); more objectives use a block-wise skyline
+# filter whose cost grows with the size of the front.
+#
+# --candidates prunes dominated regions from further exploration: candidate
+# points (e.g. short-run results of a search) whose optimistic estimate is
+# still dominated by the front are dropped, and the survivors are written
+# with --survivors.
+
+import argparse
+import csv
+import glob
+import json
+import os
+import sys
+
+import numpy as np
+
+from stats_parser import run_summary
+
+
+METRICS = ('ipc', 'sim_ticks', 'sim_seconds', 'sim_insts', 'cpu_power', 'memory_power',
+           'total_power', 'energy', 'edp', 'seconds_per_inst', 'energy_per_inst')
+
+
+# 1. Loading results
+def load_points(paths):
+    """Returns [{'name': ..., 'source': ..., <metric>: value}] for every run found"""
+    points = []
+    for path in paths:
+        if os.path.isdir(path):
+            for stats in sorted(glob.glob(os.path.join(path, "**", "stats_*.txt"), recursive=True)):
+                points.append(dict(run_summary(stats), name=stats, source=stats))
+        elif path.endswith(".json"):
+            with open(path, "r") as f:
+                data = json.load(f)
+            if isinstance(data, dict) and 'ranking' in data:
+                for entry in data['ranking']:
+                    points.append(dict(entry['metrics'], name=entry['name'], source=path))
+            else:
+                for result in data:
+                    if result.get('returncode') == 0 and result.get('stats'):
+                        points.append(dict(run_summary(result['stats']),
+                                           name=result['name'], source=result['stats']))
+        else:
+            points.append(dict(run_summary(path), name=path, source=path))
+    return points
+
+
+def parse_objectives(text):
+    """'ipc:max,energy:min' -> [('ipc', -1.0), ('energy', 1.0)] (sign turns max into min)"""
+    objectives = []
+    for item in text.split(","):
+        metric, _, direction = item.partition(":")
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric {metric}, choose from {', '.join(METRICS)}")
+        if direction not in ("min", "max"):
+            raise ValueError(f"Objective direction must be min or max, not {direction!r}")
+        objectives.append((metric, -1.0 if direction == "max" else 1.0))
+    return objectives
+
+
+def cost_matrix(points, objectives):
+    """(points x objectives) array in which every column is minimised"""
+    costs = np.array([[p[metric] for metric, _ in objectives] for p in points], dtype=float)
+    costs = costs.reshape(len(points), len(objectives))
+    costs *= np.array([sign for _, sign in objectives])
+    costs[np.isnan(costs)] = np.inf
+    return costs
+
+
+# 2. Dominance
+def dominates(a, b):
+    """Boolean (len(b) x len(a)) matrix: entry [i, j] is True if a[j] dominates b[i]"""
+    no_worse = (a[None, :, :] <= b[:, None, :]).all(axis=-1)
+    better = (a[None, :, :] < b[:, None, :]).any(axis=-1)
+    return no_worse & better
+
+
+def pareto_mask(costs, block=1024):
+    """
+    Returns a boolean mask of the non-dominated rows of costs (all columns
+    minimised).  Two and three objectives are swept in O(n log n) (see
+    sweep_2d and sweep_3d); more objectives fall back to skyline_mask.
+    """
+    n, k = costs.shape
+    if n == 0 or k == 1 or k > 3:
+        return skyline_mask(costs, block)
+    # dominance only depends on the order within every column, so the sweeps
+    # work on dense ranks (finite, even for missing metrics)
+    ranks = np.column_stack([np.unique(column, return_inverse=True)[1] for column in costs.T])
+    order = np.lexsort(ranks.T[::-1])
+    ordered = ranks[order]
+    dominated = sweep_2d(ordered) if k == 2 else sweep_3d(ordered)
+    mask = np.zeros(n, dtype=bool)
+    mask[order[~dominated]] = True
+    return mask
+
+
+def sweep_2d(ordered):
+    """
+    Dominated rows of lexicographically sorted 2-column cost ranks.  A row is
+    dominated by an earlier row with a smaller first cost and a second cost
+    no larger (the running minimum), or by the first row of its own
+    first-cost group if that has a smaller second cost.
+    """
+    x, y = ordered[:, 0], ordered[:, 1]
+    group_start = np.searchsorted(x, x, side="left")
+    running_min = np.minimum.accumulate(y)
+    before = np.where(group_start > 0, running_min[group_start - 1], len(y))
+    return (before <= y) | (y[group_start] < y)
+
+
+def sweep_3d(ordered):
+    """
+    Dominated rows of lexicographically sorted 3-column cost ranks.  Every
+    dominator of a row comes earlier in that order, so the rows are swept
+    once while a Fenwick tree over the ranks of the second cost keeps the
+    prefix minimum of the third cost of the rows seen so far.  Runs of
+    identical rows are queried before any of them is inserted, as they do
+    not dominate each other.
+    """
+    n = len(ordered)
+    ranks = (ordered[:, 1] + 1).tolist()
+    zs = ordered[:, 2].tolist()
+    same = np.concatenate([[False], (ordered[1:] == ordered[:-1]).all(axis=1)]).tolist()
+    # n is above every rank, so it stands for "no row seen yet"
+    tree = [n] * (max(ranks) + 1)
+    dominated = np.zeros(n, dtype=bool)
+    start = 0
+    while start < n:
+        end = start + 1
+        while end < n and same[end]:
+            end += 1
+        i, best, z = ranks[start], n, zs[start]
+        while i > 0:
+            best = min(best, tree[i])
+            i -= i & -i
+        dominated[start:end] = best <= z
+        i = ranks[start]
+        while i < len(tree):
+            if z < tree[i]:
+                tree[i] = z
+            i += i & -i
+        start = end
+    return dominated
+
+
+def skyline_mask(costs, block=1024):
+    """
+    Non-dominated rows for any number of objectives (sort-filter skyline).
+    Rows are sorted lexicographically first, so a row can only be dominated
+    by rows before it; each block is checked against the front found so
+    far, and the survivors against each other.  O(n * |front|): fast for
+    small fronts, quadratic when most points are on the front.
+    """
+    n = len(costs)
+    mask = np.zeros(n, dtype=bool)
+    order = np.lexsort(costs.T[::-1])
+    ordered = costs[order]
+    front = np.empty((0, costs.shape[1]))
+    for start in range(0, n, block):
+        chunk = ordered[start:start + block]
+        idx = order[start:start + block]
+        if len(front):
+            alive = ~dominates(front, chunk).any(axis=1)
+            chunk, idx = chunk[alive], idx[alive]
+        alive = ~dominates(chunk, chunk).any(axis=1)
+        mask[idx[alive]] = True
+        front = np.vstack([front, chunk[alive]])
+    return mask
+
+
+def prune(front_costs, candidate_costs, margin=0.0, block=1024):
+    """
+    Returns a mask of candidates worth exploring further: those not dominated
+    by the front even if they turned out margin (relative) better than their
+    estimate in every objective.
+    """
+    optimistic = candidate_costs - np.abs(candidate_costs) * margin
+    keep = np.ones(len(candidate_costs), dtype=bool)
+    for start in range(0, len(candidate_costs), block):
+        chunk = optimistic[start:start + block]
+        keep[start:start + block] = ~dominates(front_costs, chunk).any(axis=1)
+    return keep
+
+
+# 3. Output
+def write_csv(points, objectives, path):
+    columns = ['name'] + list(METRICS) + ['source']
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=columns, extrasaction='ignore')
+        writer.writeheader()
+        for point in points:
+            writer.writerow(point)
+    print(f"Pareto front saved as {path}")
+
+
+def write_json(points, objectives, path):
+    with open(path, "w") as f:
+        json.dump({
+            'objectives': [f"{m}:{'max' if s < 0 else 'min'}" for m, s in objectives],
+            'front': points,
+        }, f, indent=2)
+    print(f"Pareto front saved as {path}")
+
+
+# 4. Command line entry point
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compute the Pareto front of sweep results")
+    parser.add_argument("inputs", nargs="+", help="sweep.json, dse_results.json, stats files or directories")
+    parser.add_argument("--objectives", default="ipc:max,energy:min",
+                        help="Comma-separated metric:min|max list")
+    parser.add_argument("--csv", default=None, help="Write the front as CSV")
+    parser.add_argument("--json", default=None, help="Write the front as JSON")
+    parser.add_argument("--candidates", nargs="*", default=[],
+                        help="Results of points considered for further exploration")
+    parser.add_argument("--margin", type=float, default=0.1,
+                        help="Relative optimism applied to candidates before pruning")
+    parser.add_argument("--survivors", default=None, help="Write the unpruned candidates as JSON")
+    args = parser.parse_args(argv)
+
+    objectives = parse_objectives(args.objectives)
+    points = load_points(args.inputs)
+    costs = cost_matrix(points, objectives)
+    mask = pareto_mask(costs)
+    front = [p for p, keep in zip(points, mask) if keep]
+    front.sort(key=lambda p: [p[m] * s for m, s in objectives])
+
+    print(f"{len(front)} of {len(points)} points are Pareto-optimal")
+    for point in front:
+        values = "  ".join(f"{m}={point[m]:.6g}" for m, _ in objectives)
+        print(f"  {point['name']}: {values}")
+    if args.csv:
+        write_csv(front, objectives, args.csv)
+    if args.json:
+        write_json(front, objectives, args.json)
+
+    if args.candidates:
+        candidates = load_points(args.candidates)
+        keep = prune(costs[mask], cost_matrix(candidates, objectives), args.margin)
+        survivors = [c for c, k in zip(candidates, keep) if k]
+        print(f"Pruned {len(candidates) - len(survivors)} of {len(candidates)} candidates")
+        if args.survivors:
+            with open(args.survivors, "w") as f:
+                json.dump(survivors, f, indent=2)
+            print(f"Surviving candidates saved as {args.survivors}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -18,6 +18,7 @@ from common import MemConfig
 from common.FileSystemConfig import config_filesystem
 from common.Caches import *
 from common.cpu2000 import *
+from energy import account, read_dumps
 
 # 1. Define basic L1 and L2 cache classes
 class L1ICache(Cache):
@@ -220,18 +221,11 @@ m5.instantiate()
 # 12. Apply DVFS
 dvfs.scale(voltage='0.9V', frequency='800MHz')
 
-# 13. Custom Energy Calculations
-# Instead of assigning energy_usage directly to SimObjects, calculate manually
-cpu_energy_usage = 1.5  # Example energy usage per second for the CPU
-memory_energy_usage = 0.8  # Example energy usage per second for memory
-
-execution_time = m5.curTick() / 1e12  # Convert ticks to seconds
-cpu_energy = cpu_energy_usage * execution_time
-memory_energy = memory_energy_usage * execution_time
-total_energy = cpu_energy + memory_energy
-print(f"Total Energy Consumption: {total_energy} Joules")
-
-# 14. Metric Tracking
+# 13. Metric Tracking
 m5.stats.reset()
 m5.simulate()
 m5.stats.dump()
+
+# 14. Energy accounting over the simulated time (see energy.py)
+power = account(read_dumps(os.path.join(m5.options.outdir, "stats.txt")))
+print(f"Total Energy Consumption: {power['energy']} Joules")
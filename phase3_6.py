@@ -20,6 +20,7 @@ from common import MemConfig
 from common.FileSystemConfig import config_filesystem
 from common.Caches import *
 from common.cpu2000 import *
+from energy import account, read_dumps
 
 # 2. Define basic L1 and L2 cache classes
 class L1ICache(Cache):
@@ -218,30 +219,20 @@ m5.instantiate()
 # 16. Apply DVFS
 dvfs.scale(voltage='0.9V', frequency='800MHz')
 
-# 17. Simulation Experiment Design
-# Define metrics for performance and power consumption
-metrics = {
-    'ipc': 0,  # Placeholder for Instructions per Cycle
-    'energy_per_instruction': 0  # Placeholder for Energy per Instruction
-}
-
-# Function to calculate performance metrics after simulation
-def calculate_metrics(total_instructions, total_energy):
-    metrics['ipc'] = total_instructions / (m5.curTick() / 1e12)  # Convert ticks to seconds for time
-    metrics['energy_per_instruction'] = total_energy / total_instructions
-    print(f"IPC: {metrics['ipc']}, Energy per Instruction: {metrics['energy_per_instruction']}")
-
-# 18. Custom Energy Calculations
-cpu_energy_usage = 1.5  # Example energy usage per second for the CPU
-memory_energy_usage = 0.8  # Example energy usage per second for memory
-
-execution_time = m5.curTick() / 1e12  # Convert ticks to seconds
-cpu_energy = cpu_energy_usage * execution_time
-memory_energy = memory_energy_usage * execution_time
-total_energy = cpu_energy + memory_energy
-print(f"Total Energy Consumption: {total_energy} Joules")
-
-# 19. Metric Tracking
+# 17. Metric Tracking
 m5.stats.reset()
 m5.simulate()
 m5.stats.dump()
+
+# 18. Simulation Experiment Design
+# Performance metrics and the core's dynamic energy per instruction, from
+# its committed instruction mix (see energy.py)
+dumps = read_dumps(os.path.join(m5.options.outdir, "stats.txt"))
+power = account(dumps)
+cpu_cycles = dumps[-1]['simTicks'] / dumps[-1]['system.cpu_clk_domain.clock']
+metrics = {
+    'ipc': dumps[-1]['simInsts'] / cpu_cycles,
+    'energy_per_instruction': power['core_energy_per_inst'],
+}
+print(f"IPC: {metrics['ipc']}, Energy per Instruction: {metrics['energy_per_instruction']}")
+print(f"Total Energy Consumption: {power['energy']} Joules")
@@ -21,6 +21,7 @@ from common import MemConfig
 from common.FileSystemConfig import config_filesystem
 from common.Caches import *
 from common.cpu2000 import *
+from energy import account, read_dumps
 
 # 2. Define basic L1 and L2 cache classes
 class L1ICache(Cache):
@@ -232,18 +233,11 @@ log_configurations("Test Configuration", "800MHz", "0.9V", "8KB", "256KB", "512M
 m5.simulate()
 m5.stats.dump()
 
-# 18. Power Calculations
-def calculate_power(voltage, frequency, capacitance_factor=1.0):
-    power = capacitance_factor * (voltage ** 2) * frequency
-    return power
-
-cpu_power = calculate_power(0.9, parse_frequency("800MHz"))
-memory_usage_rate = 0.7
-memory_power = calculate_power(0.5, 0.7 * parse_frequency("800MHz"))
-total_power = cpu_power + memory_power
-print(f"CPU Power Consumption: {cpu_power:.4f} W")
-print(f"Memory Power Consumption: {memory_power:.4f} W")
-print(f"Total Power Consumption: {total_power:.4f} W")
+# 18. Power Calculations, accounted over the simulated time (see energy.py)
+power = account(read_dumps(os.path.join(m5.options.outdir, "stats.txt")))
+print(f"CPU Power Consumption: {power['cpu_power']:.4f} W")
+print(f"Memory Power Consumption: {power['memory_power']:.4f} W")
+print(f"Total Power Consumption: {power['total_power']:.4f} W")
 
 # 19. Save stats.txt
 m5out_dir = "m5out"
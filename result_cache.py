@@ -0,0 +1,240 @@
+# Content-addressed cache of simulation results.
+#
+# A result is keyed on everything that determines the stats dump:
+#   - the canonical system spec (specs.canonical_spec),
+#   - the SHA-256 of every workload executable given with --cmd,
+#   - the remaining gem5 command line arguments, with the --cmd value
+#     replaced by a placeholder (the executables are hashed above), the
+#     --input file and a restored checkpoint directory by the digest of
+#     their contents,
+#   - the key of the sweep's prefix checkpoint the point restores from,
+#   - the SHA-256 of the gem5 binary and of the config script.
+# Nothing depends on where the files live, so the same point run from
+# another output directory or checkout hits the same entry.
+# Re-running an identical point returns the stored stats instead of
+# simulating again.  Entries live in <root>/<key[:2]>/<key>/ and the store is
+# capped in size with least-recently-used eviction (entry directory mtimes
+# record the last use, so concurrent sweeps need no shared index file).
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from specs import canonical_spec, parse_size
+
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "gem5-results")
+DEFAULT_MAX_SIZE = "1GB"
+RESTORE_OPTION = "--restore-prefix-checkpoint"
+CMD_OPTIONS = ("--cmd", "-c")
+INPUT_OPTIONS = ("--input", "-i")
+WORKLOAD_PLACEHOLDER = "<workload>"
+
+_file_hashes = {}
+
+
+# 1. Key construction
+def file_sha256(path):
+    """SHA-256 of a file, memoised per (path, size, mtime) for large binaries"""
+    st = os.stat(path)
+    memo_key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    if memo_key not in _file_hashes:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        _file_hashes[memo_key] = digest.hexdigest()
+    return _file_hashes[memo_key]
+
+
+def workload_executables(sim_args):
+    """Returns the executables named by --cmd/-c in a gem5 argument list"""
+    executables = []
+    for i, arg in enumerate(sim_args):
+        if arg in ("--cmd", "-c") and i + 1 < len(sim_args):
+            executables.extend(sim_args[i + 1].split(";"))
+        elif arg.startswith("--cmd="):
+            executables.extend(arg[len("--cmd="):].split(";"))
+    return [exe for exe in executables if exe]
+
+
+def checkpoint_digest(ckpt_dir):
+    """SHA-256 of the names and contents of the files of a checkpoint directory"""
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(ckpt_dir):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            digest.update(os.path.relpath(path, ckpt_dir).encode())
+            digest.update(file_sha256(path).encode())
+    return digest.hexdigest()
+
+
+def input_digest(path):
+    """sha256:<digest> of a workload input file, or path if it does not exist here"""
+    return "sha256:" + file_sha256(path) if os.path.isfile(path) else path
+
+
+def key_value(option, value):
+    """The value of an option as it enters a key: contents instead of paths"""
+    if option == RESTORE_OPTION:
+        return "sha256:" + checkpoint_digest(value)
+    if option in CMD_OPTIONS:
+        return WORKLOAD_PLACEHOLDER
+    if option in INPUT_OPTIONS:
+        return input_digest(value)
+    return value
+
+
+def key_args(sim_args):
+    """
+    sim_args with every path that names an input replaced by its contents
+    (see key_value), in the separate-value and --option=value forms alike
+    """
+    args = list(sim_args)
+    for i, arg in enumerate(args):
+        if i > 0 and args[i - 1] in (RESTORE_OPTION,) + CMD_OPTIONS + INPUT_OPTIONS:
+            args[i] = key_value(args[i - 1], arg)
+        elif arg.startswith("--") and "=" in arg:
+            option, value = arg.split("=", 1)
+            args[i] = f"{option}={key_value(option, value)}"
+    return args
+
+
+def result_key(spec, sim_args, gem5, script, prefix=None):
+    """
+    Returns the hex cache key for simulating spec with the given arguments,
+    restoring from the prefix checkpoint with key prefix if given
+    """
+    parts = {
+        'spec': canonical_spec(spec),
+        'workload': [file_sha256(exe) for exe in workload_executables(sim_args)],
+        'args': key_args(sim_args),
+        'prefix': prefix,
+        'gem5': file_sha256(gem5),
+        'script': file_sha256(script),
+    }
+    text = json.dumps(parts, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+# 2. On-disk store
+class ResultCache:
+    def __init__(self, root=DEFAULT_CACHE_DIR, max_size=DEFAULT_MAX_SIZE):
+        self.root = root
+        self.max_bytes = parse_size(max_size)
+        os.makedirs(self.root, exist_ok=True)
+
+    def entry_dir(self, key):
+        return os.path.join(self.root, key[:2], key)
+
+    def get(self, key):
+        """Returns the entry's metadata dict (with a 'stats' path) or None"""
+        entry = self.entry_dir(key)
+        meta_path = os.path.join(entry, "meta.json")
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path, "r") as f:
+            meta = json.load(f)
+        meta['stats'] = os.path.join(entry, "stats.txt")
+        for name in ("manifest.json", "timeseries.bin"):
+            if os.path.exists(os.path.join(entry, name)):
+                meta[name.split(".")[0]] = os.path.join(entry, name)
+        os.utime(entry)  # mark as most recently used
+        return meta
+
+    def put(self, key, stats_path, meta=None, manifest_path=None):
+        """
+        Stores a stats dump (with its run manifest and time series) under key;
+        the entry appears atomically
+        """
+        entry = self.entry_dir(key)
+        if os.path.exists(entry):
+            return entry
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        tmp = tempfile.mkdtemp(prefix=".tmp-", dir=os.path.dirname(entry))
+        shutil.copyfile(stats_path, os.path.join(tmp, "stats.txt"))
+        if manifest_path is not None and os.path.exists(manifest_path):
+            shutil.copyfile(manifest_path, os.path.join(tmp, "manifest.json"))
+            with open(manifest_path, "r") as f:
+                series = json.load(f).get('timeseries')
+            if series:
+                shutil.copyfile(os.path.join(os.path.dirname(manifest_path), series),
+                                os.path.join(tmp, "timeseries.bin"))
+        meta = dict(meta or {})
+        meta.update({'key': key, 'stored': time.time()})
+        with open(os.path.join(tmp, "meta.json"), "w") as f:
+            json.dump(meta, f, indent=2)
+        try:
+            os.rename(tmp, entry)
+        except OSError:
+            # Another sweep stored the same result first
+            shutil.rmtree(tmp, ignore_errors=True)
+        return entry
+
+    def entries(self):
+        """Returns (last_used, size, path) for every entry, oldest first"""
+        found = []
+        for prefix in os.listdir(self.root):
+            prefix_dir = os.path.join(self.root, prefix)
+            if not os.path.isdir(prefix_dir):
+                continue
+            for name in os.listdir(prefix_dir):
+                if name.startswith(".tmp-"):
+                    continue
+                path = os.path.join(prefix_dir, name)
+                size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+                found.append((os.path.getmtime(path), size, path))
+        return sorted(found)
+
+    def evict(self):
+        """Removes least recently used entries until the store fits max_bytes"""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        for _, _, path in self.entries():
+            shutil.rmtree(path, ignore_errors=True)
+
+
+# 3. Command line entry point
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or trim the simulation result cache")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--max-size", default=DEFAULT_MAX_SIZE)
+    parser.add_argument("--list", action="store_true", help="List cached results")
+    parser.add_argument("--evict", action="store_true", help="Evict entries above --max-size")
+    parser.add_argument("--clear", action="store_true", help="Remove every entry")
+    args = parser.parse_args(argv)
+
+    cache = ResultCache(args.cache_dir, args.max_size)
+    if args.clear:
+        cache.clear()
+    if args.evict:
+        print(f"Evicted {cache.evict()} entries")
+    entries = cache.entries()
+    if args.list:
+        for last_used, size, path in entries:
+            with open(os.path.join(path, "meta.json"), "r") as f:
+                name = json.load(f).get('name', '?')
+            print(f"{os.path.basename(path)[:16]}  {size:>10}  "
+                  f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(last_used))}  {name}")
+    print(f"{len(entries)} entries, {sum(e[1] for e in entries)} bytes in {cache.root}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+# Isolated, atomically finalised gem5 runs.
+#
+# Every run gets a run ID (<YYYYmmdd-HHMMSS>-<random hex>) and its own output
+# directory.  gem5 writes into runs/.<run id>.tmp, and once it has exited
+# with a complete stats dump the directory is renamed to runs/<run id>, so a
+# runs/<run id> directory is always a finished run and concurrent runs never
+# share an m5out or a stats file name:
+#
+#   python3 runs.py --gem5 build/RISCV/gem5.opt --spec config_B \
+#       -- --cmd tests/test-progs/hello/bin/riscv/linux/hello
+#
+# An explicit --run-id must not have a directory yet, not even the temporary
+# one of a failed run; it is refused before gem5 starts.
+#
+# Everything after "--" is passed to gem5 unchanged.  system_builder.py uses
+# the same run IDs (--run-id) to name its stats_<run id>.txt dump.
+
+import argparse
+import os
+import secrets
+import subprocess
+import sys
+import time
+
+
+RUNS_DIR = "runs"
+
+
+def new_run_id():
+    """Unique, chronologically sortable run ID"""
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{secrets.token_hex(4)}"
+
+
+def run_dirs(runs_dir, run_id):
+    """Returns (temporary, final) output directories of a run"""
+    return (os.path.join(runs_dir, f".{run_id}.tmp"), os.path.join(runs_dir, run_id))
+
+
+def check_run_id(runs_dir, run_id):
+    """Raises ValueError if run_id already has a directory, finished or not"""
+    for path in run_dirs(runs_dir, run_id):
+        if os.path.exists(path):
+            raise ValueError(f"Run ID {run_id} is already taken by {path}")
+
+
+def finalize_run(tmp_dir, final_dir):
+    """Publishes a finished run by renaming its directory into place"""
+    os.rename(tmp_dir, final_dir)
+    return final_dir
+
+
+def launch(gem5, script, spec, sim_args, runs_dir=RUNS_DIR, run_id=None):
+    """
+    Runs one spec into its own run directory.  Returns (returncode, run dir);
+    a failed or incomplete run is left in its temporary directory.  Raises
+    ValueError before simulating if run_id is already taken.
+    """
+    # Imported here so `runs` stays importable from inside gem5, which only
+    # needs new_run_id.
+    from stats_parser import is_complete
+    from sweep import build_command, find_stats
+
+    run_id = run_id or new_run_id()
+    check_run_id(runs_dir, run_id)
+    tmp_dir, final_dir = run_dirs(runs_dir, run_id)
+    os.makedirs(tmp_dir)
+    cmd = build_command(gem5, script, spec, tmp_dir, list(sim_args) + ["--run-id", run_id])
+    with open(os.path.join(tmp_dir, "gem5.log"), "w") as log:
+        returncode = subprocess.call(cmd, stdout=log, stderr=subprocess.STDOUT)
+    stats = find_stats(tmp_dir)
+    if returncode != 0 or stats is None or not is_complete(stats):
+        return returncode or 1, tmp_dir
+    return 0, finalize_run(tmp_dir, final_dir)
+
+
+def main(argv=None):
+    from specs import load_spec
+    from sweep import DEFAULT_SCRIPT
+
+    argv = sys.argv[1:] if argv is None else argv
+    sim_args = []
+    if "--" in argv:
+        split = argv.index("--")
+        argv, sim_args = argv[:split], argv[split + 1:]
+
+    parser = argparse.ArgumentParser(description="Run one spec in an isolated run directory")
+    parser.add_argument("--gem5", required=True, help="Path to the gem5 binary")
+    parser.add_argument("--script", default=DEFAULT_SCRIPT)
+    parser.add_argument("--spec", required=True,
+                        help="A name from specs.CONFIGS, a JSON file or an inline JSON object")
+    parser.add_argument("--runs-dir", default=RUNS_DIR, help="Directory holding one directory per run")
+    parser.add_argument("--run-id", default=None, help="Run ID (default: generated)")
+    args = parser.parse_args(argv)
+
+    if args.run_id:
+        try:
+            check_run_id(args.runs_dir, args.run_id)
+        except ValueError as e:
+            parser.error(str(e))
+    returncode, run_dir = launch(args.gem5, args.script, load_spec(args.spec), sim_args,
+                                 args.runs_dir, args.run_id)
+    if returncode != 0:
+        print(f"Run failed, partial output left in {run_dir}", file=sys.stderr)
+        return 1
+    print(f"Run saved as {run_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -64,12 +64,12 @@ class DVFS:
         print(f"DVFS: Scaling to {frequency} and voltage {voltage}V")
 
 def apply_clock_gating(cpu):
-    # Apply clock gating by reducing the clock speed when the CPU is idle
-    if cpu.is_idle:
-        cpu.clk_domain.clock = '100MHz'
-    else:
-        cpu.clk_domain.clock = '1GHz'
-    print(f"Clock Gating: {'Enabled' if cpu.is_idle else 'Disabled'} for CPU {cpu.cpu_id}")
+    # gem5 clock gates a CPU by itself: BaseCPU moves its power state to
+    # CLK_GATED whenever all its threads are suspended.  Idle time can only
+    # be observed while simulating, so instead of switching clocks here, let
+    # idle cores also power gate after pwr_gating_latency cycles.
+    cpu.power_gating_on_idle = True
+    print(f"Clock Gating: Enabled for {cpu.path()}")
 
 def get_processes(args):
     """Interprets provided args and returns a list of processes"""
@@ -232,6 +232,8 @@ for i in range(np):
 
 # Apply DVFS during the simulation
 dvfs.scale(voltage=0.9, frequency='800MHz')
+for cpu in system.cpu:
+    apply_clock_gating(cpu)
 
 if args.wait_gdb:
     system.workload.wait_for_remote_gdb = True
@@ -0,0 +1,340 @@
+# SimPoint-based sampled simulation of a design-space sweep.
+#
+#   python3 simpoints.py --gem5 build/RISCV/gem5.opt --configs config_A,config_B \
+#       --interval 10000000 --warmup 1000000 -- --cmd <riscv binary>
+#
+# 1. profile:     one atomic run per binary collects basic block vectors (BBVs)
+# 2. cluster:     BBVs are randomly projected and clustered with k-means; the
+#                 interval closest to each centroid becomes a simulation point
+#                 weighted by its cluster's share of the execution
+# 3. checkpoint:  one atomic run per (num_cpu, mem_size) group checkpoints the
+#                 start of every point's warmup
+# 4. simulate:    every config restores each checkpoint, warms up and measures
+#                 one interval, all in parallel on the sweep's process pool
+# 5. reconstruct: per-point CPI, time and energy are combined with the weights
+#                 into whole-program estimates
+#
+# The profile and the clustering only depend on the binary, its arguments and
+# input (EXECUTION_OPTIONS) and the interval, so they are reused by later
+# sweeps over the same workload, wherever the binary lives.
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sys
+
+import numpy as np
+
+from energy import account
+from result_cache import file_sha256, key_args, workload_executables
+from stats_parser import read_stats, run_geometry
+from sweep import (DEFAULT_SCRIPT, collect_specs, prefix_group, run_points, select_args)
+
+
+PROJECTED_DIMS = 15
+
+# gem5 options besides --cmd that change what the workload executes
+EXECUTION_OPTIONS = ('--options', '-o', '--input', '-i')
+
+
+# 1. Basic block vectors
+def read_bbv(path, dims=PROJECTED_DIMS, seed=42):
+    """
+    Reads a gem5 simpoint.bb.gz file and returns an (intervals x dims) array of
+    randomly projected, per-interval normalised basic block vectors.  The
+    projection is built lazily per basic block, so memory stays bounded by the
+    number of intervals rather than intervals x basic blocks.
+    """
+    projection = {}
+    rows = []
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt") as f:
+        for line in f:
+            if not line.startswith("T"):
+                continue
+            ids = []
+            counts = []
+            for token in line[1:].split():
+                _, bb, count = token.split(":")
+                ids.append(int(bb))
+                counts.append(float(count))
+            for bb in ids:
+                if bb not in projection:
+                    projection[bb] = np.random.default_rng([seed, bb]).uniform(-1.0, 1.0, dims)
+            counts = np.array(counts)
+            counts /= counts.sum()
+            rows.append(counts @ np.array([projection[bb] for bb in ids]))
+    return np.array(rows)
+
+
+# 2. Clustering
+def sq_dist(data, centers):
+    """(points x centers) squared Euclidean distances"""
+    dist = (data ** 2).sum(1)[:, None] - 2 * data @ centers.T + (centers ** 2).sum(1)[None]
+    return np.maximum(dist, 0.0)
+
+
+def kmeans(data, k, rng, iterations=100):
+    """k-means with k-means++ seeding; returns (labels, centers, sse)"""
+    centers = [data[rng.integers(len(data))]]
+    for _ in range(1, k):
+        dist = sq_dist(data, np.array(centers)).min(axis=1)
+        if dist.sum() == 0:
+            centers.append(data[rng.integers(len(data))])
+        else:
+            centers.append(data[rng.choice(len(data), p=dist / dist.sum())])
+    centers = np.array(centers)
+
+    for _ in range(iterations):
+        labels = sq_dist(data, centers).argmin(axis=1)
+        new_centers = np.array([
+            data[labels == c].mean(axis=0) if np.any(labels == c) else centers[c]
+            for c in range(k)
+        ])
+        if np.allclose(new_centers, centers):
+            break
+        centers = new_centers
+
+    dist = sq_dist(data, centers)
+    labels = dist.argmin(axis=1)
+    sse = dist[np.arange(len(data)), labels].sum()
+    return labels, centers, sse
+
+
+def bic(data, labels, centers, sse):
+    """Bayesian information criterion of a spherical Gaussian clustering (X-means)"""
+    n, dims = data.shape
+    k = len(centers)
+    if n <= k:
+        return -np.inf
+    variance = max(sse / (n - k), 1e-12)
+    sizes = np.bincount(labels, minlength=k)
+    sizes = sizes[sizes > 0]
+    loglik = np.sum(
+        sizes * np.log(sizes) - sizes * np.log(n)
+        - sizes / 2 * np.log(2 * np.pi) - sizes * dims / 2 * np.log(variance)
+        - (sizes - k) / 2
+    )
+    params = (k - 1) + dims * k + 1
+    return loglik - params / 2 * np.log(n)
+
+
+def choose_simpoints(data, max_k=30, seed=42, bic_threshold=0.9, restarts=5):
+    """
+    Clusters the projected BBVs for k = 1..max_k, picks the smallest k whose BIC
+    reaches bic_threshold of the observed BIC range (as SimPoint does) and
+    returns [(interval index, cluster, weight)], one per cluster.
+    """
+    rng = np.random.default_rng(seed)
+    max_k = max(1, min(max_k, len(data)))
+    runs = []
+    for k in range(1, max_k + 1):
+        best = min((kmeans(data, k, rng) for _ in range(restarts)), key=lambda run: run[2])
+        runs.append((bic(data, *best), best))
+
+    scores = np.array([score for score, _ in runs])
+    finite = scores[np.isfinite(scores)]
+    if len(finite) == 0:
+        chosen = runs[0][1]
+    else:
+        cutoff = finite.min() + bic_threshold * (finite.max() - finite.min())
+        chosen = next(run for score, run in runs if np.isfinite(score) and score >= cutoff)
+
+    labels, centers, _ = chosen
+    simpoints = []
+    for cluster in range(len(centers)):
+        members = np.flatnonzero(labels == cluster)
+        if len(members) == 0:
+            continue
+        dist = sq_dist(data[members], centers[cluster:cluster + 1])[:, 0]
+        simpoints.append((int(members[dist.argmin()]), len(simpoints), len(members) / len(data)))
+    return simpoints
+
+
+def write_simpoints(simpoints, prefix):
+    """Writes SimPoint-format <prefix>.simpts and <prefix>.weights files"""
+    simpts_path = prefix + ".simpts"
+    weights_path = prefix + ".weights"
+    with open(simpts_path, "w") as f:
+        for index, cluster, _ in simpoints:
+            f.write(f"{index} {cluster}\n")
+    with open(weights_path, "w") as f:
+        for _, cluster, weight in simpoints:
+            f.write(f"{weight} {cluster}\n")
+    return simpts_path, weights_path
+
+
+# 3. Pipeline
+def workload_key(sim_args, interval):
+    """Key of the profile and clustering of the workload sim_args runs"""
+    parts = {
+        'workload': [file_sha256(exe) for exe in workload_executables(sim_args)],
+        'args': key_args(select_args(sim_args, EXECUTION_OPTIONS)),
+        'interval': interval,
+    }
+    text = json.dumps(parts, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+
+def profile_and_cluster(spec, gem5, sim_args, workdir, interval, max_k, jobs, script):
+    """Collects BBVs (once per binary) and returns the SimPoint file prefix and interval count"""
+    profile_dir = os.path.join(workdir, "profile")
+    bbv_path = os.path.join(profile_dir, "simpoint.bb.gz")
+    if not os.path.exists(bbv_path):
+        print("SimPoints: profiling basic block vectors")
+        profile_args = list(sim_args) + ["--simpoint-profile", "--simpoint-interval", str(interval)]
+        point = (dict(spec, num_cpu=1), gem5, script, profile_dir, profile_args)
+        for result in run_points([point], jobs):
+            if result['returncode'] != 0:
+                raise RuntimeError(f"BBV profiling failed, see {profile_dir}/gem5.log")
+
+    data = read_bbv(bbv_path)
+    prefix = os.path.abspath(os.path.join(workdir, "simpoints"))
+    if not os.path.exists(prefix + ".simpts"):
+        simpoints = choose_simpoints(data, max_k)
+        write_simpoints(simpoints, prefix)
+        print(f"SimPoints: {len(simpoints)} simulation points over {len(data)} intervals")
+    return prefix, len(data)
+
+
+def take_group_checkpoints(specs, gem5, sim_args, workdir, prefix, interval, warmup,
+                           jobs, script):
+    """Checkpoints every simulation point once per (num_cpu, mem_size) group"""
+    group_dirs = {}
+    todo = []
+    for spec in specs:
+        num_cpu, mem_bytes = prefix_group(spec)
+        ckpt_dir = os.path.abspath(os.path.join(workdir, f"cpu{num_cpu}_mem{mem_bytes}"))
+        if ckpt_dir in group_dirs.values():
+            group_dirs[spec['name']] = ckpt_dir
+            continue
+        group_dirs[spec['name']] = ckpt_dir
+        if not os.path.exists(os.path.join(ckpt_dir, "simpoints.json")):
+            take_args = list(sim_args) + [
+                "--take-simpoint-checkpoints",
+                f"{prefix}.simpts,{prefix}.weights,{interval},{warmup}",
+            ]
+            todo.append((spec, gem5, script, ckpt_dir, take_args))
+
+    if todo:
+        print(f"SimPoints: taking checkpoints for {len(todo)} group(s)")
+        for result in run_points(todo, jobs):
+            if result['returncode'] != 0:
+                raise RuntimeError(f"Taking SimPoint checkpoints failed, see {result['outdir']}/gem5.log")
+
+    points = {}
+    for spec in specs:
+        with open(os.path.join(group_dirs[spec['name']], "simpoints.json"), "r") as f:
+            points[spec['name']] = json.load(f)
+    return points
+
+
+def reconstruct(point_stats, num_intervals, geometry=None, thermal=None):
+    """
+    Combines per-point stats into whole-program estimates.  point_stats is a
+    list of (simpoint dict, stats, trailer) for one config.  Each point's
+    energy is the full energy.account of its dump (dynamic, leakage at the
+    steady-state die temperature of the interval) for the config's cache
+    geometry.
+    """
+    cpi = 0.0
+    seconds_per_inst = 0.0
+    joules_per_inst = 0.0
+    for point, stats, trailer in point_stats:
+        insts = stats['simInsts']
+        cycles = stats['simTicks'] / stats['system.cpu_clk_domain.clock']
+        cpi += point['weight'] * cycles / insts
+        seconds_per_inst += point['weight'] * stats['simSeconds'] / insts
+        energy = account([stats], geometry=geometry, thermal=thermal)['energy']
+        joules_per_inst += point['weight'] * energy / insts
+
+    total_insts = num_intervals * point_stats[0][0]['interval']
+    return {
+        'cpi': cpi,
+        'ipc': 1.0 / cpi if cpi else float('nan'),
+        'sim_seconds': seconds_per_inst * total_insts,
+        'energy_joules': joules_per_inst * total_insts,
+        'instructions': total_insts,
+        'simpoints': len(point_stats),
+    }
+
+
+def run_simpoint_sweep(specs, gem5, sim_args, outdir="simpoint_out", interval=10000000,
+                       warmup=1000000, max_k=30, jobs=None, script=DEFAULT_SCRIPT):
+    """Runs the whole pipeline and returns {spec name: whole-program estimate}"""
+    workdir = os.path.join(outdir, "simpoints", workload_key(sim_args, interval))
+    prefix, num_intervals = profile_and_cluster(specs[0], gem5, sim_args, workdir,
+                                                interval, max_k, jobs, script)
+    points = take_group_checkpoints(specs, gem5, sim_args, workdir, prefix, interval,
+                                    warmup, jobs, script)
+
+    runs = []
+    for spec in specs:
+        for point in points[spec['name']]:
+            point_args = list(sim_args) + [
+                "--restore-prefix-checkpoint", point['checkpoint'],
+                "--maxinsts", str(point['interval']),
+            ]
+            if point['warmup']:
+                point_args += ["--warmup-insts", str(point['warmup'])]
+            point_dir = os.path.join(outdir, spec['name'], f"simpoint_{point['cluster']:02d}")
+            runs.append((spec, gem5, script, point_dir, point_args))
+
+    print(f"SimPoints: simulating {len(runs)} points")
+    results = {result['outdir']: result for result in run_points(runs, jobs)}
+
+    estimates = {}
+    for spec in specs:
+        point_stats = []
+        geometry = None
+        for point in points[spec['name']]:
+            result = results[os.path.join(outdir, spec['name'], f"simpoint_{point['cluster']:02d}")]
+            if result['returncode'] != 0 or not result['stats']:
+                raise RuntimeError(f"Simulation point {point['cluster']} of {spec['name']} failed")
+            if geometry is None:
+                # every point of a spec runs the same caches
+                geometry = run_geometry(result['stats'])
+            point_stats.append((point,) + read_stats(result['stats']))
+        estimates[spec['name']] = reconstruct(point_stats, num_intervals, geometry)
+    return estimates
+
+
+# 4. Command line entry point
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    sim_args = []
+    if "--" in argv:
+        split = argv.index("--")
+        argv, sim_args = argv[:split], argv[split + 1:]
+
+    parser = argparse.ArgumentParser(description="SimPoint-sampled design-space sweep")
+    parser.add_argument("--gem5", required=True, help="Path to the gem5 binary")
+    parser.add_argument("--script", default=DEFAULT_SCRIPT)
+    parser.add_argument("--configs", default=None)
+    parser.add_argument("--grid", default=None)
+    parser.add_argument("--spec", action="append", default=[])
+    parser.add_argument("-j", "--jobs", type=int, default=None)
+    parser.add_argument("--outdir", default="simpoint_out")
+    parser.add_argument("--interval", type=int, default=10000000, help="Instructions per interval")
+    parser.add_argument("--warmup", type=int, default=1000000, help="Warmup instructions before each point")
+    parser.add_argument("--max-k", type=int, default=30, help="Maximum number of clusters")
+    args = parser.parse_args(argv)
+
+    specs = collect_specs(args)
+    estimates = run_simpoint_sweep(specs, args.gem5, sim_args, args.outdir, args.interval,
+                                   args.warmup, args.max_k, args.jobs, args.script)
+
+    print(f"{'config':<20} {'ipc':>10} {'sim_seconds':>14} {'energy_J':>14}")
+    for name, est in estimates.items():
+        print(f"{name:<20} {est['ipc']:>10.4f} {est['sim_seconds']:>14.6g} {est['energy_joules']:>14.6g}")
+    summary = os.path.join(args.outdir, "simpoints_summary.json")
+    with open(summary, "w") as f:
+        json.dump(estimates, f, indent=2)
+    print(f"SimPoint estimates saved as {summary}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
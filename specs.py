@@ -0,0 +1,192 @@
+# System specifications for the RISC-V design-space exploration.
+#
+# A spec is a plain dict describing one point in the design space (clock,
+# voltage, core count, memory size and the L1/L2 cache parameters).  Specs are
+# JSON-serialisable so the sweep driver can hand them to a gem5 subprocess, and
+# this module deliberately does not import m5 so host-side tools can use it.
+
+import itertools
+import json
+import os
+
+
+# 1. Default spec (the parameters every config script used to hard-code)
+DEFAULT_SPEC = {
+    'name': 'default',
+    'frequency': '1GHz',
+    'voltage': '0.9V',
+    'num_cpu': 1,
+    'mem_size': '512MB',
+    'l1i_size': '8kB',
+    'l1i_assoc': 2,
+    'l1d_size': '8kB',
+    'l1d_assoc': 2,
+    'l1_tag_latency': 2,
+    'l1_data_latency': 2,
+    'l1_response_latency': 2,
+    'l1_mshrs': 4,
+    'l1_tgts_per_mshr': 20,
+    'l2_size': '256kB',
+    'l2_assoc': 8,
+    'l2_tag_latency': 10,
+    'l2_data_latency': 10,
+    'l2_response_latency': 10,
+    'l2_mshrs': 20,
+    'l2_tgts_per_mshr': 12,
+}
+
+
+def make_spec(name, **overrides):
+    """Returns a copy of DEFAULT_SPEC with the given overrides applied"""
+    unknown = set(overrides) - set(DEFAULT_SPEC)
+    if unknown:
+        raise ValueError(f"Unknown spec parameters: {', '.join(sorted(unknown))}")
+    spec = dict(DEFAULT_SPEC)
+    spec.update(overrides)
+    spec['name'] = name
+    return spec
+
+
+def l1_spec(name, frequency, voltage, num_cpu, mem_size, l1_size, l2_size):
+    """Shorthand for the configs that use the same size for L1I and L1D"""
+    return make_spec(name, frequency=frequency, voltage=voltage, num_cpu=num_cpu,
+                     mem_size=mem_size, l1i_size=l1_size, l1d_size=l1_size,
+                     l2_size=l2_size)
+
+
+# 2. Named configurations (previously configA.py ... configH.py etc.)
+CONFIGS = {
+    'config_A': l1_spec('config_A', '500MHz', '0.7V', 1, '512MB', '8kB', '256kB'),
+    'config_B': l1_spec('config_B', '1GHz', '0.8V', 2, '1GB', '16kB', '512kB'),
+    'config_C': l1_spec('config_C', '1.5GHz', '0.9V', 2, '2GB', '32kB', '1MB'),
+    'config_D': l1_spec('config_D', '2GHz', '1.0V', 4, '4GB', '64kB', '2MB'),
+    'config_E': l1_spec('config_E', '2GHz', '1.2V', 8, '2GB', '32kB', '512kB'),
+    'config_F': l1_spec('config_F', '1.5GHz', '1.0V', 4, '1GB', '64kB', '1MB'),
+    'config_G': l1_spec('config_G', '500MHz', '0.8V', 1, '512MB', '16kB', '256kB'),
+    'config_H': l1_spec('config_H', '1GHz', '1.2V', 2, '1GB', '8kB', '1MB'),
+    'config_I': l1_spec('config_I', '2GHz', '0.9V', 8, '4GB', '64kB', '2MB'),
+    'final_optimized': l1_spec('final_optimized', '1.8GHz', '0.9V', 2, '4GB',
+                               '64kB', '1MB'),
+}
+
+
+# 3. Unit parsing helpers
+def parse_frequency(frequency_str):
+    """
+    Converts a frequency string (e.g., '2GHz', '800MHz') to a float representing Hz.
+    """
+    if frequency_str.endswith('GHz'):
+        return float(frequency_str[:-3]) * 1e9
+    elif frequency_str.endswith('MHz'):
+        return float(frequency_str[:-3]) * 1e6
+    elif frequency_str.endswith('kHz'):
+        return float(frequency_str[:-3]) * 1e3
+    elif frequency_str.endswith('Hz'):
+        return float(frequency_str[:-2])
+    else:
+        raise ValueError(f"Unknown frequency format: {frequency_str}")
+
+
+def parse_voltage(voltage_str):
+    """Converts a voltage string (e.g., '0.9V') to a float in Volts"""
+    return float(str(voltage_str).rstrip('V'))
+
+
+_SIZE_UNITS = {'kB': 1 << 10, 'KB': 1 << 10, 'MB': 1 << 20, 'GB': 1 << 30, 'B': 1}
+
+
+def parse_size(size_str):
+    """Converts a size string (e.g., '64kB', '4GB') to a number of bytes"""
+    size_str = str(size_str)
+    for unit in ('kB', 'KB', 'MB', 'GB', 'B'):
+        if size_str.endswith(unit):
+            return int(float(size_str[:-len(unit)]) * _SIZE_UNITS[unit])
+    return int(size_str)
+
+
+def format_frequency(hz):
+    """Inverse of parse_frequency: 1.8e9 -> '1.8GHz'"""
+    for unit, scale in (('GHz', 1e9), ('MHz', 1e6), ('kHz', 1e3)):
+        if hz >= scale:
+            return f"{round(hz / scale, 6):g}{unit}"
+    return f"{hz:g}Hz"
+
+
+def format_size(size_bytes):
+    """Inverse of parse_size: 65536 -> '64kB'"""
+    for unit in ('GB', 'MB', 'kB'):
+        if size_bytes >= _SIZE_UNITS[unit] and size_bytes % _SIZE_UNITS[unit] == 0:
+            return f"{size_bytes // _SIZE_UNITS[unit]}{unit}"
+    return f"{size_bytes}B"
+
+
+# 4. Spec serialisation
+def canonical_spec(spec):
+    """
+    Returns a canonical JSON string for a spec: sizes, clocks and voltages are
+    normalised to plain numbers so '1MB' and '1024kB' describe the same point.
+    The name is not part of the canonical form.
+    """
+    canon = {}
+    for key, value in spec.items():
+        if key == 'name':
+            continue
+        if key == 'frequency':
+            value = parse_frequency(value)
+        elif key == 'voltage':
+            value = parse_voltage(value)
+        elif key.endswith('_size'):
+            value = parse_size(value)
+        canon[key] = value
+    return json.dumps(canon, sort_keys=True, separators=(',', ':'))
+
+
+def load_spec(text):
+    """
+    Resolves a --spec argument: a name from CONFIGS, a path to a JSON file or
+    an inline JSON object.  JSON specs are merged on top of DEFAULT_SPEC.
+    """
+    if text in CONFIGS:
+        return dict(CONFIGS[text])
+    if os.path.exists(text):
+        with open(text, 'r') as f:
+            data = json.load(f)
+    else:
+        data = json.loads(text)
+    base = CONFIGS.get(data.pop('base', None), DEFAULT_SPEC)
+    spec = dict(base)
+    spec.update(data)
+    return make_spec(spec.pop('name', 'custom'),
+                     **{k: v for k, v in spec.items() if k in DEFAULT_SPEC})
+
+
+def load_specs(path):
+    """Loads a list of specs (or a grid description) from a JSON file"""
+    with open(path, 'r') as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        base = data.get('base', {})
+        if isinstance(base, str):
+            base = CONFIGS[base]
+        return expand_grid(base, **data['grid'])
+    return [load_spec(json.dumps(entry)) for entry in data]
+
+
+def expand_grid(base=None, **axes):
+    """
+    Expands a grid of parameter values into a list of specs, e.g.
+    expand_grid(CONFIGS['config_B'], l2_size=['256kB', '1MB'], num_cpu=[1, 2]).
+    """
+    base = dict(base or DEFAULT_SPEC)
+    base_name = base.get('name', 'default')
+    keys = sorted(axes)
+    specs = []
+    for values in itertools.product(*(axes[k] for k in keys)):
+        overrides = dict(zip(keys, values))
+        suffix = '_'.join(f"{k}-{v}" for k, v in overrides.items())
+        name = f"{base_name}_{suffix}" if suffix else base_name
+        spec = dict(base)
+        spec.update(overrides)
+        spec.pop('name', None)
+        specs.append(make_spec(name, **spec))
+    return specs
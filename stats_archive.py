@@ -0,0 +1,246 @@
+# Delta-compressed archive of stats dumps.
+#
+# Dumps of the same system differ in a handful of lines (host timing stats,
+# the power figures), so the archive stores one compressed base dump per stat
+# schema (the sequence of stat names) and, for every run, only the lines that
+# differ from that base:
+#
+#   python3 stats_archive.py add stats.archive stats_*.txt sweep_out
+#   python3 stats_archive.py list stats.archive
+#   python3 stats_archive.py extract stats.archive stats_20241020-193544.txt -o out.txt
+#
+# Any run is reconstructed byte for byte from its base and its delta.  Bulk
+# reads parse each base once and then only the changed lines of every run.
+# The archive is a SQLite file, so adding runs is transactional.
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import zlib
+
+from stats_parser import iter_lines, parse_stat_line, parse_trailer_line
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bases (
+    id INTEGER PRIMARY KEY,
+    schema TEXT UNIQUE NOT NULL,
+    text BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS runs (
+    name TEXT PRIMARY KEY,
+    base INTEGER NOT NULL REFERENCES bases(id),
+    size INTEGER NOT NULL,
+    delta BLOB NOT NULL
+);
+"""
+
+
+# 1. Encoding
+def line_key(line):
+    """The part of a line that is the same in every dump of a schema (its stat name)"""
+    fields = line.split(None, 1)
+    return fields[0] if fields else ""
+
+
+def schema_of(lines):
+    return hashlib.sha256("\n".join(line_key(line) for line in lines).encode()).hexdigest()
+
+
+def encode_delta(base_lines, lines):
+    """[[line index, line], ...] for the lines of a dump that differ from its base"""
+    return [[i, line] for i, (old, line) in enumerate(zip(base_lines, lines)) if old != line]
+
+
+def apply_delta(base_lines, delta):
+    lines = list(base_lines)
+    for i, line in delta:
+        lines[i] = line
+    return lines
+
+
+def compress(obj):
+    return zlib.compress(json.dumps(obj, separators=(',', ':')).encode(), 9)
+
+
+def decompress(blob):
+    return json.loads(zlib.decompress(blob))
+
+
+class ParsedBase:
+    """A base dump with its parsed values and what every line holds"""
+
+    def __init__(self, lines):
+        self.lines = lines
+        self.kinds = {}  # line index -> ('stat', dump) or ('trailer',)
+        self.stats = {}
+        self.trailer = {}
+        for i, entry in iter_lines(lines):
+            if entry[0] == 'trailer':
+                self.kinds[i] = ('trailer',)
+                self.trailer[entry[1]] = entry[2]
+            else:
+                self.kinds[i] = ('stat', entry[1])
+                self.stats[entry[2]] = entry[3]
+        # only the last occurrence of a stat (the last dump) is visible
+        self.last = {}
+        for i, kind in self.kinds.items():
+            if kind[0] == 'stat':
+                self.last[parse_stat_line(lines[i])[0]] = i
+
+
+# 2. Archive
+class StatsArchive:
+    """Random-access archive of stats dumps, one base per schema plus deltas"""
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+        self._bases = {}
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def names(self):
+        return [name for (name,) in self.conn.execute("SELECT name FROM runs ORDER BY name")]
+
+    def __contains__(self, name):
+        return self.conn.execute("SELECT 1 FROM runs WHERE name = ?", (name,)).fetchone() is not None
+
+    def _base(self, base_id):
+        if base_id not in self._bases:
+            (blob,) = self.conn.execute("SELECT text FROM bases WHERE id = ?", (base_id,)).fetchone()
+            self._bases[base_id] = ParsedBase(decompress(blob))
+        return self._bases[base_id]
+
+    def add(self, name, text):
+        """Stores a dump under name, replacing any earlier run of that name"""
+        lines = text.split("\n")
+        schema = schema_of(lines)
+        row = self.conn.execute("SELECT id FROM bases WHERE schema = ?", (schema,)).fetchone()
+        if row is None:
+            base_id = self.conn.execute("INSERT INTO bases (schema, text) VALUES (?, ?)",
+                                        (schema, compress(lines))).lastrowid
+            self._bases[base_id] = ParsedBase(lines)
+        else:
+            base_id = row[0]
+        delta = encode_delta(self._base(base_id).lines, lines)
+        self.conn.execute("INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?)",
+                          (name, base_id, len(text), compress(delta)))
+
+    def add_files(self, paths):
+        """Adds stats files (named by basename) in one transaction, returns how many"""
+        with self.conn:
+            for path in paths:
+                with open(path, "r") as f:
+                    self.add(os.path.basename(path), f.read())
+        return len(paths)
+
+    def _row(self, name):
+        row = self.conn.execute("SELECT base, delta FROM runs WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            raise KeyError(name)
+        return self._base(row[0]), decompress(row[1])
+
+    def text(self, name):
+        """The exact text of the archived dump"""
+        base, delta = self._row(name)
+        return "\n".join(apply_delta(base.lines, delta))
+
+    def read_stats(self, name):
+        """
+        ({stat name: value}, {trailer key: value}) of a run, as
+        stats_parser.read_stats; only lines that differ from the base are parsed.
+        """
+        base, delta = self._row(name)
+        return self._values(base, delta)
+
+    def _values(self, base, delta):
+        stats = dict(base.stats)
+        trailer = dict(base.trailer)
+        for i, line in delta:
+            kind = base.kinds.get(i)
+            if kind is None:
+                continue
+            if kind[0] == 'trailer':
+                key, value = parse_trailer_line(line.rstrip())
+                trailer[key] = value
+            else:
+                parsed = parse_stat_line(line)
+                if parsed is not None and base.last.get(parsed[0]) == i:
+                    stats[parsed[0]] = parsed[1]
+        return stats, trailer
+
+    def iter_stats(self):
+        """Yields (name, stats, trailer) for every run, grouped by base"""
+        rows = self.conn.execute("SELECT name, base, delta FROM runs ORDER BY base, name")
+        for name, base_id, blob in rows:
+            yield (name,) + self._values(self._base(base_id), decompress(blob))
+
+    def sizes(self):
+        """(original bytes, archived bytes, number of runs, number of bases)"""
+        original, deltas, runs = self.conn.execute(
+            "SELECT COALESCE(SUM(size), 0), COALESCE(SUM(LENGTH(delta)), 0), COUNT(*) FROM runs").fetchone()
+        bases, count = self.conn.execute(
+            "SELECT COALESCE(SUM(LENGTH(text)), 0), COUNT(*) FROM bases").fetchone()
+        return original, deltas + bases, runs, count
+
+
+# 3. Command line entry point
+def find_files(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, n) for n in names
+                             if n.startswith("stats_") and n.endswith(".txt"))
+        else:
+            files.append(path)
+    return sorted(files)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Delta-compressed archive of gem5 stats dumps")
+    commands = parser.add_subparsers(dest="command", required=True)
+    p_add = commands.add_parser("add", help="Archive stats files (named by basename)")
+    p_add.add_argument("archive")
+    p_add.add_argument("paths", nargs="+", help="Stats files or directories searched recursively")
+    p_list = commands.add_parser("list", help="List archived runs and the compression ratio")
+    p_list.add_argument("archive")
+    p_extract = commands.add_parser("extract", help="Write an archived dump back out")
+    p_extract.add_argument("archive")
+    p_extract.add_argument("name")
+    p_extract.add_argument("-o", "--output", default=None, help="Output file (default: the run name)")
+    args = parser.parse_args(argv)
+
+    with StatsArchive(args.archive) as archive:
+        if args.command == "add":
+            count = archive.add_files(find_files(args.paths))
+            print(f"Archived {count} dumps in {args.archive}")
+        elif args.command == "extract":
+            output = args.output or args.name
+            with open(output, "w") as f:
+                f.write(archive.text(args.name))
+            print(f"Dump saved as {output}")
+        else:
+            for name in archive.names():
+                print(name)
+        original, archived, runs, bases = archive.sizes()
+        if args.command != "extract" and archived:
+            print(f"{runs} runs, {bases} bases: {original} bytes stored in {archived} "
+                  f"({original / archived:.1f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,408 @@
+# SQLite index over stats dumps.
+#
+# Ingests every stats dump (with its run manifest, or the configuration
+# trailer of older dumps, and the headline metrics of
+# stats_parser.run_summary) into one SQLite file, so questions like
+# "ipc and L2 miss rate of every 8-core run" are a query instead of a grep:
+#
+#   python3 stats_index.py ingest . sweep_out runs
+#   python3 stats_index.py query --where num_cpu=8 \
+#       --stat ipc --stat system.l2.overallMissRate::total
+#   python3 stats_index.py pivot --rows frequency --columns l2_size --stat ipc
+#   python3 stats_index.py query --where "frequency>=1GHz" --stat energy --csv out.csv
+#
+# Ingestion is incremental: a file whose size and mtime are unchanged is
+# skipped, one whose content hash is unchanged only has its mtime refreshed,
+# and only new or rewritten files are parsed.  Files that disappeared are
+# dropped from the index.
+
+import argparse
+import csv
+import glob
+import json
+import os
+import sqlite3
+import sys
+
+from energy import operating_point
+from result_cache import file_sha256
+from specs import format_frequency, format_size, parse_frequency, parse_size, parse_voltage
+from stats_parser import core_summary, iter_stats, is_complete, read_manifest, run_summary
+
+
+DEFAULT_DB = "stats_index.db"
+
+# Trailer line -> (config key, parser giving a comparable number)
+TRAILER_KEYS = {
+    'Configuration Name': ('name', None),
+    'Run ID': ('run_id', None),
+    'Frequency': ('frequency', parse_frequency),
+    'Voltage': ('voltage', parse_voltage),
+    'L1 Cache Size': ('l1_size', parse_size),
+    'L2 Cache Size': ('l2_size', parse_size),
+    'Memory Size': ('mem_size', parse_size),
+    'Number of Cores': ('num_cpu', int),
+    'CPU Power Consumption': ('cpu_power', float),
+    'Memory Power Consumption': ('memory_power', float),
+    'Total Power Consumption': ('total_power', float),
+}
+CONFIG_PARSERS = dict(TRAILER_KEYS.values())
+
+# Manifest config values are plain numbers; these give them the trailer's units
+CONFIG_FORMATS = {
+    'frequency': format_frequency,
+    'voltage': lambda v: f"{v:g}V",
+    'l1_size': format_size, 'l1i_size': format_size, 'l1d_size': format_size,
+    'l2_size': format_size, 'mem_size': format_size,
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    last_dump INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS names (
+    id INTEGER PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL
+);
+CREATE TABLE IF NOT EXISTS stats (
+    run INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    dump INTEGER NOT NULL,
+    stat INTEGER NOT NULL REFERENCES names(id),
+    value REAL,
+    pct REAL,
+    cum REAL
+);
+CREATE TABLE IF NOT EXISTS config (
+    run INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    key TEXT NOT NULL,
+    value TEXT,
+    num REAL
+);
+CREATE INDEX IF NOT EXISTS stats_by_name ON stats(stat, run);
+CREATE INDEX IF NOT EXISTS stats_by_run ON stats(run);
+CREATE INDEX IF NOT EXISTS config_by_key ON config(key, num, value);
+CREATE INDEX IF NOT EXISTS config_by_run ON config(run);
+"""
+
+
+# 1. Database
+def connect(db_path=DEFAULT_DB):
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def config_number(key, value):
+    """Comparable number for a config value, or None"""
+    parser = CONFIG_PARSERS.get(key, float)
+    if parser is None:
+        return None
+    try:
+        return float(parser(value))
+    except (TypeError, ValueError, KeyError):
+        return None
+
+
+# 2. Ingestion
+def find_dumps(paths):
+    """Expands files and directories (searched recursively) into stats dump paths"""
+    dumps = []
+    for path in paths:
+        if os.path.isdir(path):
+            dumps.extend(glob.glob(os.path.join(path, "**", "stats_*.txt"), recursive=True))
+        else:
+            dumps.append(path)
+    return sorted(os.path.abspath(p) for p in dumps)
+
+
+def ingest_file(conn, path, st, sha, names):
+    """Parses one dump into the index, replacing any earlier version of it"""
+    conn.execute("DELETE FROM runs WHERE path = ?", (path,))
+    run = conn.execute(
+        "INSERT INTO runs (path, size, mtime_ns, sha256, last_dump) VALUES (?, ?, ?, ?, 0)",
+        (path, st.st_size, st.st_mtime_ns, sha)).lastrowid
+
+    rows = []
+    config = []
+    manifest = read_manifest(path)
+    if manifest is not None:
+        values = dict(manifest['config'])
+        values.setdefault('l1_size', values.get('l1d_size'))
+        for key, value in values.items():
+            if value is None:
+                continue
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                text = CONFIG_FORMATS.get(key, str)(value)
+                config.append((run, key, text, float(value)))
+            else:
+                config.append((run, key, str(value), config_number(key, str(value))))
+    last_dump = 0
+    last_values = {}
+    for entry in iter_stats(path):
+        if entry[0] == 'trailer':
+            if manifest is None:
+                key = TRAILER_KEYS.get(entry[1], (entry[1], None))[0]
+                config.append((run, key, entry[2], config_number(key, entry[2])))
+            continue
+        _, dump, name, value, pct, cum = entry
+        stat = names.get(name)
+        if stat is None:
+            stat = names[name] = conn.execute(
+                "INSERT INTO names (name) VALUES (?)", (name,)).lastrowid
+        rows.append((run, dump, stat, value, pct, cum))
+        if dump >= last_dump:
+            last_dump = dump
+            last_values[name] = value
+
+    # The trailer prose of older dumps names the spec's operating point, not
+    # always the one that ran; the clock and voltage stats record the latter
+    if manifest is None and 'system.cpu_clk_domain.clock' in last_values:
+        _, volts, hz, _, _ = operating_point(last_values)
+        config = [row for row in config if row[1] not in ('frequency', 'voltage')]
+        config += [(run, 'frequency', format_frequency(hz), hz),
+                   (run, 'voltage', CONFIG_FORMATS['voltage'](volts), volts)]
+
+    # Headline metrics are stored as stats of the last dump so they can be
+    # queried like any other stat.
+    try:
+        summary = run_summary(path)
+    except (KeyError, ZeroDivisionError):
+        summary = {}
+    cores = core_summary(last_values)
+    if cores['num_cores']:
+        summary['cores.active'] = cores['active_cores']
+        summary['cores.parallel_efficiency'] = cores['parallel_efficiency']
+        for metric, agg in cores.items():
+            if isinstance(agg, dict):
+                for key in ('total', 'mean', 'min', 'max', 'imbalance'):
+                    summary[f"cores.{metric}.{key}"] = agg[key]
+    for name, value in summary.items():
+        stat = names.get(name)
+        if stat is None:
+            stat = names[name] = conn.execute(
+                "INSERT INTO names (name) VALUES (?)", (name,)).lastrowid
+        rows.append((run, last_dump, stat, value, None, None))
+
+    conn.executemany("INSERT INTO stats VALUES (?, ?, ?, ?, ?, ?)", rows)
+    conn.executemany("INSERT INTO config VALUES (?, ?, ?, ?)", config)
+    conn.execute("UPDATE runs SET last_dump = ? WHERE id = ?", (last_dump, run))
+
+
+def ingest(conn, paths, prune=True):
+    """
+    Brings the index up to date with the dumps under paths and returns
+    (added, updated, unchanged, removed) counts.
+    """
+    names = dict(conn.execute("SELECT name, id FROM names").fetchall())
+    known = {path: (size, mtime_ns, sha)
+             for path, size, mtime_ns, sha in conn.execute(
+                 "SELECT path, size, mtime_ns, sha256 FROM runs")}
+    added = updated = unchanged = 0
+    seen = set()
+    with conn:
+        for path in find_dumps(paths):
+            seen.add(path)
+            st = os.stat(path)
+            old = known.get(path)
+            if old is not None and old[:2] == (st.st_size, st.st_mtime_ns):
+                unchanged += 1
+                continue
+            if not is_complete(path):
+                print(f"Skipping incomplete stats dump {path}", file=sys.stderr)
+                continue
+            sha = file_sha256(path)
+            if old is not None and old[2] == sha:
+                conn.execute("UPDATE runs SET size = ?, mtime_ns = ? WHERE path = ?",
+                             (st.st_size, st.st_mtime_ns, path))
+                unchanged += 1
+                continue
+            ingest_file(conn, path, st, sha, names)
+            if old is None:
+                added += 1
+            else:
+                updated += 1
+
+        removed = 0
+        if prune:
+            roots = [os.path.abspath(p) for p in paths]
+            for path in known:
+                under = any(path == r or path.startswith(r + os.sep) for r in roots)
+                if under and path not in seen:
+                    conn.execute("DELETE FROM runs WHERE path = ?", (path,))
+                    removed += 1
+    return added, updated, unchanged, removed
+
+
+# 3. Queries
+OPERATORS = ('>=', '<=', '!=', '=', '>', '<')
+
+
+def parse_where(text):
+    """'num_cpu>=4' -> ('num_cpu', '>=', '4')"""
+    for op in OPERATORS:
+        key, sep, value = text.partition(op)
+        if sep:
+            return key.strip(), op, value.strip()
+    raise ValueError(f"Cannot parse filter {text!r}, expected key<op>value with op in {OPERATORS}")
+
+
+def matching_runs(conn, where):
+    """Returns ids of runs whose config satisfies every (key, op, value) filter"""
+    sql = "SELECT id FROM runs"
+    params = []
+    for key, op, value in where:
+        number = config_number(key, value)
+        if number is not None:
+            clause = f"SELECT run FROM config WHERE key = ? AND num {op} ?"
+            params += [key, number]
+        else:
+            clause = f"SELECT run FROM config WHERE key = ? AND value {op} ?"
+            params += [key, value]
+        sql += (" WHERE " if sql == "SELECT id FROM runs" else " AND ") + f"id IN ({clause})"
+    return [row[0] for row in conn.execute(sql + " ORDER BY id", params)]
+
+
+def run_table(conn, where=(), stats=(), config_keys=None):
+    """
+    Returns one dict per matching run with its path, its config values and
+    the last-dump value of every stat in stats (None if absent).
+    """
+    runs = matching_runs(conn, where)
+    if not runs:
+        return []
+    marks = ",".join("?" * len(runs))
+    table = {run: {'path': path} for run, path in conn.execute(
+        f"SELECT id, path FROM runs WHERE id IN ({marks})", runs)}
+    for run, key, value in conn.execute(
+            f"SELECT run, key, value FROM config WHERE run IN ({marks})", runs):
+        if config_keys is None or key in config_keys:
+            table[run][key] = value
+    for name in stats:
+        for run in runs:
+            table[run].setdefault(name, None)
+        for run, value in conn.execute(
+                f"""SELECT s.run, s.value FROM stats s
+                    JOIN names n ON n.id = s.stat
+                    JOIN runs r ON r.id = s.run AND s.dump = r.last_dump
+                    WHERE n.name = ? AND s.run IN ({marks})""", [name] + runs):
+            table[run][name] = value
+    return [table[run] for run in runs]
+
+
+def pivot(rows, row_key, column_key, stat):
+    """Returns (row labels, column labels, {(row, column): mean of stat})"""
+    cells = {}
+    for row in rows:
+        value = row.get(stat)
+        if value is None:
+            continue
+        cells.setdefault((row.get(row_key), row.get(column_key)), []).append(value)
+    order = lambda key: lambda label: (config_number(key, label) is None,
+                                       config_number(key, label) or 0, str(label))
+    row_labels = sorted({r for r, _ in cells}, key=order(row_key))
+    column_labels = sorted({c for _, c in cells}, key=order(column_key))
+    return row_labels, column_labels, {k: sum(v) / len(v) for k, v in cells.items()}
+
+
+def write_rows(rows, columns, path):
+    if path.endswith(".json"):
+        with open(path, "w") as f:
+            json.dump(rows, f, indent=2)
+    else:
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=columns, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(rows)
+    print(f"Query result saved as {path}")
+
+
+def format_cell(value):
+    if isinstance(value, float):
+        return f"{value:.6g}"
+    return "-" if value is None else str(value)
+
+
+def print_table(header, body):
+    widths = [max(len(str(h)), *(len(format_cell(r[i])) for r in body)) if body else len(str(h))
+              for i, h in enumerate(header)]
+    print("  ".join(str(h).ljust(w) for h, w in zip(header, widths)))
+    for row in body:
+        print("  ".join(format_cell(v).ljust(w) for v, w in zip(row, widths)))
+
+
+# 4. Command line entry point
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Index stats dumps in SQLite and query them")
+    parser.add_argument("--db", default=DEFAULT_DB, help="SQLite index file")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p_ingest = commands.add_parser("ingest", help="Add new and changed stats dumps to the index")
+    p_ingest.add_argument("paths", nargs="+", help="Stats files or directories searched recursively")
+    p_ingest.add_argument("--no-prune", action="store_true",
+                          help="Keep index entries whose files no longer exist")
+
+    for name, help_text in (("query", "One row per matching run"),
+                            ("pivot", "Mean of a stat by two config keys")):
+        p = commands.add_parser(name, help=help_text)
+        p.add_argument("--where", action="append", default=[],
+                       help="Config filter such as num_cpu=8 or frequency>=1GHz; may be repeated")
+        p.add_argument("--stat", action="append", default=[],
+                       help="Stat name (e.g. simInsts, ipc, energy); may be repeated")
+        p.add_argument("--csv", default=None, help="Export the result to a CSV file")
+        p.add_argument("--json", default=None, help="Export the result to a JSON file")
+        if name == "pivot":
+            p.add_argument("--rows", required=True, help="Config key for the rows")
+            p.add_argument("--columns", required=True, help="Config key for the columns")
+        else:
+            p.add_argument("--config", default="name,frequency,voltage,l1_size,l2_size,num_cpu",
+                           help="Config keys to show")
+
+    commands.add_parser("stats", help="List the indexed stat names")
+    args = parser.parse_args(argv)
+
+    conn = connect(args.db)
+    if args.command == "ingest":
+        added, updated, unchanged, removed = ingest(conn, args.paths, not args.no_prune)
+        print(f"Index {args.db}: {added} added, {updated} updated, "
+              f"{unchanged} unchanged, {removed} removed")
+        return 0
+    if args.command == "stats":
+        for (name,) in conn.execute("SELECT name FROM names ORDER BY name"):
+            print(name)
+        return 0
+
+    where = [parse_where(w) for w in args.where]
+    if args.command == "query":
+        keys = args.config.split(",") if args.config else []
+        rows = run_table(conn, where, args.stat, set(keys))
+        columns = keys + args.stat + ['path']
+        print_table(columns, [[row.get(c) for c in columns] for row in rows])
+        print(f"{len(rows)} runs")
+    else:
+        if len(args.stat) != 1:
+            parser.error("pivot needs exactly one --stat")
+        stat = args.stat[0]
+        rows = run_table(conn, where, [stat], {args.rows, args.columns})
+        row_labels, column_labels, cells = pivot(rows, args.rows, args.columns, stat)
+        print_table([f"{args.rows} \\ {args.columns}"] + column_labels,
+                    [[r] + [cells.get((r, c)) for c in column_labels] for r in row_labels])
+        rows = [dict({args.rows: r}, **{str(c): cells.get((r, c)) for c in column_labels})
+                for r in row_labels]
+        columns = [args.rows] + [str(c) for c in column_labels]
+
+    if args.csv:
+        write_rows(rows, columns, args.csv)
+    if args.json:
+        write_rows(rows, columns, args.json)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
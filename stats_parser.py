@@ -0,0 +1,612 @@
+# Reader for gem5 text stats dumps (m5out/stats.txt and the renamed
+# stats_<run id>.txt files, including the "Configuration values" trailer
+# the config scripts append).
+#
+# read_stats() gives a dict for one dump.  read_table() streams any number of
+# dumps line by line into a columnar StatsTable: stat names are interned once,
+# values are float64 arrays, and vector/distribution entries
+# (e.g. committedInstType::IntAlu) keep their percent and cumulative columns.
+# LazyStats mmaps one dump and decodes only the stats asked for, using a
+# cached offset index when many stats of the same file are needed; scan()
+# reads a few stats from thousands of dumps that way.  read_manifest() loads
+# the JSON run manifest saved next to newer dumps.  core_summary() and
+# core_matrix() aggregate the per-core system.cpuN.* stats of multi-core
+# runs and measure how evenly the cores were loaded:
+#
+#   python3 stats_parser.py cores stats_<run id>.txt
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import re
+import sys
+from array import array
+
+import numpy as np
+
+from energy import account, cache_geometry, read_dumps
+from specs import DEFAULT_SPEC, parse_size
+from timeseries import TimeSeries, find_timeseries
+
+BEGIN_MARKER = "---------- Begin Simulation Statistics ----------"
+END_MARKER = "---------- End Simulation Statistics"
+TRAILER_MARKER = "Configuration values"
+
+DEFAULT_INDEX_DIR = os.path.join(os.path.expanduser("~"), ".cache", "gem5-stats-offsets")
+
+
+def parse_value(text):
+    """Converts a stat value (e.g. '5818', '0.079478', 'nan') to a float"""
+    try:
+        return float(text)
+    except ValueError:
+        return float('nan')
+
+
+def parse_percent(text):
+    """'61.65%' -> 61.65"""
+    return parse_value(text[:-1])
+
+
+def parse_stat_line(line):
+    """(name, value, pct, cum) of a stat line (pct and cum None for scalars), or None"""
+    fields = line.partition("#")[0].split()
+    if len(fields) < 2:
+        return None
+    if len(fields) >= 4 and fields[2].endswith("%"):
+        return fields[0], parse_value(fields[1]), parse_percent(fields[2]), parse_percent(fields[3])
+    return fields[0], parse_value(fields[1]), None, None
+
+
+def parse_trailer_line(line):
+    key, _, value = line.partition(":")
+    return key.strip(), value.strip()
+
+
+def iter_lines(lines):
+    """
+    Parses the lines of a stats dump, yielding (line index, entry) where
+    entry is ('stat', dump, name, value, pct, cum) for every stat line (pct
+    and cum are None for scalars) or ('trailer', key, value) for every line of
+    the configuration trailer.  dump counts the Begin markers, starting at 0.
+    """
+    dump = -1
+    in_trailer = False
+    for i, line in enumerate(lines):
+        if line.startswith("----------"):
+            if line.startswith(BEGIN_MARKER):
+                dump += 1
+            continue
+        line = line.rstrip()
+        if not line:
+            continue
+        if line == TRAILER_MARKER:
+            in_trailer = True
+            continue
+        if in_trailer:
+            yield i, ('trailer',) + parse_trailer_line(line)
+            continue
+        parsed = parse_stat_line(line)
+        if parsed is not None:
+            yield i, ('stat', max(dump, 0)) + parsed
+
+
+def iter_stats(path):
+    """Streams a stats file, yielding the entries of iter_lines"""
+    with open(path, "r") as f:
+        for _, entry in iter_lines(f):
+            yield entry
+
+
+def read_stats(path):
+    """
+    Returns ({stat name: value}, {trailer key: value}) for a stats file.  If
+    the file holds several dumps the values of the last one win.
+    """
+    stats = {}
+    trailer = {}
+    for entry in iter_stats(path):
+        if entry[0] == 'trailer':
+            trailer[entry[1]] = entry[2]
+        else:
+            stats[entry[2]] = entry[3]
+    return stats, trailer
+
+
+class StatsTable:
+    """
+    Columnar table of stats from one or more dumps.
+
+    names       interned stat names; stat columns hold indices into it
+    paths       source file of every run; run columns hold indices into it
+    trailers    configuration trailer dict of every run
+    scalars     {'run', 'dump', 'stat', 'value'} arrays for scalar stats
+    vectors     {'run', 'dump', 'stat', 'value', 'pct', 'cum'} arrays for
+                vector and distribution entries printed with percentages
+    """
+
+    def __init__(self):
+        self.names = []
+        self.index = {}
+        self.paths = []
+        self.trailers = []
+        self._scalars = {'run': array('i'), 'dump': array('i'), 'stat': array('i'),
+                         'value': array('d')}
+        self._vectors = {'run': array('i'), 'dump': array('i'), 'stat': array('i'),
+                         'value': array('d'), 'pct': array('d'), 'cum': array('d')}
+        self._frozen = None
+
+    def intern(self, name):
+        stat = self.index.get(name)
+        if stat is None:
+            stat = self.index[name] = len(self.names)
+            self.names.append(name)
+        return stat
+
+    def add_file(self, path, keep=None):
+        """
+        Streams one stats file into the table and returns its run index.
+        keep, if given, is a predicate on stat names; other stats are dropped
+        without being interned, which bounds memory for large ingests.
+        """
+        run = len(self.paths)
+        self.paths.append(path)
+        trailer = {}
+        scalars, vectors = self._scalars, self._vectors
+        for entry in iter_stats(path):
+            if entry[0] == 'trailer':
+                trailer[entry[1]] = entry[2]
+                continue
+            _, dump, name, value, pct, cum = entry
+            if keep is not None and name not in self.index and not keep(name):
+                continue
+            columns = scalars if pct is None else vectors
+            columns['run'].append(run)
+            columns['dump'].append(dump)
+            columns['stat'].append(self.intern(name))
+            columns['value'].append(value)
+            if pct is not None:
+                columns['pct'].append(pct)
+                columns['cum'].append(cum)
+        self.trailers.append(trailer)
+        self._frozen = None
+        return run
+
+    def _freeze(self):
+        if self._frozen is None:
+            self._frozen = tuple(
+                {k: np.array(v, dtype=np.int32 if v.typecode == 'i' else np.float64)
+                 for k, v in columns.items()}
+                for columns in (self._scalars, self._vectors))
+        return self._frozen
+
+    @property
+    def scalars(self):
+        return self._freeze()[0]
+
+    @property
+    def vectors(self):
+        return self._freeze()[1]
+
+    def __len__(self):
+        return len(self.paths)
+
+    def column(self, name, dump=-1):
+        """
+        Value of stat name for every run as a float64 array (nan where a run
+        lacks it).  dump selects the dump within each file; -1 is the last.
+        """
+        out = np.full(len(self.paths), np.nan)
+        stat = self.index.get(name)
+        if stat is None:
+            return out
+        for columns in self._freeze():
+            rows = columns['stat'] == stat
+            runs, dumps, values = columns['run'][rows], columns['dump'][rows], columns['value'][rows]
+            if dump == -1:
+                # rows are in file order, so the last write per run wins
+                out[runs] = values
+            else:
+                sel = dumps == dump
+                out[runs[sel]] = values[sel]
+        return out
+
+    def trailer_column(self, key):
+        """Trailer value key of every run as a float64 array"""
+        return np.array([parse_value(t.get(key, 'nan')) for t in self.trailers])
+
+    def vector(self, prefix, run=0, dump=-1):
+        """{entry: (value, pct, cum)} of the vector stat prefix (e.g. '...::') in one run"""
+        columns = self.vectors
+        rows = columns['run'] == run
+        if dump == -1:
+            dumps = columns['dump'][rows]
+            dump = int(dumps.max()) if len(dumps) else 0
+        rows &= columns['dump'] == dump
+        result = {}
+        for i in np.flatnonzero(rows):
+            name = self.names[columns['stat'][i]]
+            if name.startswith(prefix):
+                result[name[len(prefix):]] = (columns['value'][i], columns['pct'][i], columns['cum'][i])
+        return result
+
+
+def read_table(paths, keep=None):
+    """Streams every stats file in paths into one StatsTable"""
+    table = StatsTable()
+    for path in paths:
+        table.add_file(path, keep)
+    return table
+
+
+class LazyStats:
+    """
+    mmap-backed reader of one stats dump.  get(name) finds the last line of
+    name with a single C-level search and decodes only that line; index()
+    builds the full {name: line offset} map of the last dump with one regex
+    pass and caches it in index_dir, keyed by path, size and mtime.
+    """
+
+    _line = re.compile(rb"^([^\s#-][^\s]*)[ \t]", re.M)
+
+    def __init__(self, path, index_dir=DEFAULT_INDEX_DIR):
+        self.path = path
+        self.index_dir = index_dir
+        self._offsets = None
+        with open(path, "rb") as f:
+            st = os.fstat(f.fileno())
+            self.stamp = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if st.st_size else b""
+        self.trailer_start = self.mm.rfind(b"\n" + TRAILER_MARKER.encode() + b"\n")
+        self.end = self.trailer_start if self.trailer_start >= 0 else len(self.mm)
+        self.dump_start = max(self.mm.rfind(BEGIN_MARKER.encode(), 0, self.end), 0)
+
+    def close(self):
+        if isinstance(self.mm, mmap.mmap):
+            self.mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _cache_path(self):
+        key = hashlib.sha256(json.dumps(self.stamp).encode()).hexdigest()
+        return os.path.join(self.index_dir, key[:2], key + ".json")
+
+    def index(self):
+        """{stat name: byte offset of its line} for the last dump"""
+        if self._offsets is not None:
+            return self._offsets
+        cache = self._cache_path() if self.index_dir else None
+        if cache and os.path.exists(cache):
+            with open(cache, "r") as f:
+                self._offsets = json.load(f)
+            return self._offsets
+        self._offsets = {
+            m.group(1).decode(): m.start()
+            for m in self._line.finditer(self.mm, self.dump_start, self.end)
+        }
+        if cache:
+            os.makedirs(os.path.dirname(cache), exist_ok=True)
+            tmp = f"{cache}.{os.getpid()}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(self._offsets, f, separators=(',', ':'))
+            os.replace(tmp, cache)
+        return self._offsets
+
+    def offset(self, name):
+        if self._offsets is not None:
+            return self._offsets.get(name, -1)
+        # Names are unique within a dump, but the match must be followed by
+        # whitespace so it is not a prefix of a longer name.
+        key = b"\n" + name.encode()
+        pos = self.dump_start
+        while True:
+            pos = self.mm.find(key, pos, self.end)
+            if pos < 0:
+                return -1
+            after = pos + len(key)
+            if self.mm[after:after + 1] in (b" ", b"\t"):
+                return pos + 1
+            pos = after
+
+    def fields(self, name):
+        """Whitespace-split fields of the stat line (description excluded), or None"""
+        start = self.offset(name)
+        if start < 0:
+            return None
+        stop = self.mm.find(b"\n", start)
+        line = self.mm[start:stop if stop >= 0 else len(self.mm)]
+        return line.partition(b"#")[0].split()
+
+    def get(self, name, default=float('nan')):
+        fields = self.fields(name)
+        if fields is None or len(fields) < 2:
+            return default
+        return parse_value(fields[1].decode())
+
+    def get_many(self, names):
+        """{name: value}; builds or loads the offset index when it pays off"""
+        if len(names) > 32:
+            self.index()
+        return {name: self.get(name) for name in names}
+
+    def trailer(self):
+        if self.trailer_start < 0:
+            return {}
+        text = self.mm[self.trailer_start:].decode(errors="replace")
+        trailer = {}
+        for line in text.splitlines()[2:]:
+            key, sep, value = line.partition(":")
+            if sep:
+                trailer[key.strip()] = value.strip()
+        return trailer
+
+
+def scan(paths, names, index_dir=DEFAULT_INDEX_DIR):
+    """(len(paths) x len(names)) float64 array of the last-dump values of names"""
+    out = np.full((len(paths), len(names)), np.nan)
+    for i, path in enumerate(paths):
+        with LazyStats(path, index_dir) as stats:
+            for j, value in enumerate(stats.get_many(names).values()):
+                out[i, j] = value
+    return out
+
+
+def manifest_path(stats_path):
+    """manifest_<run id>.json next to stats_<run id>.txt (manifest.json for stats.txt)"""
+    directory, name = os.path.split(stats_path)
+    stem = name[:-len(".txt")] if name.endswith(".txt") else name
+    if stem.startswith("stats"):
+        stem = "manifest" + stem[len("stats"):]
+    return os.path.join(directory, stem + ".json")
+
+
+def read_manifest(stats_path):
+    """The run manifest written next to a stats dump, or None for older dumps"""
+    path = manifest_path(stats_path)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def run_geometry(path, trailer=None):
+    """
+    Cache geometry of a run for energy.py: from the manifest's cache table,
+    or for older dumps from the trailer sizes with the default spec's
+    associativities.
+    """
+    manifest = read_manifest(path)
+    if manifest is not None:
+        return cache_geometry(manifest['system']['caches'])
+    if trailer is None:
+        with LazyStats(path, index_dir=None) as lazy:
+            trailer = lazy.trailer()
+    geometry = {}
+    for key, name in (('l1i', 'L1 Cache Size'), ('l1d', 'L1 Cache Size'), ('l2', 'L2 Cache Size')):
+        if trailer.get(name):
+            geometry[key] = (parse_size(trailer[name]), DEFAULT_SPEC[f"{key}_assoc"])
+    return geometry
+
+
+def run_summary(path):
+    """
+    Returns the headline metrics of one run: simulated time, instructions,
+    system IPC, average power, energy and the energy-delay product.
+    Per-instruction time and energy let runs of different lengths be compared.
+    Power and energy come from the run manifest if there is one and are
+    accounted from the dumps of older files (see energy.py).  For
+    --stats-period runs, whose dumps each cover one interval, time and
+    instructions are summed over the intervals of the time series.
+    """
+    stats = {}
+    with LazyStats(path, index_dir=None) as lazy:
+        for name in ('simSeconds', 'simInsts', 'simTicks', 'system.cpu_clk_domain.clock'):
+            stats[name] = lazy.get(name, None)
+            if stats[name] is None:
+                raise KeyError(name)
+    manifest = read_manifest(path)
+    series_path = find_timeseries(path, manifest)
+    if manifest is not None and manifest.get('stats_period') and series_path:
+        series = TimeSeries(series_path)
+        for name in ('simSeconds', 'simInsts', 'simTicks'):
+            stats[name] = series.total(name)
+    seconds = stats['simSeconds']
+    insts = stats['simInsts']
+    cycles = stats['simTicks'] / stats['system.cpu_clk_domain.clock']
+    summary = {
+        'sim_seconds': seconds,
+        'sim_ticks': stats['simTicks'],
+        'sim_insts': insts,
+        'ipc': insts / cycles if cycles else float('nan'),
+    }
+    if manifest is not None and 'energy' in manifest['power']:
+        power = manifest['power']
+    else:
+        # older dumps only carry the C = 1 F trailer estimate: redo the accounting
+        power = account(read_dumps(path), geometry=run_geometry(path))
+    for key in ('cpu_power', 'memory_power', 'total_power', 'energy', 'edp'):
+        summary[key] = float(power[key])
+    for key in ('core_energy_per_inst', 'static_energy', 'peak_temperature'):
+        value = power.get(key)
+        summary[key] = float('nan') if value is None else float(value)
+    summary['seconds_per_inst'] = seconds / insts if insts else float('nan')
+    summary['energy_per_inst'] = summary['energy'] / insts if insts else float('nan')
+    return summary
+
+
+# Per-core stats are system.cpu.<stat> on single-core systems and
+# system.cpuN.<stat> on multi-core ones (system.switch_cpusN.<stat> for the
+# CPUs switched in after a fast-forward).
+CORE_NAME = re.compile(r"^system\.(cpu|switch_cpus)(\d*)\.(.+)$")
+
+# metric -> stat suffixes to try, newest gem5 naming first
+CORE_METRICS = {
+    'cycles': ('numCycles',),
+    'insts': ('commitStats0.numInsts', 'committedInsts'),
+    'busy_cycles': ('exec_context.thread_0.numBusyCycles', 'numBusyCycles'),
+    'idle_cycles': ('exec_context.thread_0.numIdleCycles', 'idleCycles'),
+    'icache_misses': ('icache.overallMisses::total',),
+    'dcache_misses': ('dcache.overallMisses::total',),
+}
+# The L1s stay on system.cpuN when switched-in cores run
+CACHE_METRICS = ('icache_misses', 'dcache_misses')
+
+
+def core_vectors(stats):
+    """
+    {metric: float64 array indexed by core} for every CORE_METRICS metric
+    plus the derived per-core ipc, from a {stat name: value} dict.
+    """
+    groups = {}
+    for name, value in stats.items():
+        match = CORE_NAME.match(name)
+        if match:
+            group, core, suffix = match.groups()
+            groups.setdefault(group, {}).setdefault(int(core or 0), {})[suffix] = value
+    switched = groups.get('switch_cpus', {})
+    measured = switched if any(c.get('numCycles', 0) > 0 for c in switched.values()) \
+        else groups.get('cpu', {})
+    count = max(measured) + 1 if measured else 0
+
+    vectors = {}
+    for metric, suffixes in CORE_METRICS.items():
+        vector = np.full(count, np.nan)
+        cores = groups.get('cpu', {}) if metric in CACHE_METRICS else measured
+        for core, values in cores.items():
+            if core >= count:
+                continue
+            for suffix in suffixes:
+                if suffix in values:
+                    vector[core] = values[suffix]
+                    break
+        vectors[metric] = vector
+    with np.errstate(divide="ignore", invalid="ignore"):
+        vectors['ipc'] = np.where(vectors['cycles'] > 0, vectors['insts'] / vectors['cycles'], np.nan)
+    return vectors
+
+
+def aggregate(vector, active=None):
+    """
+    total of a per-core vector, and the mean, min, max and imbalance
+    (max / mean) of its active cores (a boolean mask, default all).  The
+    imbalance needs two active cores; idle cores would only hide the spread.
+    """
+    total = float(np.nansum(vector)) if np.any(~np.isnan(vector)) else float('nan')
+    values = vector if active is None else vector[active]
+    values = values[~np.isnan(values)]
+    if not len(values):
+        return dict(dict.fromkeys(('mean', 'min', 'max', 'imbalance'), float('nan')), total=total)
+    mean = float(values.mean())
+    peak = float(values.max())
+    return {
+        'total': total,
+        'mean': mean,
+        'min': float(values.min()),
+        'max': peak,
+        'imbalance': peak / mean if mean and len(values) > 1 else float('nan'),
+    }
+
+
+def core_summary(stats):
+    """
+    Per-core breakdown of a multi-core run: every metric's per-core values
+    and aggregates, the number of cores that committed instructions and the
+    parallel efficiency (committed instructions / (cores x busiest core)),
+    which is 1/num_cores when a single core does all the work.
+    """
+    vectors = core_vectors(stats)
+    insts = vectors['insts']
+    active = (vectors['cycles'] > 0) & (insts > 0)
+    summary = {
+        'num_cores': len(insts),
+        'active_cores': int(active.sum()),
+        'parallel_efficiency': (float(np.nansum(insts) / (len(insts) * np.nanmax(insts)))
+                                if len(insts) and np.nanmax(insts) > 0 else float('nan')),
+    }
+    for metric, vector in vectors.items():
+        summary[metric] = dict(aggregate(vector, active), per_core=vector.tolist())
+    return summary
+
+
+def core_matrix(table, metric):
+    """
+    (runs x cores) array of a CORE_METRICS metric (or 'ipc') over a
+    StatsTable.  Like core_vectors, runs whose switched-in cores ran report
+    those rather than the fast-forward CPUs.
+    """
+    if metric == 'ipc':
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cycles = core_matrix(table, 'cycles')
+            return np.where(cycles > 0, core_matrix(table, 'insts') / cycles, np.nan)
+    prefixes = {}
+    for name in table.names:
+        match = CORE_NAME.match(name)
+        if match:
+            group, core = match.group(1), int(match.group(2) or 0)
+            prefixes.setdefault(group, {}).setdefault(core, set()).add(f"system.{group}{match.group(2)}.")
+    count = max((max(cores) + 1 for cores in prefixes.values()), default=0)
+
+    def group_matrix(group, suffixes):
+        matrix = np.full((len(table), count), np.nan)
+        for core, names in prefixes.get(group, {}).items():
+            for prefix in sorted(names):
+                for suffix in suffixes:
+                    missing = np.isnan(matrix[:, core])
+                    matrix[missing, core] = table.column(prefix + suffix)[missing]
+        return matrix
+
+    matrix = group_matrix('cpu', CORE_METRICS[metric])
+    if 'switch_cpus' in prefixes and metric not in CACHE_METRICS:
+        switched = (np.nan_to_num(group_matrix('switch_cpus', ('numCycles',))) > 0).any(axis=1)
+        matrix[switched] = group_matrix('switch_cpus', CORE_METRICS[metric])[switched]
+    return matrix
+
+
+def is_complete(path, tail_bytes=8192):
+    """
+    True if the stats file at path was fully written: it must end with a
+    complete dump, or with a complete configuration trailer after one.
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        f.seek(max(0, size - tail_bytes))
+        tail = f.read().decode(errors="replace")
+    if BEGIN_MARKER not in tail and size <= tail_bytes:
+        return False
+    lines = tail.rstrip().splitlines()
+    if not lines:
+        return False
+    if TRAILER_MARKER in lines:
+        return lines[-1].startswith("Total Power Consumption")
+    return lines[-1].startswith(END_MARKER)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarise gem5 stats dumps")
+    commands = parser.add_subparsers(dest="command", required=True)
+    p_cores = commands.add_parser("cores", help="Per-core breakdown and imbalance of multi-core runs")
+    p_cores.add_argument("stats", nargs="+")
+    args = parser.parse_args(argv)
+
+    for path in args.stats:
+        stats, _ = read_stats(path)
+        summary = core_summary(stats)
+        print(f"{path}: {summary['active_cores']} of {summary['num_cores']} cores active, "
+              f"parallel efficiency {summary['parallel_efficiency']:.3f}")
+        print(f"  {'metric':<14} {'total':>12} {'mean':>12} {'min':>12} {'max':>12} {'max/mean':>9}  per core")
+        for metric in list(CORE_METRICS) + ['ipc']:
+            agg = summary[metric]
+            per_core = " ".join(f"{v:.4g}" for v in agg['per_core'])
+            print(f"  {metric:<14} {agg['total']:>12.6g} {agg['mean']:>12.6g} {agg['min']:>12.6g} "
+                  f"{agg['max']:>12.6g} {agg['imbalance']:>9.3f}  {per_core}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
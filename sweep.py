@@ -0,0 +1,358 @@
+# Parallel design-space sweep driver.
+#
+# Runs every spec of a grid in its own gem5 subprocess (system_builder.py with
+# --spec) on a process pool sized to the host's cores, so an 8-config sweep
+# takes roughly the wall time of its slowest config instead of the sum:
+#
+#   python3 sweep.py --gem5 build/RISCV/gem5.opt --configs config_A,config_B \
+#       -- --cmd tests/test-progs/hello/bin/riscv/linux/hello
+#
+# Everything after "--" is passed to every gem5 run unchanged.  Points whose
+# results are already in the result cache (result_cache.py) are not re-run
+# unless --no-cache is given.
+#
+# With --prefix-checkpoint N the shared workload prefix (program load plus N
+# instructions) is simulated once per (num_cpu, mem_size) group on a minimal
+# system and checkpointed; every point of the group then restores from it.
+#
+# Progress is kept in <outdir>/journal.jsonl (sweep_journal.py).  Re-running
+# the same command after a crash or kill resumes the sweep: completed points
+# with intact stats are reused and only the rest are simulated again.
+
+import argparse
+import glob
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+from result_cache import (DEFAULT_CACHE_DIR, DEFAULT_MAX_SIZE, ResultCache,
+                          file_sha256, key_args, result_key, workload_executables)
+from specs import CONFIGS, load_spec, load_specs, parse_size
+from stats_parser import is_complete, manifest_path
+import sweep_journal
+
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SCRIPT = os.path.join(SCRIPT_DIR, "system_builder.py")
+
+# gem5 options that shape the workload prefix (the process and the minimal
+# system it runs on); the others only affect the measured run, so they are
+# left out of the prefix checkpoint key
+PREFIX_OPTIONS = ('--cmd', '-c', '--options', '-o', '--input', '-i', '--output', '--errout',
+                  '--env', '--bench', '-b', '--spec-input', '--smt', '--cacheline_size',
+                  '--sys-clock', '--sys-voltage')
+PREFIX_FLAGS = ('--smt',)
+
+
+# 1. Single sweep point
+def build_command(gem5, script, spec, outdir, sim_args):
+    """Returns the gem5 command line that simulates one spec into outdir"""
+    return [gem5, "-d", outdir, script, "--spec", json.dumps(spec)] + list(sim_args)
+
+
+def find_stats(outdir):
+    """Returns the newest stats dump in outdir, or None"""
+    dumps = sorted(glob.glob(os.path.join(outdir, "stats_*.txt")))
+    if dumps:
+        return dumps[-1]
+    stats = os.path.join(outdir, "stats.txt")
+    return stats if os.path.exists(stats) else None
+
+
+def run_point(point):
+    """
+    Runs one gem5 subprocess; point is (spec, gem5, script, outdir, sim_args)
+    optionally followed by a journal path to record the start of the run in.
+    """
+    spec, gem5, script, outdir, sim_args = point[:5]
+    os.makedirs(outdir, exist_ok=True)
+    cmd = build_command(gem5, script, spec, outdir, sim_args)
+    if len(point) > 5 and point[5]:
+        sweep_journal.record(point[5], spec['name'], 'running', outdir=outdir, pid=os.getpid())
+
+    start = time.time()
+    with open(os.path.join(outdir, "gem5.log"), "w") as log:
+        returncode = subprocess.call(cmd, stdout=log, stderr=subprocess.STDOUT)
+    elapsed = time.time() - start
+
+    return {
+        'name': spec['name'],
+        'spec': spec,
+        'returncode': returncode,
+        'outdir': outdir,
+        'stats': find_stats(outdir),
+        'host_seconds': elapsed,
+        'cached': False,
+    }
+
+
+def cached_point(spec, outdir, entry):
+    """Materialises a cached result in outdir as if the point had run"""
+    os.makedirs(outdir, exist_ok=True)
+    stats = os.path.join(outdir, os.path.basename(entry.get('stats_name', 'stats.txt')))
+    shutil.copyfile(entry['stats'], stats)
+    if 'manifest' in entry:
+        shutil.copyfile(entry['manifest'], manifest_path(stats))
+        if 'timeseries' in entry:
+            with open(entry['manifest'], "r") as f:
+                series = json.load(f)['timeseries']
+            shutil.copyfile(entry['timeseries'], os.path.join(outdir, series))
+    return {
+        'name': spec['name'],
+        'spec': spec,
+        'returncode': 0,
+        'outdir': outdir,
+        'stats': stats,
+        'host_seconds': 0.0,
+        'cached': True,
+    }
+
+
+def run_points(points, jobs=None):
+    """Runs points on a pool of jobs workers (default: host cores), yielding results"""
+    jobs = jobs or os.cpu_count() or 1
+    jobs = max(1, min(jobs, len(points)))
+    with multiprocessing.Pool(processes=jobs) as pool:
+        for result in pool.imap_unordered(run_point, points):
+            status = "ok" if result['returncode'] == 0 else f"failed ({result['returncode']})"
+            print(f"  {result['name']}: {status} in {result['host_seconds']:.1f}s")
+            yield result
+
+
+# 2. Shared prefix checkpoints
+def prefix_group(spec):
+    """Specs with the same group can restore each other's prefix checkpoint"""
+    return (spec['num_cpu'], parse_size(spec['mem_size']))
+
+
+def select_args(sim_args, options, flags=()):
+    """The arguments of sim_args (with their values) whose option is in options"""
+    kept = []
+    i = 0
+    while i < len(sim_args):
+        arg = sim_args[i]
+        name = arg.split("=", 1)[0]
+        if name in options:
+            kept.append(arg)
+            if "=" not in arg and name not in flags and i + 1 < len(sim_args):
+                kept.append(sim_args[i + 1])
+                i += 1
+        i += 1
+    return kept
+
+
+def prefix_args(sim_args):
+    """The arguments of sim_args (with their values) that shape the prefix"""
+    return select_args(sim_args, PREFIX_OPTIONS, PREFIX_FLAGS)
+
+
+def prefix_key(spec, sim_args, gem5, script, prefix_insts):
+    parts = {
+        'group': prefix_group(spec),
+        'prefix_insts': prefix_insts,
+        'workload': [file_sha256(exe) for exe in workload_executables(sim_args)],
+        'args': key_args(prefix_args(sim_args)),
+        'gem5': file_sha256(gem5),
+        'script': file_sha256(script),
+    }
+    text = json.dumps(parts, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+
+def prefix_checkpoint_dirs(specs, gem5, sim_args, ckpt_root, prefix_insts,
+                           script=DEFAULT_SCRIPT):
+    """Returns {spec name: prefix checkpoint dir}; specs of a group share one"""
+    return {
+        spec['name']: os.path.abspath(os.path.join(
+            ckpt_root, prefix_key(spec, sim_args, gem5, script, prefix_insts)))
+        for spec in specs
+    }
+
+
+def take_prefix_checkpoints(specs, ckpt_dirs, gem5, sim_args, prefix_insts,
+                            jobs=None, script=DEFAULT_SCRIPT):
+    """
+    Takes the prefix checkpoints specs need, one per group, skipping
+    checkpoints that already exist.
+    """
+    todo = {}
+    for spec in specs:
+        ckpt_dir = ckpt_dirs[spec['name']]
+        if not os.path.exists(os.path.join(ckpt_dir, "m5.cpt")) and ckpt_dir not in todo:
+            take_args = list(sim_args) + [
+                "--take-prefix-checkpoint", ckpt_dir,
+                "--prefix-insts", str(prefix_insts),
+            ]
+            todo[ckpt_dir] = (spec, gem5, script, ckpt_dir + "-run", take_args)
+
+    if todo:
+        print(f"Prefix checkpoints: taking {len(todo)}")
+        for result in run_points(list(todo.values()), jobs):
+            if result['returncode'] != 0:
+                raise RuntimeError(f"Taking the prefix checkpoint for {result['name']} failed, "
+                                   f"see {result['outdir']}/gem5.log")
+
+
+# 3. Whole sweep
+def run_sweep(specs, gem5, sim_args, outdir="sweep_out", jobs=None,
+              script=DEFAULT_SCRIPT, cache=None, prefix_insts=None, journal=None):
+    """
+    Runs all specs in parallel and returns one result dict per spec, in the
+    order of specs.  jobs defaults to the number of host cores.  With a
+    ResultCache, cached points are served from it and new results stored.
+    With prefix_insts, points restore from shared prefix checkpoints.  With a
+    journal path, progress is journaled and points the journal records as
+    completed (with an intact stats dump) are not run again.
+    """
+    names = [spec['name'] for spec in specs]
+    if len(set(names)) != len(names):
+        raise ValueError("Spec names in a sweep must be unique")
+
+    ckpt_dirs = {}
+    if prefix_insts is not None:
+        ckpt_dirs = prefix_checkpoint_dirs(specs, gem5, sim_args,
+                                           os.path.join(outdir, "checkpoints"),
+                                           prefix_insts, script)
+
+    journaled = {}
+    if journal is not None:
+        os.makedirs(os.path.dirname(journal) or ".", exist_ok=True)
+        journaled = sweep_journal.replay(journal)
+
+    results = {}
+    keys = {}
+    point_keys = {}
+    points = []
+    for spec in specs:
+        name = spec['name']
+        point_dir = os.path.join(outdir, name)
+        point_args = list(sim_args)
+        prefix = None
+        if name in ckpt_dirs:
+            point_args += ["--restore-prefix-checkpoint", ckpt_dirs[name]]
+            # prefix checkpoint directories are named after their key
+            prefix = os.path.basename(ckpt_dirs[name])
+        if journal is not None:
+            point_keys[name] = sweep_journal.point_key(spec, sim_args, gem5, script, prefix)
+            entry = journaled.get(name)
+            if sweep_journal.is_done(entry, point_keys[name]):
+                results[name] = entry['result']
+                print(f"  {name}: completed in an earlier run")
+                continue
+            if entry is not None:
+                sweep_journal.clear_partial_output(point_dir)
+        if cache is not None:
+            keys[name] = result_key(spec, sim_args, gem5, script, prefix)
+            entry = cache.get(keys[name])
+            if entry is not None:
+                results[name] = cached_point(spec, point_dir, entry)
+                print(f"  {name}: cached")
+                if journal is not None:
+                    sweep_journal.record(journal, name, 'completed', key=point_keys[name],
+                                         outdir=point_dir, stats=results[name]['stats'],
+                                         result=results[name])
+                continue
+        if journal is not None:
+            sweep_journal.record(journal, name, 'planned', key=point_keys[name], outdir=point_dir)
+        points.append((spec, gem5, script, point_dir, point_args, journal))
+
+    if points:
+        if ckpt_dirs:
+            take_prefix_checkpoints([p[0] for p in points], ckpt_dirs, gem5, sim_args,
+                                    prefix_insts, jobs, script)
+        print(f"Sweep: {len(points)} points to run, {len(results)} cached or completed")
+        for result in run_points(points, jobs):
+            results[result['name']] = result
+            complete = (result['returncode'] == 0 and result['stats'] is not None
+                        and is_complete(result['stats']))
+            if journal is not None:
+                sweep_journal.record(journal, result['name'],
+                                     'completed' if complete else 'failed',
+                                     key=point_keys[result['name']], outdir=result['outdir'],
+                                     stats=result['stats'], result=result)
+            if cache is not None and complete:
+                cache.put(keys[result['name']], result['stats'], {
+                    'name': result['name'],
+                    'spec': result['spec'],
+                    'stats_name': os.path.basename(result['stats']),
+                    'host_seconds': result['host_seconds'],
+                }, manifest_path(result['stats']))
+        if cache is not None:
+            cache.evict()
+    return [results[name] for name in names]
+
+
+def write_summary(results, path):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Sweep summary saved as {path}")
+
+
+# 4. Command line entry point
+def parse_args(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    sim_args = []
+    if "--" in argv:
+        split = argv.index("--")
+        argv, sim_args = argv[:split], argv[split + 1:]
+
+    parser = argparse.ArgumentParser(description="Run a design-space sweep in parallel gem5 processes")
+    parser.add_argument("--gem5", required=True, help="Path to the gem5 binary")
+    parser.add_argument("--script", default=DEFAULT_SCRIPT, help="gem5 config script that accepts --spec")
+    parser.add_argument("--configs", default=None,
+                        help="Comma-separated names from specs.CONFIGS (default: all)")
+    parser.add_argument("--grid", default=None,
+                        help="JSON file with a list of specs or a {'base': ..., 'grid': {...}} description")
+    parser.add_argument("--spec", action="append", default=[],
+                        help="Additional spec (name, JSON file or inline JSON); may be repeated")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="Number of parallel gem5 processes (default: host cores)")
+    parser.add_argument("--outdir", default="sweep_out", help="Directory for per-point output")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Result cache directory")
+    parser.add_argument("--cache-size", default=DEFAULT_MAX_SIZE, help="Result cache size cap, e.g. 2GB")
+    parser.add_argument("--no-cache", action="store_true", help="Always simulate, bypassing the result cache")
+    parser.add_argument("--fresh", action="store_true",
+                        help="Discard the journal of an earlier run of this sweep instead of resuming it")
+    parser.add_argument("--prefix-checkpoint", type=int, default=None, metavar="N",
+                        help="Checkpoint the workload prefix plus N instructions once per "
+                             "(num_cpu, mem_size) group and restore every point from it")
+    args = parser.parse_args(argv)
+    return args, sim_args
+
+
+def collect_specs(args):
+    specs = []
+    if args.grid:
+        specs.extend(load_specs(args.grid))
+    specs.extend(load_spec(text) for text in args.spec)
+    if args.configs:
+        specs.extend(dict(CONFIGS[name]) for name in args.configs.split(","))
+    if not specs:
+        specs = [dict(spec) for spec in CONFIGS.values()]
+    return specs
+
+
+def main(argv=None):
+    args, sim_args = parse_args(argv)
+    specs = collect_specs(args)
+    cache = None if args.no_cache else ResultCache(args.cache_dir, args.cache_size)
+    journal = os.path.join(args.outdir, "journal.jsonl")
+    if args.fresh and os.path.exists(journal):
+        os.remove(journal)
+    results = run_sweep(specs, args.gem5, sim_args, args.outdir, args.jobs, args.script,
+                        cache, args.prefix_checkpoint, journal)
+    write_summary(results, os.path.join(args.outdir, "sweep.json"))
+    failed = [r['name'] for r in results if r['returncode'] != 0]
+    if failed:
+        print(f"Failed points: {', '.join(failed)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+# Crash-safe sweep journal.
+#
+# An append-only JSON-lines file recording the life of every sweep point:
+#   planned   -> the sweep intends to run it (with its output directory)
+#   running   -> a worker started gem5 for it (with the worker pid)
+#   completed -> gem5 succeeded and left a complete stats dump
+#   failed    -> gem5 failed or the stats dump was incomplete
+# Each record is a single write() of one line followed by fsync, so the
+# journal survives the sweep being killed; a torn last line is ignored when
+# the journal is read back.  A restarted sweep replays the journal and only
+# re-runs points that did not reach "completed" with an intact stats dump.
+
+import json
+import os
+import time
+
+from result_cache import result_key
+from stats_parser import is_complete
+
+
+STATES = ('planned', 'running', 'completed', 'failed')
+
+
+def point_key(spec, sim_args, gem5, script, prefix=None):
+    """
+    Identifies a point by what it simulates (the result cache key: spec,
+    arguments and the contents of the workload, gem5 and the script), so
+    changed points are re-run
+    """
+    return result_key(spec, sim_args, gem5, script, prefix)[:16]
+
+
+def record(path, name, state, **fields):
+    """Appends one record to the journal at path"""
+    if state not in STATES:
+        raise ValueError(f"Unknown journal state {state}")
+    entry = dict(fields, name=name, state=state, time=time.time())
+    line = (json.dumps(entry, separators=(',', ':')) + "\n").encode()
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, line)
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def replay(path):
+    """Returns {point name: last record} from the journal at path"""
+    last = {}
+    if not os.path.exists(path):
+        return last
+    with open(path, "r") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # torn write from a crash
+            last[entry['name']] = entry
+    return last
+
+
+def is_done(entry, key):
+    """True if a journal entry is a completed run of key whose stats are intact"""
+    return (
+        entry is not None
+        and entry['state'] == 'completed'
+        and entry.get('key') == key
+        and entry.get('stats') is not None
+        and os.path.exists(entry['stats'])
+        and is_complete(entry['stats'])
+    )
+
+
+def clear_partial_output(outdir):
+    """Removes stats dumps, manifests and time series left in outdir by an interrupted run"""
+    if not os.path.isdir(outdir):
+        return
+    for name in os.listdir(outdir):
+        if ((name.startswith("stats") and name.endswith((".txt", ".txt.tmp")))
+                or (name.startswith("manifest") and name.endswith((".json", ".json.tmp")))
+                or name.startswith("timeseries")):
+            os.remove(os.path.join(outdir, name))
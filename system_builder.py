@@ -0,0 +1,1098 @@
+# Parameterised RISC-V SE-mode system.
+#
+# A single build_system(spec) entry point replaces the per-configuration copies
+# (configA.py ... configH.py, final_optimized_values.py, phase3_10.py).  The
+# spec is a plain dict from specs.py.  Run it directly with gem5:
+#
+#   build/RISCV/gem5.opt configs/<dir>/system_builder.py --spec config_B \
+#       --cmd tests/test-progs/hello/bin/riscv/linux/hello
+#
+# where --spec is a name from specs.CONFIGS, a JSON file or an inline JSON
+# object, or call main(spec) from a wrapper script.
+#
+# Configuration variants can share the workload prefix (program load, libc
+# init and an optional fast-forward): --take-prefix-checkpoint DIR runs it once
+# on a minimal cache-less system, and --restore-prefix-checkpoint DIR starts
+# any variant with the same core count and memory size from there.
+#
+# --fast-forward N runs the first N instructions on AtomicSimpleCPUs (with the
+# caches attached, so they are warm) and then switches to TimingSimpleCPUs;
+# --warmup-insts W runs W more timing instructions before the stats are reset
+# for the measured window.
+#
+# SimPoint support (driven by simpoints.py): --simpoint-profile collects basic
+# block vectors every --simpoint-interval instructions, and
+# --take-simpoint-checkpoints <simpts,weights,interval,warmup> checkpoints the
+# start of every simulation point's warmup.
+#
+# The stats dump is saved as stats_<run id>.txt in gem5's output directory,
+# next to manifest_<run id>.json, a machine-readable description of the run
+# taken from the instantiated SimObject tree; use runs.py to give every run
+# its own output directory as well.
+#
+# --stats-period N dumps and resets the stats every N ticks (or instructions,
+# --stats-period-unit insts) of the measured window and streams the
+# intervals into timeseries_<run id>.bin (see timeseries.py).
+#
+# Energy is accounted after the simulation, over the simulated time of every
+# dump at the operating point it ran at (see energy.py); --capacitance
+# overrides the calibrated effective capacitance of a component.
+# --power-models attaches gem5 MathExprPowerModels with the same
+# coefficients to every CPU and cache (and --gem5-thermal a ThermalModel),
+# so the dumps also carry native power stats; the accounting reports them
+# next to its own, finer model (see attach_power_models).
+#
+# --dvfs-governor POLICY (with --stats-period) runs a closed-loop DVFS
+# governor from governor.py: after every interval it picks the CPU domain's
+# next operating point, applied through the DVFSHandler, and the manifest
+# records the trace and the energy saved against the initial point.  Builds
+# that cannot actuate the handler from Python stop unless --dvfs-shadow
+# asks for the predicted, unactuated run.
+
+import argparse
+import json
+import math
+import platform
+import sys
+import os
+import time
+from statistics import NormalDist, mean, stdev
+import m5
+from m5.defines import buildEnv
+from m5.objects import *
+from m5.util import addToPath, fatal, warn
+from gem5.isas import ISA
+from gem5.runtime import get_runtime_isa
+
+# 1. Add to path for necessary imports
+addToPath("../../")
+from ruby import Ruby
+from common import Options
+from common import Simulation
+from common.cpu2000 import *
+
+from energy import (CACHE_TYPES, CAPACITANCE, CYCLE_ENERGY, DIBL_COEFF, LEAKAGE, LOAD_ENERGY,
+                    MISS_WEIGHT, OP_ENERGY, STORE_ENERGY, T_REF, TEMP_COEFF, THERMAL, account, cache_geometry, cache_scale, parse_capacitance, read_dumps)
+from governor import (GOVERNORS, Controller, default_points, load_governor, nearest_level,
+                      parse_params, parse_points, print_summary)
+from specs import (CONFIGS, format_frequency, format_size, load_spec,
+                   parse_frequency, parse_voltage)
+from runs import new_run_id
+from timeseries import StatsFollower, TimeSeriesWriter, dump_values
+
+
+# 2. Define basic L1 and L2 cache classes
+class L1ICache(Cache):
+    def __init__(self, size='8kB', assoc=2, tag_latency=2, data_latency=2,
+                 response_latency=2, mshrs=4, tgts_per_mshr=20):
+        super(L1ICache, self).__init__()
+        self.size = size
+        self.assoc = assoc
+        self.tag_latency = tag_latency
+        self.data_latency = data_latency
+        self.response_latency = response_latency
+        self.mshrs = mshrs
+        self.tgts_per_mshr = tgts_per_mshr
+
+class L1DCache(Cache):
+    def __init__(self, size='8kB', assoc=2, tag_latency=2, data_latency=2,
+                 response_latency=2, mshrs=4, tgts_per_mshr=20):
+        super(L1DCache, self).__init__()
+        self.size = size
+        self.assoc = assoc
+        self.tag_latency = tag_latency
+        self.data_latency = data_latency
+        self.response_latency = response_latency
+        self.mshrs = mshrs
+        self.tgts_per_mshr = tgts_per_mshr
+
+class L2Cache(Cache):
+    def __init__(self, size='256kB', assoc=8, tag_latency=10, data_latency=10,
+                 response_latency=10, mshrs=20, tgts_per_mshr=12):
+        super(L2Cache, self).__init__()
+        self.size = size
+        self.assoc = assoc
+        self.tag_latency = tag_latency
+        self.data_latency = data_latency
+        self.response_latency = response_latency
+        self.mshrs = mshrs
+        self.tgts_per_mshr = tgts_per_mshr
+
+
+def l1_params(spec):
+    """Latency and MSHR parameters shared by both L1 caches"""
+    return dict(
+        tag_latency=spec['l1_tag_latency'],
+        data_latency=spec['l1_data_latency'],
+        response_latency=spec['l1_response_latency'],
+        mshrs=spec['l1_mshrs'],
+        tgts_per_mshr=spec['l1_tgts_per_mshr'],
+    )
+
+
+def l2_params(spec):
+    """Size, latency and MSHR parameters of the shared L2"""
+    return dict(
+        size=spec['l2_size'],
+        assoc=spec['l2_assoc'],
+        tag_latency=spec['l2_tag_latency'],
+        data_latency=spec['l2_data_latency'],
+        response_latency=spec['l2_response_latency'],
+        mshrs=spec['l2_mshrs'],
+        tgts_per_mshr=spec['l2_tgts_per_mshr'],
+    )
+
+
+# 3. Dynamic Voltage and Frequency Scaling (DVFS) setup
+class DVFS:
+    def __init__(self, system):
+        self.system = system
+        self.current_voltage = 0.0  # Initialize current_voltage with a default value
+        self.current_frequency = 0.0  # Initialize current_frequency with a default value
+
+    def scale(self, voltage, frequency):
+        # Scale the frequency and voltage.  Parameters only take effect if this
+        # is called before m5.instantiate().
+        self.system.cpu_clk_domain.clock = frequency
+        self.system.cpu_voltage_domain.voltage = str(voltage)  # Convert voltage to string
+
+        # Update current voltage and frequency
+        self.current_voltage = parse_voltage(voltage)  # Store the current voltage as a float
+        self.current_frequency = parse_frequency(frequency)  # Store the current frequency in Hz
+
+        print(f"Debug: Scaling to Frequency = {self.current_frequency} Hz, Voltage = {self.current_voltage} V")
+
+
+def configure_dvfs(system, points, level, transition_latency):
+    """
+    Gives the CPU clock and voltage domains one DVFS performance level per
+    (volts, Hz) point, starting at points[level], and hands the clock domain
+    to the system's DVFSHandler.  gem5 orders the levels fastest first.
+    """
+    ordered = points[::-1]
+    system.cpu_clk_domain.clock = [format_frequency(hz) for _, hz in ordered]
+    system.cpu_voltage_domain.voltage = [f"{volts}V" for volts, _ in ordered]
+    system.cpu_clk_domain.domain_id = 0
+    system.cpu_clk_domain.init_perf_level = len(points) - 1 - level
+    system.dvfs_handler = DVFSHandler(domains=[system.cpu_clk_domain], enable=True,
+                                      transition_latency=transition_latency)
+
+
+def dvfs_actuator(system, points):
+    """
+    actuate(level) moving the CPU domain to points[level] through the
+    DVFSHandler, or None if this gem5 build does not export perfLevel() to
+    Python (stock gem5 does not, see governor.py)
+    """
+    handler = system.dvfs_handler.getCCObject()
+    if not hasattr(handler, 'perfLevel'):
+        return None
+
+    def actuate(level):
+        handler.perfLevel(0, len(points) - 1 - level)
+
+    return actuate
+
+
+# 4. Process management for workload
+def get_processes(args):
+    """Interprets provided args and returns a list of processes"""
+    multiprocesses = []
+    inputs = []
+    outputs = []
+    errouts = []
+    pargs = []
+    workloads = args.cmd.split(";")
+    if args.input != "":
+        inputs = args.input.split(";")
+    if args.output != "":
+        outputs = args.output.split(";")
+    if args.errout != "":
+        errouts = args.errout.split(";")
+    if args.options != "":
+        pargs = args.options.split(";")
+    idx = 0
+    for wrkld in workloads:
+        process = Process(pid=100 + idx)
+        process.executable = wrkld
+        process.cwd = os.getcwd()
+        process.gid = os.getgid()
+        if args.env:
+            with open(args.env, "r") as f:
+                process.env = [line.rstrip() for line in f]
+        if len(pargs) > idx:
+            process.cmd = [wrkld] + pargs[idx].split()
+        else:
+            process.cmd = [wrkld]
+        if len(inputs) > idx:
+            process.input = inputs[idx]
+        if len(outputs) > idx:
+            process.output = outputs[idx]
+        if len(errouts) > idx:
+            process.errout = errouts[idx]
+        multiprocesses.append(process)
+        idx += 1
+    if args.smt:
+        assert args.cpu_type == "DerivO3CPU"
+        return multiprocesses, idx
+    else:
+        return multiprocesses, 1
+
+
+def get_workload(args, num_cpu):
+    """Builds the processes for --bench or --cmd, exiting if neither is given"""
+    multiprocesses = []
+    numThreads = 1
+
+    if args.bench:
+        apps = args.bench.split("-")
+        if len(apps) != num_cpu:
+            print("number of benchmarks not equal to set num_cpus!")
+            sys.exit(1)
+        for app in apps:
+            try:
+                if get_runtime_isa() == ISA.RISCV:
+                    workload = eval(f"{app}('riscv', 'linux', '{args.spec_input}')")
+                else:
+                    workload = eval(f"{app}(buildEnv['TARGET_ISA'], 'linux', '{args.spec_input}')")
+                multiprocesses.append(workload.makeProcess())
+            except:
+                print(f"Unable to find workload for {get_runtime_isa().name()}: {app}", file=sys.stderr)
+                sys.exit(1)
+    elif args.cmd:
+        multiprocesses, numThreads = get_processes(args)
+    else:
+        print("No workload specified. Exiting!\n", file=sys.stderr)
+        sys.exit(1)
+
+    return multiprocesses, numThreads
+
+
+# 5. System construction
+def build_system(spec, args, multiprocesses, numThreads=1, cpu_type='timing',
+                 caches=True):
+    """
+    Builds the SE-mode system described by spec: TimingSimpleCPUs with private
+    L1I/L1D caches, a shared L2 behind an L2 bus and SimpleMemory.
+    cpu_type='atomic' builds AtomicSimpleCPUs (for fast-forwarding) and
+    caches=False wires the CPUs straight to the memory bus.
+    """
+    num_cpu = spec['num_cpu']
+
+    system = System(
+        mem_mode=cpu_type,
+        mem_ranges=[AddrRange(spec['mem_size'])],
+        cache_line_size=args.cacheline_size
+    )
+
+    if numThreads > 1:
+        system.multi_thread = True
+
+    # Voltage and Clock Domain Configuration
+    system.voltage_domain = VoltageDomain(voltage=args.sys_voltage)
+    system.clk_domain = SrcClockDomain(
+        clock=args.sys_clock, voltage_domain=system.voltage_domain
+    )
+    system.cpu_voltage_domain = VoltageDomain(voltage=spec['voltage'])
+    system.cpu_clk_domain = SrcClockDomain(
+        clock=spec['frequency'], voltage_domain=system.cpu_voltage_domain
+    )
+
+    # Memory and Bus Configuration
+    system.membus = SystemXBar()
+
+    # CPU Configuration
+    CPUClass = RiscvAtomicSimpleCPU if cpu_type == 'atomic' else RiscvTimingSimpleCPU
+    system.cpu = [CPUClass(cpu_id=i) for i in range(num_cpu)]
+    for cpu in system.cpu:
+        cpu.clk_domain = system.cpu_clk_domain
+        cpu.createInterruptController()
+
+    if caches:
+        connect_caches(system, spec)
+    else:
+        for cpu in system.cpu:
+            cpu.icache_port = system.membus.cpu_side_ports
+            cpu.dcache_port = system.membus.cpu_side_ports
+
+    system.system_port = system.membus.cpu_side_ports
+
+    # Detailed Memory Configuration
+    system.mem_ctrl = SimpleMemory(range=system.mem_ranges[0])
+    system.mem_ctrl.port = system.membus.mem_side_ports
+
+    # Workload Setup
+    system.workload = SEWorkload.init_compatible(multiprocesses[0].executable)
+
+    for i, cpu in enumerate(system.cpu):
+        if args.smt:
+            cpu.workload = multiprocesses
+        elif i < len(multiprocesses):
+            cpu.workload = multiprocesses[i]
+        else:
+            # If there aren't enough workload processes, assign the first one
+            cpu.workload = multiprocesses[0]
+        cpu.createThreads()
+
+    return system
+
+
+def connect_caches(system, spec):
+    """Adds the private L1 caches, the L2 bus and the shared L2"""
+    # Cache Configuration
+    for cpu in system.cpu:
+        cpu.icache = L1ICache(size=spec['l1i_size'], assoc=spec['l1i_assoc'], **l1_params(spec))
+        cpu.dcache = L1DCache(size=spec['l1d_size'], assoc=spec['l1d_assoc'], **l1_params(spec))
+        cpu.icache_port = cpu.icache.cpu_side
+        cpu.dcache_port = cpu.dcache.cpu_side
+
+    # L2 Cache and Memory Bus Setup
+    system.l2cache = L2Cache(**l2_params(spec))
+    system.l2bus = SystemXBar()
+
+    for cpu in system.cpu:
+        cpu.icache.mem_side = system.l2bus.cpu_side_ports
+        cpu.dcache.mem_side = system.l2bus.cpu_side_ports
+
+    system.l2cache.cpu_side = system.l2bus.mem_side_ports
+    system.l2cache.mem_side = system.membus.cpu_side_ports
+
+
+# 6. Energy: gem5 power and thermal models, and the accounting run once the
+# simulation has finished (see energy.py)
+def fixed(x):
+    """Decimal literal for MathExpr, which does not parse exponents"""
+    return f"{x:.15f}"
+
+
+def leakage_expr(watts):
+    """
+    MathExpr of static power watts at T_REF and 1.0 V with the DIBL and
+    temperature terms of energy.py, as powers since MathExpr has no exp
+    """
+    return (f"voltage * {fixed(watts)} * ({fixed(math.exp(DIBL_COEFF))} ^ (voltage - 1))"
+            f" * ({fixed(math.exp(TEMP_COEFF))} ^ (temp - {fixed(T_REF)}))")
+
+
+def power_model(dyn, st, subsystem=None, ambient=None):
+    """PowerModel with dyn/st in the ON state, static only when clock gated"""
+    states = [MathExprPowerModel(dyn=dyn, st=st), MathExprPowerModel(dyn="0", st=st),
+              MathExprPowerModel(dyn="0", st=f"0.5 * ({st})"), MathExprPowerModel(dyn="0", st="0")]
+    model = PowerModel(pm=states)
+    if subsystem is not None:
+        model.subsystem = subsystem
+    if ambient is not None:
+        model.ambient_temp = f"{ambient}C"
+    return model
+
+
+def attach_power_models(system, args):
+    """
+    Gives every CPU and cache a MathExprPowerModel power model with the
+    coefficients of energy.py, so each dump carries native dynamicPower and
+    staticPower stats evaluated at the voltage of its interval.  With
+    --gem5-thermal the models feed a ThermalModel (one die node, a
+    resistor and a capacitor to the ambient) that provides their temp.
+    Needs the objects under Root, so that path() names them.
+
+    MathExpr only reads scalar and formula stats, so the models are coarser
+    than energy.account, which reports them alongside rather than instead:
+    every committed instruction costs an IntAlu op (committedInstType is a
+    vector), idle cycles cost as much as busy ones, cache writebacks (a
+    vector) are not charged and leakage is not capped at T_MAX.
+    """
+    thermal = dict(THERMAL)
+    if args.ambient_temperature is not None:
+        thermal['ambient'] = args.ambient_temperature
+    subsystem = None
+    if args.gem5_thermal:
+        system.thermal_domain = ThermalDomain(initial_temperature=f"{thermal['ambient']}C")
+        system.power_subsystem = SubSystem(thermal_domain=system.thermal_domain)
+        system.thermal_model = ThermalModel(step=args.thermal_step)
+        system.thermal_die = ThermalNode()
+        system.thermal_ambient = ThermalNode()
+        system.thermal_reference = ThermalReference(temperature=f"{thermal['ambient']}C")
+        system.thermal_resistor = ThermalResistor(resistance=thermal['resistance'])
+        system.thermal_capacitor = ThermalCapacitor(capacitance=thermal['capacitance'])
+        system.thermal_model.addReference(system.thermal_reference, system.thermal_ambient)
+        system.thermal_model.addResistor(system.thermal_resistor, system.thermal_die, system.thermal_ambient)
+        system.thermal_model.addCapacitor(system.thermal_capacitor, system.thermal_die, system.thermal_ambient)
+        system.thermal_model.addDomain(system.thermal_domain, system.thermal_die)
+        subsystem = system.power_subsystem
+    ambient = None if subsystem is not None else thermal['ambient']
+
+    for cpu in system.descendants():
+        if not isinstance(cpu, BaseCPU):
+            continue
+        path = cpu.path()
+        dyn = (f"voltage * voltage * ({fixed(CYCLE_ENERGY)} * {path}.numCycles"
+               f" + {fixed(OP_ENERGY['IntAlu'])} * {path}.commitStats0.numInsts"
+               f" + {fixed(LOAD_ENERGY)} * {path}.commitStats0.numLoadInsts"
+               f" + {fixed(STORE_ENERGY)} * {path}.commitStats0.numStoreInsts) / simSeconds")
+        cpu.power_state.default_state = "ON"
+        cpu.power_model = power_model(dyn, leakage_expr(LEAKAGE['core']), subsystem, ambient)
+
+    geometry = cache_geometry(cache_params(system))
+    for cache in system.descendants():
+        key = CACHE_TYPES.get(type(cache).__name__)
+        if key is None:
+            continue
+        path = cache.path()
+        hit = CAPACITANCE[key] * cache_scale(key, geometry if key in geometry else None)
+        dyn = (f"voltage * voltage * {fixed(hit)} * ({path}.overallHits"
+               f" + {fixed(MISS_WEIGHT)} * {path}.overallMisses) / simSeconds")
+        size_kib = param_json(cache.size) / 1024
+        cache.power_state.default_state = "ON"
+        cache.power_model = power_model(dyn, leakage_expr(LEAKAGE['sram_kib'] * size_kib),
+                                        subsystem, ambient)
+
+
+def account_energy(system, capacitance=None, ambient=None):
+    """
+    Integrates power over the simulated time of every dump in stats.txt,
+    each at the operating point it recorded, with the cache energies and
+    leakage scaled to the instantiated cache geometries and the leakage
+    following the die temperature.  Returns energy.account().
+    """
+    thermal = {'ambient': ambient} if ambient is not None else None
+    power = account(read_dumps(os.path.join(m5.options.outdir, "stats.txt")), capacitance,
+                    geometry=cache_geometry(cache_params(system)), thermal=thermal)
+    print(f"CPU Power Consumption: {power['cpu_power']:.4f} W")
+    print(f"Memory Power Consumption: {power['memory_power']:.4f} W")
+    print(f"Total Power Consumption: {power['total_power']:.4f} W")
+    print(f"Energy: {power['energy']:.6g} J ({power['static_energy']:.6g} J static) over "
+          f"{power['seconds']:.6g} s, EDP {power['edp']:.6g} J*s, peak {power['peak_temperature']:.2f} C")
+    return power
+
+
+# 7. Run manifest and stats.txt, saved under the run ID
+MANIFEST_FORMAT = 1
+CACHE_PARAMS = ('size', 'assoc', 'tag_latency', 'data_latency', 'response_latency',
+                'mshrs', 'tgts_per_mshr')
+
+
+def param_json(value):
+    """JSON value of an instantiated SimObject parameter"""
+    if isinstance(value, (bool, int, float, str)) or value is None:
+        return value
+    if isinstance(value, (list, tuple)):
+        return [param_json(v) for v in value]
+    if hasattr(value, "getValue"):
+        raw = value.getValue()
+        if isinstance(raw, (bool, int, float, str)):
+            return raw
+    return str(value)
+
+
+def cache_params(system):
+    """{path: {parameter: value, 'type': class name}} of every cache of system"""
+    return {
+        obj.path(): dict({k: param_json(getattr(obj, k)) for k in CACHE_PARAMS},
+                         type=type(obj).__name__)
+        for obj in system.descendants() if isinstance(obj, Cache)
+    }
+
+
+def gem5_version():
+    try:
+        import _m5.core
+        return _m5.core.gem5Version
+    except (ImportError, AttributeError):
+        return None
+
+
+def build_manifest(system, spec, args, power, run_id):
+    """
+    Machine-readable description of the run, read back from the instantiated
+    SimObject tree rather than from the spec, plus workload, host, gem5
+    version and power results.
+    """
+    # with DVFS levels, the run starts at the initial one
+    level = param_json(system.cpu_clk_domain.init_perf_level)
+    clock_ticks = param_json(system.cpu_clk_domain.clock[level])
+    cpus = list(system.cpu)
+    caches = cache_params(system)
+    mem_ranges = [{'start': int(r.start), 'size': int(r.size())} for r in system.mem_ranges]
+    first = cpus[0]
+    config = {
+        'name': spec['name'],
+        'run_id': run_id,
+        'frequency': m5.ticks.fromSeconds(1.0) / clock_ticks,
+        'voltage': param_json(system.cpu_voltage_domain.voltage[level]),
+        'num_cpu': len(cpus),
+        'l1i_size': param_json(first.icache.size) if hasattr(first, 'icache') else None,
+        'l1d_size': param_json(first.dcache.size) if hasattr(first, 'dcache') else None,
+        'l2_size': param_json(system.l2cache.size) if hasattr(system, 'l2cache') else None,
+        'mem_size': sum(r['size'] for r in mem_ranges),
+        'cpu_power': power['cpu_power'],
+        'memory_power': power['memory_power'],
+        'total_power': power['total_power'],
+        'energy': power['energy'],
+        'edp': power['edp'],
+    }
+    workload = []
+    for cpu in cpus:
+        for process in cpu.workload:
+            workload.append({'cpu': cpu.path(), 'cmd': list(process.cmd),
+                             'executable': str(process.executable)})
+    return {
+        'format': MANIFEST_FORMAT,
+        'run_id': run_id,
+        'name': spec['name'],
+        'config': config,
+        'system': {
+            'cpu_types': sorted({type(cpu).__name__ for cpu in cpus}),
+            'switch_cpu_types': sorted({type(cpu).__name__ for cpu in getattr(system, 'switch_cpus', [])}),
+            'cpu_clock_ticks': clock_ticks,
+            'cpus': [cpu.path() for cpu in cpus],
+            'caches': caches,
+            'mem_ranges': mem_ranges,
+            'cache_line_size': param_json(system.cache_line_size),
+        },
+        'workload': workload,
+        'power': power,
+        'spec': spec,
+        'simulation': {'final_tick': m5.curTick(), 'ticks_per_second': m5.ticks.fromSeconds(1.0)},
+        'gem5': {'version': gem5_version(), 'isa': get_runtime_isa().name},
+        'host': {'hostname': platform.node(), 'platform': platform.platform(),
+                 'python': platform.python_version(), 'cpus': os.cpu_count()},
+        'command': list(sys.argv),
+        'created': time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def write_atomically(path, write):
+    """Calls write(file) on a temporary file and renames it to path"""
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def save_stats(manifest):
+    """
+    Writes the run manifest to manifest_<run_id>.json and stats.txt plus the
+    configuration trailer (generated from the manifest) to
+    stats_<run_id>.txt.  Both are written under temporary names and renamed
+    into place, the manifest first, so a complete stats file always has its
+    manifest next to it.
+    """
+    m5out_dir = m5.options.outdir
+    run_id = manifest['run_id']
+    config = manifest['config']
+    stats_file_path = os.path.join(m5out_dir, "stats.txt")
+    new_stats_filename = os.path.join(m5out_dir, f"stats_{run_id}.txt")
+    manifest_filename = os.path.join(m5out_dir, f"manifest_{run_id}.json")
+
+    if not os.path.exists(stats_file_path):
+        print(f"stats.txt not found in {m5out_dir}.")
+        return None
+
+    manifest = dict(manifest, stats=os.path.basename(new_stats_filename))
+    write_atomically(manifest_filename, lambda f: json.dump(manifest, f, indent=2))
+
+    def write_stats(stats_file):
+        with open(stats_file_path, "r") as src:
+            stats_file.write(src.read())
+        stats_file.write("Configuration values\n")
+        stats_file.write(f"Configuration Name: {config['name']} \n")
+        stats_file.write(f"Run ID: {run_id}\n")
+        stats_file.write(f"Frequency: {format_frequency(config['frequency'])}\n")
+        stats_file.write(f"Voltage: {config['voltage']:g}V \n")
+        if config['l1d_size'] is not None:
+            stats_file.write(f"L1 Cache Size: {format_size(config['l1d_size'])} \n")
+        if config['l2_size'] is not None:
+            stats_file.write(f"L2 Cache Size: {format_size(config['l2_size'])}\n")
+        stats_file.write(f"Memory Size: {format_size(config['mem_size'])}\n")
+        stats_file.write(f"Number of Cores: {config['num_cpu']} \n")
+        stats_file.write(f"CPU Power Consumption: {config['cpu_power']:.8f} \n")
+        stats_file.write(f"Memory Power Consumption: {config['memory_power']:.8f} \n")
+        stats_file.write(f"Total Power Consumption: {config['total_power']:.8f} \n")
+
+    write_atomically(new_stats_filename, write_stats)
+    os.remove(stats_file_path)
+    print(f"Manifest saved as {manifest_filename}")
+    print(f"Stats file saved as {new_stats_filename}")
+    return new_stats_filename
+
+
+# 8. Prefix checkpoints
+def take_prefix_checkpoint(spec, args, multiprocesses, numThreads):
+    """
+    Runs the shared prefix (program load plus --prefix-insts instructions) on
+    the minimal system and writes a checkpoint to --take-prefix-checkpoint.
+    """
+    system = build_system(spec, args, multiprocesses, numThreads,
+                          cpu_type='atomic', caches=False)
+    if args.prefix_insts > 0:
+        for cpu in system.cpu:
+            cpu.max_insts_any_thread = args.prefix_insts
+
+    root = Root(full_system=False, system=system)
+    m5.instantiate()
+
+    if args.prefix_insts > 0:
+        exit_event = m5.simulate()
+        cause = exit_event.getCause()
+        if cause != "a thread reached the max instruction count":
+            fatal(f"Workload ended before the checkpoint was taken: {cause}")
+
+    ckpt_dir = os.path.abspath(args.take_prefix_checkpoint)
+    m5.checkpoint(ckpt_dir)
+    print(f"Prefix checkpoint saved in {ckpt_dir} @ tick {m5.curTick()}")
+    return ckpt_dir
+
+
+# 9. SimPoint profiling and checkpoints
+def profile_simpoints(spec, args, multiprocesses, numThreads):
+    """Runs the workload on an atomic CPU and writes simpoint.bb.gz to the outdir"""
+    system = build_system(spec, args, multiprocesses, numThreads,
+                          cpu_type='atomic', caches=False)
+    system.cpu[0].addSimPointProbe(args.simpoint_interval)
+
+    root = Root(full_system=False, system=system)
+    m5.instantiate()
+    exit_event = m5.simulate()
+    print(f"Exiting @ tick {m5.curTick()} because {exit_event.getCause()}")
+    print(f"Basic block vectors saved in {os.path.join(m5.options.outdir, 'simpoint.bb.gz')}")
+
+
+def read_simpoints(simpoint_file, weight_file, interval, warmup):
+    """
+    Reads SimPoint .simpts/.weights files and returns one dict per simulation
+    point with the instruction count at which its warmup starts.
+    """
+    with open(simpoint_file, "r") as f:
+        intervals = dict((int(c), int(i)) for i, c in (line.split() for line in f if line.strip()))
+    with open(weight_file, "r") as f:
+        weights = dict((int(c), float(w)) for w, c in (line.split() for line in f if line.strip()))
+
+    simpoints = []
+    for cluster, index in sorted(intervals.items(), key=lambda item: item[1]):
+        start = index * interval
+        point_warmup = min(warmup, start)
+        simpoints.append({
+            'cluster': cluster,
+            'interval_index': index,
+            'weight': weights[cluster],
+            'start_inst': start - point_warmup,
+            'warmup': point_warmup,
+            'interval': interval,
+        })
+    return simpoints
+
+
+def take_simpoint_checkpoints(spec, args, multiprocesses, numThreads):
+    """
+    Fast-forwards an atomic CPU through the workload and checkpoints the start
+    of every simulation point's warmup.  The checkpoints and a simpoints.json
+    index are written to the outdir.
+    """
+    simpoint_file, weight_file, interval, warmup = args.take_simpoint_checkpoints.split(",")
+    simpoints = read_simpoints(simpoint_file, weight_file, int(interval), int(warmup))
+
+    system = build_system(spec, args, multiprocesses, numThreads,
+                          cpu_type='atomic', caches=False)
+    system.cpu[0].simpoint_start_insts = [p['start_inst'] for p in simpoints if p['start_inst'] > 0]
+
+    root = Root(full_system=False, system=system)
+    m5.instantiate()
+
+    for point in simpoints:
+        if point['start_inst'] > 0:
+            exit_event = m5.simulate()
+            if exit_event.getCause() != "simpoint starting point found":
+                fatal(f"Workload ended before simulation point {point['cluster']}: "
+                      f"{exit_event.getCause()}")
+        point['checkpoint'] = os.path.join(
+            m5.options.outdir,
+            f"cpt.simpoint_{point['cluster']:02d}_inst_{point['start_inst']}"
+            f"_weight_{point['weight']:f}_interval_{point['interval']}_warmup_{point['warmup']}",
+        )
+        m5.checkpoint(point['checkpoint'])
+        print(f"Simulation point {point['cluster']} checkpointed @ tick {m5.curTick()}")
+
+    with open(os.path.join(m5.options.outdir, "simpoints.json"), "w") as f:
+        json.dump(simpoints, f, indent=2)
+
+
+# 10. Fast-forward, warmup and the measured window
+def add_switch_cpus(system, fast_forward=None):
+    """
+    Gives every (atomic) CPU a switched-out TimingSimpleCPU to hand over to,
+    optionally once it has executed fast_forward instructions.  Returns the
+    switch list for m5.switchCpus().
+    """
+    switch_cpus = [RiscvTimingSimpleCPU(switched_out=True, cpu_id=i)
+                   for i in range(len(system.cpu))]
+    for cpu, switch_cpu in zip(system.cpu, switch_cpus):
+        if fast_forward:
+            cpu.max_insts_any_thread = fast_forward
+        switch_cpu.system = system
+        switch_cpu.workload = cpu.workload
+        switch_cpu.clk_domain = cpu.clk_domain
+        switch_cpu.isa = cpu.isa
+        switch_cpu.createInterruptController()
+        switch_cpu.createThreads()
+    system.switch_cpus = switch_cpus
+    return [(cpu, switch_cpu) for cpu, switch_cpu in zip(system.cpu, switch_cpus)]
+
+
+def simulate_insts(cpu, insts, cause):
+    """Simulates until cpu's first thread has committed insts more instructions"""
+    cpu.scheduleInstStop(0, insts, cause)
+    exit_event = m5.simulate()
+    if exit_event.getCause() != cause:
+        print(f"Exiting @ tick {m5.curTick()} because {exit_event.getCause()}")
+        return False
+    return True
+
+
+def run_periodic(cpu, args, series, controller=None):
+    """
+    Simulates the measured window in --stats-period chunks of ticks or
+    instructions, dumping and resetting the stats after every chunk and
+    appending the dump to the time series and, with a DVFS governor, handing
+    it to the governor's controller.  Ends at --maxinsts or when the
+    workload exits.
+    """
+    period = args.stats_period
+    by_insts = args.stats_period_unit == "insts"
+    stats_path = os.path.join(m5.options.outdir, "stats.txt")
+    follower = StatsFollower(stats_path)
+    follower.offset = os.path.getsize(stats_path) if os.path.exists(stats_path) else 0
+    if args.maxinsts and not by_insts:
+        cpu.scheduleInstStop(0, args.maxinsts, "measured window complete")
+
+    remaining = args.maxinsts
+    while True:
+        if by_insts:
+            step = min(period, remaining) if remaining else period
+            cpu.scheduleInstStop(0, step, "stats period complete")
+            exit_event = m5.simulate()
+        else:
+            exit_event = m5.simulate(period)
+        cause = exit_event.getCause()
+        m5.stats.dump()
+        m5.stats.reset()
+        for lines in follower.new_dumps():
+            values = dump_values(lines)
+            series.append(values, m5.curTick())
+            if controller is not None:
+                controller.step(values, m5.curTick())
+
+        if by_insts:
+            if cause != "stats period complete":
+                break
+            if remaining:
+                remaining -= step
+                if remaining <= 0:
+                    break
+        elif cause != "simulate() limit reached":
+            break
+    print(f"Exiting @ tick {m5.curTick()} because {cause} "
+          f"after {len(series.ticks)} stats periods")
+
+
+def run_measured(system, args, switch_cpu_list=None, series=None, controller=None):
+    """
+    Runs the optional fast-forward and warmup phases and then the measured
+    window, which ends at --maxinsts or when the workload exits.  Stats only
+    cover the measured window; with a time-series writer they are dumped and
+    reset every --stats-period (and passed to the DVFS controller).  Returns
+    False if the workload exited before the measured window started.
+    """
+    cpus = system.cpu
+    if switch_cpu_list:
+        exit_event = m5.simulate()
+        if exit_event.getCause() != "a thread reached the max instruction count":
+            print(f"Workload ended during the fast-forward: {exit_event.getCause()}")
+            return False
+        print(f"Switching to timing CPUs @ tick {m5.curTick()}")
+        m5.switchCpus(system, switch_cpu_list)
+        cpus = [new_cpu for _, new_cpu in switch_cpu_list]
+
+    if args.warmup_insts:
+        print(f"Warming up for {args.warmup_insts} instructions")
+        if not simulate_insts(cpus[0], args.warmup_insts, "warmup complete"):
+            return False
+
+    m5.stats.reset()
+    if series is not None:
+        run_periodic(cpus[0], args, series, controller)
+        return True
+    if args.maxinsts:
+        simulate_insts(cpus[0], args.maxinsts, "measured window complete")
+    else:
+        exit_event = m5.simulate()
+        print(f"Exiting @ tick {m5.curTick()} because {exit_event.getCause()}")
+    m5.stats.dump()
+    return True
+
+
+# 11. SMARTS statistical sampling
+def confidence_interval(samples, z):
+    """Returns (mean, half width) of the z-score confidence interval of samples"""
+    if len(samples) < 2:
+        return (samples[0] if samples else 0.0), float('inf')
+    return mean(samples), z * stdev(samples) / len(samples) ** 0.5
+
+
+def run_smarts(system, args, switch_cpu_list, clock_period):
+    """
+    Alternates atomic fast-forward (with functional cache warming), timing
+    warmup and a measured timing window until the IPC confidence interval
+    is narrow enough or the workload ends.  Every measured window is a
+    separate stats dump; the samples and the estimate go to smarts.json.
+    """
+    fast_forward, warmup, measure = (int(n) for n in args.smarts.split(","))
+    z = NormalDist().inv_cdf(0.5 + args.smarts_confidence / 2)
+    timing_to_atomic = [(new_cpu, old_cpu) for old_cpu, new_cpu in switch_cpu_list]
+    atomic_cpu = system.cpu[0]
+    timing_cpu = switch_cpu_list[0][1]
+
+    samples = []
+    converged = False
+    while True:
+        if fast_forward and not simulate_insts(atomic_cpu, fast_forward, "fast-forward complete"):
+            break
+        m5.switchCpus(system, switch_cpu_list)
+        if warmup and not simulate_insts(timing_cpu, warmup, "warmup complete"):
+            break
+
+        m5.stats.reset()
+        start_tick = m5.curTick()
+        start_insts = timing_cpu.totalInsts()
+        finished = not simulate_insts(timing_cpu, measure, "sample complete")
+        m5.stats.dump()
+
+        cycles = (m5.curTick() - start_tick) / clock_period
+        insts = timing_cpu.totalInsts() - start_insts
+        if cycles > 0 and insts > 0:
+            samples.append(insts / cycles)
+        if finished:
+            break
+
+        ipc, half_width = confidence_interval(samples, z)
+        print(f"SMARTS: sample {len(samples)}, IPC = {ipc:.4f} +/- {half_width:.4f}")
+        if len(samples) >= args.smarts_min_samples and half_width <= args.smarts_error * ipc:
+            converged = True
+            break
+        m5.switchCpus(system, timing_to_atomic)
+
+    ipc, half_width = confidence_interval(samples, z)
+    result = {
+        'fast_forward': fast_forward,
+        'warmup': warmup,
+        'measure': measure,
+        'samples': samples,
+        'ipc': ipc,
+        'half_width': half_width,
+        'confidence': args.smarts_confidence,
+        'converged': converged,
+        'final_tick': m5.curTick(),
+    }
+    with open(os.path.join(m5.options.outdir, "smarts.json"), "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"SMARTS: IPC = {ipc:.4f} +/- {half_width:.4f} from {len(samples)} samples "
+          f"({'converged' if converged else 'not converged'})")
+    return len(samples) > 0
+
+
+# 12. Command line entry point
+def add_builder_options(parser):
+    parser.add_argument(
+        "--spec", default=None,
+        help="System spec: a name from specs.CONFIGS, a JSON file or an inline JSON object",
+    )
+    parser.add_argument(
+        "--take-prefix-checkpoint", default=None, metavar="DIR",
+        help="Run the workload prefix on a minimal system, checkpoint it into DIR and exit",
+    )
+    parser.add_argument(
+        "--prefix-insts", type=int, default=0,
+        help="Instructions to fast-forward before taking the prefix checkpoint",
+    )
+    parser.add_argument(
+        "--restore-prefix-checkpoint", default=None, metavar="DIR",
+        help="Start from a prefix checkpoint taken with the same num_cpu and mem_size",
+    )
+    parser.add_argument(
+        "--run-id", default=None,
+        help="Run ID naming the stats dump (default: generated, see runs.py)",
+    )
+    parser.add_argument(
+        "--stats-period", type=int, default=None, metavar="N",
+        help="Dump and reset the stats every N ticks (or instructions) of the measured "
+             "window and save the intervals as timeseries_<run id>.bin",
+    )
+    parser.add_argument(
+        "--stats-period-unit", choices=("ticks", "insts"), default="ticks",
+        help="Unit of --stats-period",
+    )
+    parser.add_argument(
+        "--capacitance", action="append", default=[], metavar="COMPONENT=F",
+        help="Override the effective capacitance of an energy.py component; may be repeated",
+    )
+    parser.add_argument(
+        "--ambient-temperature", type=float, default=None, metavar="C",
+        help="Ambient temperature of the energy.py thermal model",
+    )
+    parser.add_argument(
+        "--power-models", action="store_true",
+        help="Attach gem5 power models to every CPU and cache (native power stats in every dump)",
+    )
+    parser.add_argument(
+        "--gem5-thermal", action="store_true",
+        help="With --power-models, drive their temperature from a gem5 ThermalModel",
+    )
+    parser.add_argument(
+        "--thermal-step", type=float, default=1e-5, metavar="SECONDS",
+        help="Time step of the gem5 ThermalModel",
+    )
+    parser.add_argument(
+        "--dvfs-governor", default=None, metavar="POLICY",
+        help="Closed-loop DVFS every --stats-period: "
+             f"{', '.join(sorted(GOVERNORS))} or a module:Class plugin (see governor.py)",
+    )
+    parser.add_argument(
+        "--dvfs-points", default=None, metavar="V@F,...",
+        help="Operating point table of the governor (default: governor.OPERATING_POINTS)",
+    )
+    parser.add_argument(
+        "--dvfs-param", action="append", default=[], metavar="NAME=VALUE",
+        help="Governor parameter, e.g. up_threshold=0.6; may be repeated",
+    )
+    parser.add_argument(
+        "--dvfs-shadow", action="store_true",
+        help="Run the governor in shadow mode: keep the initial point and predict every "
+             "interval at the chosen one instead of actuating the clock",
+    )
+    parser.add_argument(
+        "--dvfs-transition-latency", default="100us",
+        help="Time the DVFSHandler takes to switch operating points",
+    )
+    parser.add_argument(
+        "--smarts", default=None, metavar="U,W,M",
+        help="SMARTS sampling: U fast-forward, W warmup and M measured instructions per sample",
+    )
+    parser.add_argument(
+        "--smarts-error", type=float, default=0.03,
+        help="Stop once the IPC confidence half width is below this fraction of the mean",
+    )
+    parser.add_argument(
+        "--smarts-confidence", type=float, default=0.95,
+        help="Confidence level of the SMARTS interval",
+    )
+    parser.add_argument(
+        "--smarts-min-samples", type=int, default=30,
+        help="Minimum number of samples before the stopping rule applies",
+    )
+
+
+def main(spec=None):
+    """Parses the command line, builds the spec'd system and simulates it"""
+    parser = argparse.ArgumentParser()
+    Options.addCommonOptions(parser)
+    Options.addSEOptions(parser)
+    add_builder_options(parser)
+    if "--ruby" in sys.argv:
+        Ruby.define_options(parser)
+    args = parser.parse_args()
+
+    if args.spec:
+        spec = load_spec(args.spec)
+    elif spec is None:
+        fatal("No system spec given, use --spec")
+    print(f"Building system for spec {spec['name']}")
+
+    multiprocesses, numThreads = get_workload(args, spec['num_cpu'])
+    if args.take_prefix_checkpoint:
+        return take_prefix_checkpoint(spec, args, multiprocesses, numThreads)
+    if args.simpoint_profile:
+        return profile_simpoints(spec, args, multiprocesses, numThreads)
+    if args.take_simpoint_checkpoints:
+        return take_simpoint_checkpoints(spec, args, multiprocesses, numThreads)
+
+    if args.smarts:
+        system = build_system(spec, args, multiprocesses, numThreads, cpu_type='atomic')
+        switch_cpu_list = add_switch_cpus(system)
+    elif args.fast_forward:
+        system = build_system(spec, args, multiprocesses, numThreads, cpu_type='atomic')
+        switch_cpu_list = add_switch_cpus(system, int(args.fast_forward))
+    else:
+        system = build_system(spec, args, multiprocesses, numThreads)
+        switch_cpu_list = None
+
+    dvfs = DVFS(system)
+    dvfs.scale(voltage=spec['voltage'], frequency=spec['frequency'])
+    governor = None
+    if args.dvfs_governor:
+        if not args.stats_period or args.smarts:
+            fatal("--dvfs-governor needs --stats-period and cannot be combined with --smarts")
+        points = parse_points(args.dvfs_points) if args.dvfs_points else default_points()
+        level = nearest_level(points, dvfs.current_frequency)
+        if points[level] != (dvfs.current_voltage, dvfs.current_frequency):
+            warn(f"Spec operating point is not in the DVFS table, starting at "
+                 f"{points[level][0]}V@{format_frequency(points[level][1])}")
+        governor = load_governor(args.dvfs_governor, points, parse_params(args.dvfs_param))
+        configure_dvfs(system, points, level, args.dvfs_transition_latency)
+    elif args.dvfs_shadow:
+        fatal("--dvfs-shadow needs --dvfs-governor")
+    if args.gem5_thermal and not args.power_models:
+        fatal("--gem5-thermal needs --power-models")
+
+    root = Root(full_system=False, system=system)
+    if args.power_models:
+        attach_power_models(system, args)
+    if args.restore_prefix_checkpoint:
+        print(f"Restoring prefix checkpoint from {args.restore_prefix_checkpoint}")
+    m5.instantiate(args.restore_prefix_checkpoint)
+
+    controller = None
+    if governor is not None:
+        actuate = None
+        if not args.dvfs_shadow:
+            actuate = dvfs_actuator(system, governor.points)
+            if actuate is None:
+                fatal("This gem5 build cannot change DVFS performance levels from Python "
+                      "(DVFSHandler.perfLevel is not exported); add --dvfs-shadow to predict "
+                      "the governed run without actuating the clock")
+        controller = Controller(governor, level, actuate)
+        print(f"DVFS governor {args.dvfs_governor} in {controller.mode} mode")
+
+    run_id = args.run_id or new_run_id()
+    series = None
+    if args.stats_period:
+        if args.smarts:
+            fatal("--stats-period cannot be combined with --smarts")
+        series = TimeSeriesWriter(
+            os.path.join(m5.options.outdir, f"timeseries_{run_id}.bin"),
+            period=args.stats_period, unit=args.stats_period_unit, run_id=run_id,
+        )
+
+    if args.smarts:
+        clock_period = m5.ticks.fromSeconds(1.0 / parse_frequency(spec['frequency']))
+        if not run_smarts(system, args, switch_cpu_list, clock_period):
+            fatal("No SMARTS sample completed, lower the fast-forward or warmup length")
+    elif not run_measured(system, args, switch_cpu_list, series, controller):
+        fatal("Nothing left to measure, lower --fast-forward or --warmup-insts")
+
+    power = account_energy(system, parse_capacitance(args.capacitance), args.ambient_temperature)
+    manifest = build_manifest(system, spec, args, power, run_id)
+    if series is not None:
+        manifest['timeseries'] = os.path.basename(series.close())
+        manifest['stats_period'] = {'period': args.stats_period, 'unit': args.stats_period_unit,
+                                    'intervals': len(series.ticks)}
+    if controller is not None:
+        thermal = {'ambient': args.ambient_temperature} if args.ambient_temperature is not None else None
+        manifest['dvfs'] = controller.summary(parse_capacitance(args.capacitance),
+                                              cache_geometry(cache_params(system)), thermal)
+        print_summary(manifest['dvfs'])
+    return save_stats(manifest)
+
+
+if __name__ == "__m5_main__":
+    main()
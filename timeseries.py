@@ -0,0 +1,253 @@
+# Binary time series of periodic stats dumps.
+#
+# system_builder.py --stats-period N dumps and resets the stats every N ticks
+# (or N instructions with --stats-period-unit insts) of the measured window.
+# After every dump the new text is read back from stats.txt and appended as
+# one row to timeseries_<run id>.bin, an (interval x stat) float64 matrix:
+#
+#   magic "GEM5TS01" | uint64 header length | JSON header | padding | matrix
+#
+# The header holds the stat names, the number of intervals, the end tick of
+# every interval and the period.  Rows are streamed to a side file while the
+# simulation runs (stats that only appear in later dumps add columns) and the
+# dense matrix is written when the run ends.  Existing multi-dump stats files
+# (e.g. SMARTS runs) can be converted too:
+#
+#   python3 timeseries.py convert stats_<run id>.txt -o series.bin
+#   python3 timeseries.py show series.bin --stat simInsts --stat system.cpu.numCycles
+#
+# The writer only needs the standard library, so it also runs inside gem5;
+# reading uses NumPy.
+
+import argparse
+import json
+import math
+import os
+import struct
+import sys
+from array import array
+
+
+MAGIC = b"GEM5TS01"
+BEGIN_MARKER = "---------- Begin Simulation Statistics ----------"
+END_MARKER = "---------- End Simulation Statistics"
+TRAILER_MARKER = "Configuration values"
+
+
+# 1. Writing
+def dump_values(lines):
+    """{stat name: value} of the stat lines of one text dump"""
+    values = {}
+    for line in lines:
+        if line.startswith("----------") or line.startswith(TRAILER_MARKER):
+            continue
+        fields = line.partition("#")[0].split()
+        if len(fields) < 2:
+            continue
+        try:
+            values[fields[0]] = float(fields[1])
+        except ValueError:
+            values[fields[0]] = math.nan
+    return values
+
+
+class TimeSeriesWriter:
+    """Streams one row per interval and writes the matrix on close()"""
+
+    def __init__(self, path, **meta):
+        self.path = path
+        self.meta = meta
+        self.names = []
+        self.index = {}
+        self.ticks = []
+        self.rows_path = path + ".rows"
+        self.rows = open(self.rows_path, "wb")
+
+    def append(self, values, tick=None):
+        for name in values:
+            if name not in self.index:
+                self.index[name] = len(self.names)
+                self.names.append(name)
+        row = array('d', [math.nan]) * len(self.names)
+        for name, value in values.items():
+            row[self.index[name]] = value
+        if sys.byteorder != "little":
+            row.byteswap()
+        self.rows.write(struct.pack("<I", len(row)))
+        self.rows.write(row.tobytes())
+        self.rows.flush()
+        self.ticks.append(tick)
+
+    def close(self):
+        """Writes the dense matrix (padding short early rows with nan)"""
+        self.rows.close()
+        width = len(self.names)
+        header = dict(self.meta, names=self.names, intervals=len(self.ticks), ticks=self.ticks)
+        header = json.dumps(header, separators=(',', ':')).encode()
+        header += b" " * (-(len(MAGIC) + 8 + len(header)) % 8)
+        tmp = self.path + ".tmp"
+        with open(self.rows_path, "rb") as rows, open(tmp, "wb") as out:
+            out.write(MAGIC)
+            out.write(struct.pack("<Q", len(header)))
+            out.write(header)
+            pad = array('d', [math.nan])
+            while True:
+                count = rows.read(4)
+                if not count:
+                    break
+                (n,) = struct.unpack("<I", count)
+                out.write(rows.read(8 * n))
+                out.write(pad.tobytes() * (width - n))
+        os.replace(tmp, self.path)
+        os.remove(self.rows_path)
+        return self.path
+
+
+class StatsFollower:
+    """Reads the dumps appended to a growing stats.txt since the last call"""
+
+    def __init__(self, path):
+        self.path = path
+        self.offset = 0
+
+    def new_dumps(self):
+        """Returns the line lists of the complete dumps written since the last call"""
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            data = f.read()
+        dumps = []
+        consumed = 0
+        current = None
+        position = 0
+        for raw in data.splitlines(True):
+            position += len(raw)
+            if not raw.endswith(b"\n"):
+                break  # dump still being written
+            line = raw.decode(errors="replace").rstrip("\n")
+            if line.startswith(BEGIN_MARKER):
+                current = []
+            elif line.startswith(END_MARKER) and current is not None:
+                dumps.append(current)
+                current = None
+                consumed = position
+            elif current is not None:
+                current.append(line)
+        self.offset += consumed
+        return dumps
+
+
+def convert(stats_path, out_path, **meta):
+    """Converts every dump of a text stats file into a time-series file"""
+    follower = StatsFollower(stats_path)
+    writer = TimeSeriesWriter(out_path, source=os.path.basename(stats_path), **meta)
+    for lines in follower.new_dumps():
+        values = dump_values(lines)
+        writer.append(values, values.get('finalTick'))
+    return writer.close()
+
+
+# 2. Reading
+class TimeSeries:
+    """(interval x stat) matrix of a time-series file"""
+
+    def __init__(self, path):
+        import numpy as np
+
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a stats time-series file")
+            (length,) = struct.unpack("<Q", f.read(8))
+            self.header = json.loads(f.read(length))
+            offset = f.tell()
+        self.path = path
+        self.names = self.header['names']
+        self.index = {name: i for i, name in enumerate(self.names)}
+        shape = (self.header['intervals'], len(self.names))
+        if shape[0] and shape[1]:
+            self.data = np.memmap(path, dtype="<f8", mode="r", offset=offset, shape=shape)
+        else:
+            self.data = np.empty(shape)
+        self.ticks = np.array([np.nan if t is None else t for t in self.header['ticks']], dtype=float)
+
+    def __len__(self):
+        return self.data.shape[0]
+
+    def column(self, name):
+        """Values of stat name in every interval (nan where it was not dumped)"""
+        import numpy as np
+
+        i = self.index.get(name)
+        return np.full(len(self), np.nan) if i is None else np.asarray(self.data[:, i])
+
+    def columns(self, names):
+        import numpy as np
+
+        return np.stack([self.column(name) for name in names], axis=1)
+
+    def total(self, name):
+        """Sum of a per-interval counter over all intervals"""
+        import numpy as np
+
+        return float(np.nansum(self.column(name)))
+
+    def ipc(self, clock_stat='system.cpu_clk_domain.clock'):
+        """Committed instructions per CPU cycle of every interval"""
+        cycles = self.column('simTicks') / self.column(clock_stat)
+        return self.column('simInsts') / cycles
+
+
+def find_timeseries(stats_path, manifest=None):
+    """Path of the time-series file belonging to a stats dump, or None"""
+    if manifest and manifest.get('timeseries'):
+        path = os.path.join(os.path.dirname(stats_path), manifest['timeseries'])
+        return path if os.path.exists(path) else None
+    return None
+
+
+# 3. Command line entry point
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert and inspect stats time series")
+    commands = parser.add_subparsers(dest="command", required=True)
+    p_convert = commands.add_parser("convert", help="Turn a multi-dump stats file into a time series")
+    p_convert.add_argument("stats")
+    p_convert.add_argument("-o", "--output", default=None)
+    p_show = commands.add_parser("show", help="Print stats of every interval")
+    p_show.add_argument("series")
+    p_show.add_argument("--stat", action="append", default=[], help="Stat to show; may be repeated")
+    p_show.add_argument("--ipc", action="store_true", help="Show the IPC of every interval")
+    p_show.add_argument("--csv", default=None, help="Write the shown columns as CSV")
+    args = parser.parse_args(argv)
+
+    if args.command == "convert":
+        output = args.output or os.path.splitext(args.stats)[0] + ".bin"
+        convert(args.stats, output)
+        print(f"Time series saved as {output}")
+        return 0
+
+    series = TimeSeries(args.series)
+    columns = list(args.stat)
+    data = [series.column(name) for name in columns]
+    if args.ipc:
+        columns.append('ipc')
+        data.append(series.ipc())
+    print(f"{len(series)} intervals, {len(series.names)} stats")
+    header = ['interval', 'tick'] + columns
+    rows = [[i, series.ticks[i]] + [d[i] for d in data] for i in range(len(series))]
+    if args.csv:
+        import csv
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            writer.writerows(rows)
+        print(f"Time series saved as {args.csv}")
+    else:
+        print("  ".join(f"{h:>14}" for h in header))
+        for row in rows:
+            print("  ".join(f"{v:>14.6g}" for v in row))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())